@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.blog_memory
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Benchmark that measures the memory used by a :class:`blohg.models.Blog`
+    per content file, for a Mercurial repository with lots of posts, and by
+    the file contexts cached by its change context.
+
+    Usage::
+
+        $ python benchmarks/blog_memory.py --posts 5000
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+from mercurial import commands, hg, ui
+from shutil import rmtree
+from tempfile import mkdtemp
+from types import FunctionType, ModuleType
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from blohg.models import Blog
+from blohg.vcs_backends.hg.changectx import ChangeCtxDefault
+
+POST = u"""\
+Post number %(i)i
+=================
+
+.. tags: tag-%(a)i, tag-%(b)i, common
+.. aliases: /old/post-%(i)i/
+
+First paragraph of the post number %(i)i.
+
+.. read_more
+
+%(body)s
+"""
+
+
+def create_repo(repo_path, posts):
+    ui_ = ui.ui()
+    ui_.setconfig('ui', 'quiet', True)
+    commands.init(ui_, repo_path)
+    repo = hg.repository(ui_, repo_path)
+    post_dir = os.path.join(repo_path, 'content', 'post')
+    os.makedirs(post_dir)
+    for i in range(posts):
+        with open(os.path.join(post_dir, 'post-%i.rst' % i), 'w') as fp:
+            fp.write((POST % {'i': i, 'a': i % 50, 'b': i % 7,
+                              'body': 'Lorem ipsum dolor sit amet. ' * 40}) \
+                     .encode('utf-8'))
+    commands.commit(ui_, repo, message='posts', user='foo <foo@bar.com>',
+                    addremove=True)
+
+
+def deep_getsizeof(root, exclude):
+    """Returns the size of all the objects reachable from ``root``, not
+    following the objects in ``exclude`` nor types, modules and functions.
+    """
+    seen = set(id(i) for i in exclude)
+    stack = [root]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType,
+                                               FunctionType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[4])
+    parser.add_argument('--posts', type=int, default=2000,
+                        help='number of posts (default: 2000)')
+    args = parser.parse_args()
+
+    repo_path = mkdtemp()
+    try:
+        create_repo(repo_path, args.posts)
+        changectx = ChangeCtxDefault(repo_path)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.time()
+        blog = Blog(changectx, 'content', '.rst', 3)
+        elapsed = time.time() - start
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+
+        # the repository objects are shared, and aren't part of the blog.
+        exclude = [changectx, changectx._repo, changectx._ctx]
+        size = deep_getsizeof(blog, exclude)
+        print 'posts:                  %i' % args.posts
+        print 'build time:             %.2f s' % elapsed
+        print 'max RSS growth:         %i KiB' % rss
+        print 'blog size:              %i KiB' % (size / 1024)
+        print 'blog size per post:     %i bytes' % (size / args.posts)
+
+        # the file contexts cached by the change context (and the data read
+        # for them) are kept alive as long as the blog, but reported apart.
+        fsize = deep_getsizeof(changectx._filectxs, exclude)
+        print 'file contexts size:     %i KiB' % (fsize / 1024)
+        print 'total size per post:    %i bytes' % ((size + fsize) /
+                                                    args.posts)
+
+        # listing pages touch the title of the posts.
+        for post in blog.get_all(True):
+            post.title
+        size = deep_getsizeof(blog, exclude)
+        fsize = deep_getsizeof(changectx._filectxs, exclude)
+        print 'after listing per post: %i bytes' % (size / args.posts)
+        print 'total after listing:    %i bytes' % ((size + fsize) /
+                                                    args.posts)
+    finally:
+        rmtree(repo_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.git_backends
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Benchmark that compares the git backends available (pygit2 and the git
+    command line tool) for a repository with lots of posts and commits. The
+    plain directory backend, that reads the same tree without any VCS, is
+    included as a baseline.
+
+    Usage::
+
+        $ python benchmarks/git_backends.py --posts 2000 --commits 200
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from shutil import rmtree
+from tempfile import mkdtemp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from blohg.models import Blog
+
+POST = u"""\
+Post number %(i)i
+=================
+
+.. tags: tag-%(a)i, common
+
+First paragraph of the post number %(i)i.
+
+.. read_more
+
+%(body)s
+"""
+
+
+def git(repo_path, *args):
+    env = dict(os.environ, GIT_AUTHOR_NAME='foo',
+               GIT_AUTHOR_EMAIL='foo@bar.com', GIT_COMMITTER_NAME='foo',
+               GIT_COMMITTER_EMAIL='foo@bar.com')
+    subprocess.check_call(['git'] + list(args), cwd=repo_path, env=env)
+
+
+def create_repo(repo_path, posts, commits):
+    git(repo_path, 'init', '-q')
+    git(repo_path, 'symbolic-ref', 'HEAD', 'refs/heads/master')
+    post_dir = os.path.join(repo_path, 'content', 'post')
+    os.makedirs(post_dir)
+    per_commit = max(posts / commits, 1)
+    for i in range(posts):
+        with open(os.path.join(post_dir, 'post-%i.rst' % i), 'w') as fp:
+            fp.write((POST % {'i': i, 'a': i % 50,
+                              'body': 'Lorem ipsum dolor sit amet. ' * 40}) \
+                     .encode('utf-8'))
+        if (i + 1) % per_commit == 0 or i == posts - 1:
+            git(repo_path, 'add', '-A')
+            git(repo_path, 'commit', '-q', '-m', 'post %i' % i)
+
+
+def get_backends():
+    backends = []
+    try:
+        from blohg.vcs_backends.git.changectx import ChangeCtxDefault
+    except ImportError:
+        pass
+    else:
+        backends.append(('pygit2', ChangeCtxDefault))
+    try:
+        from blohg.vcs_backends.gitcli import GitCliRepository
+    except ImportError:
+        pass
+    else:
+        backends.append(('git cli', lambda path: \
+                         GitCliRepository(path).get_changectx()))
+    from blohg.vcs_backends.fs import FsRepository
+    backends.append(('plain directory', lambda path: \
+                     FsRepository(path).get_changectx()))
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[4])
+    parser.add_argument('--posts', type=int, default=2000,
+                        help='number of posts (default: 2000)')
+    parser.add_argument('--commits', type=int, default=200,
+                        help='number of commits (default: 200)')
+    args = parser.parse_args()
+
+    repo_path = mkdtemp()
+    try:
+        create_repo(repo_path, args.posts, args.commits)
+        for name, get_changectx in get_backends():
+            # persisted history files would make the runs incomparable.
+            for i in os.listdir(os.path.join(repo_path, '.git')):
+                if i.startswith('blohg_'):
+                    os.unlink(os.path.join(repo_path, '.git', i))
+            start = time.time()
+            changectx = get_changectx(repo_path)
+            files = changectx.files
+            listed = time.time()
+            blog = Blog(changectx, 'content', '.rst', 3)
+            built = time.time()
+            for post in blog.get_all(True):
+                post._filectx.content
+            read = time.time()
+            print '%s:' % name
+            print '    files listed:  %i' % len(files)
+            print '    listing:       %.2f s' % (listed - start)
+            print '    blog build:    %.2f s' % (built - listed)
+            print '    reading posts: %.2f s' % (read - built)
+    finally:
+        rmtree(repo_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,16 +10,22 @@
 """
 
 import os
+import threading
+import time
 import yaml
 from flask import Flask as _Flask, render_template, request
 from flask.ctx import _app_ctx_stack
 from flask.ext.babel import Babel
 from flask.helpers import locked_cached_property
+from hashlib import sha1
 from jinja2.loaders import ChoiceLoader
 
 # import blohg stuff
+from blohg.cache import RenderCache
 from blohg.ext import ExtensionImporter
+from blohg.index import MetadataIndex
 from blohg.models import Blog
+from blohg.prerender import render_all
 from blohg.signals import reloaded
 from blohg.static import BlohgStaticFile
 from blohg.templating import BlohgLoader
@@ -45,18 +51,23 @@ class Blohg(object):
         self.repo = load_repo(self.app.config['REPO_PATH'])
         self.changectx = None
         self.content = []
+        self.extensions_id = None
+        self._last_check = 0
+        self._reload_lock = threading.Lock()
         app.blohg = self
 
     def init_repo(self, revision_id):
-        if not os.path.isdir(self.app.config['REPO_PATH']):
+        # snapshots are files, not directories.
+        if not os.path.exists(self.app.config['REPO_PATH']):
             raise RuntimeError('Repository not found: %s' % \
                                self.app.config['REPO_PATH'])
         self.revision_id = revision_id
         self.reload()
         self.load_extensions()
+        self.prerender()
 
-    def _load_config(self):
-        config = yaml.load(self.changectx.get_filectx('config.yaml').content)
+    def _load_config(self, changectx):
+        config = yaml.load(changectx.get_filectx('config.yaml').content)
 
         # monkey-patch configs when running from built-in server
         if 'RUNNING_FROM_CLI' in os.environ:
@@ -64,7 +75,7 @@ class Blohg(object):
                 del config['GOOGLE_ANALYTICS']
             config['DISQUS_DEVELOPER'] = True
 
-        self.app.config.update(config)
+        return config
 
     def reload(self):
 
@@ -73,26 +84,105 @@ class Blohg(object):
         if not os.path.exists(self.app.config['REPO_PATH']):
             return
 
-        if self.changectx is not None and not self.changectx.needs_reload():
+        # only one thread reloads the repository. the other threads keep
+        # serving the current blog meanwhile.
+        if not self._reload_lock.acquire(False):
             return
-
-        self.changectx = self.repo.get_changectx(self.revision_id)
-        self._load_config()
+        try:
+            self._reload()
+        finally:
+            self._reload_lock.release()
+
+    def _reload(self):
+        if self.changectx is not None:
+            # check the repository at most once per interval, if set.
+            now = time.time()
+            interval = self.app.config['RELOAD_INTERVAL']
+            if now - self._last_check < interval:
+                return
+            self._last_check = now
+            if not self.changectx.needs_reload():
+                return
+
+        # the new change context, config and blog are built aside, and only
+        # published when complete, because other threads are serving the
+        # current ones.
+        changectx = self.repo.get_changectx(self.revision_id)
+        if self.changectx is not None:
+            changectx.update_from(self.changectx)
+        new_config = self._load_config(changectx)
+        config = dict(self.app.config)
+        config.update(new_config)
+
+        # list only the directories used by blohg, if enabled.
+        if config['LIST_SUBTREES_ONLY']:
+            changectx.subtrees = [i.strip('/') for i in [
+                config['CONTENT_DIR'], self.app.template_folder, 'static',
+                config['ATTACHMENT_DIR'], config['EXTENSIONS_DIR']] if i]
+
+        # the backends persist their own caches along with the render cache.
+        # the files written by blohg aren't changes of the working directory.
+        changectx.cache_dir = config['RENDER_CACHE_DIR']
+        changectx.excluded_paths = [i for i in [config['RENDER_CACHE_DIR'],
+                                                config['METADATA_INDEX']] if i]
 
         # build a regular expression for search posts/pages.
-        content_dir = self.app.config['CONTENT_DIR']
-        post_ext = self.app.config['POST_EXT']
-        rst_header_level = self.app.config['RST_HEADER_LEVEL']
-
-        self.content = Blog(self.changectx, content_dir, post_ext,
-                            rst_header_level)
+        content_dir = config['CONTENT_DIR']
+        post_ext = config['POST_EXT']
+        rst_header_level = config['RST_HEADER_LEVEL']
+
+        # persistent cache for the parsed reStructuredText, if enabled.
+        render_cache = None
+        if config['RENDER_CACHE_DIR'] is not None:
+            render_cache = RenderCache(config['RENDER_CACHE_DIR'])
+
+        # shared index of the metadata of the content files, if enabled. the
+        # working directory doesn't have a stable revision to be indexed.
+        metadata_index = None
+        if config['METADATA_INDEX'] is not None and \
+           self.revision_id == REVISION_DEFAULT:
+            metadata_index = MetadataIndex(config['METADATA_INDEX'])
+
+        # reuse the unchanged pages/posts from the current blog, if enabled.
+        # pages that render other files (e.g. with the ``page`` role or the
+        # ``include`` directive) may be stale then.
+        previous = None
+        if config['REUSE_UNCHANGED'] and isinstance(self.content, Blog):
+            previous = self.content
+
+        content = Blog(changectx, content_dir, post_ext, rst_header_level,
+                       render_cache, previous, metadata_index)
+
+        self.app.config.update(new_config)
+        self.changectx = changectx
+        self.content = content
 
         reloaded.send(self)
 
+    def prerender(self):
+        # only called at startup, after loading the extensions (that may
+        # register directives and roles). forking the process while serving
+        # requests from threads isn't safe, then the blogs built by reloads
+        # are rendered lazily.
+        processes = self.app.config['EAGER_RENDER']
+        if not processes or not isinstance(self.content, Blog):
+            return
+        if processes is True:
+            processes = None
+        render_all(self.app, self.content.get_all(), processes)
+
     def load_extensions(self):
+        # the extensions may register directives and roles, then they are
+        # part of the key of the rendered pages in the render cache.
+        extensions = list(self.app.config['EXTENSIONS'])
         if self.embedded_extensions:
             ExtensionImporter.new(self.changectx,
                                   self.app.config['EXTENSIONS_DIR'])
+            ext_dir = self.app.config['EXTENSIONS_DIR'].rstrip('/') + '/'
+            for path in self.changectx.files.prefixed(ext_dir):
+                extensions.append((path, self.changectx.get_filectx(
+                    path, False).blob_id))
+        self.extensions_id = sha1(repr(extensions)).hexdigest()
         with self.app.app_context():
             for ext in self.app.config['EXTENSIONS']:
                 __import__('blohg_%s' % ext)
@@ -130,6 +220,12 @@ def create_app(repo_path=None, revision_id=REVISION_DEFAULT,
     app.config.setdefault('RST_HEADER_LEVEL', 3)
     app.config.setdefault('EXTENSIONS', [])
     app.config.setdefault('EXTENSIONS_DIR', 'ext')
+    app.config.setdefault('RENDER_CACHE_DIR', None)
+    app.config.setdefault('METADATA_INDEX', None)
+    app.config.setdefault('EAGER_RENDER', False)
+    app.config.setdefault('LIST_SUBTREES_ONLY', False)
+    app.config.setdefault('RELOAD_INTERVAL', 0)
+    app.config.setdefault('REUSE_UNCHANGED', False)
 
     app.config['REPO_PATH'] = repo_path
 
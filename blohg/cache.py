@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.cache
+    ~~~~~~~~~~~
+
+    Module with the persistent cache for the reStructuredText parser results.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+from docutils import __version__ as docutils_version
+from flask import current_app, has_app_context, has_request_context, request
+from hashlib import sha1
+from tempfile import mkstemp
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from blohg.version import version
+
+
+class RenderCache(object):
+    """On-disk cache for the dicts returned by
+    :func:`blohg.rst_parser.parser` and for the metadata variables of the
+    content files.
+
+    Entries are keyed by the identifier of the file blob and by everything
+    else that changes the output of the parser (header level, blohg and
+    docutils versions, and :func:`render_environment`), so unchanged files
+    survive restarts and new commits without being parsed again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def make_key(self, *args):
+        args = [version, docutils_version] + list(args)
+        return sha1('\0'.join([unicode(i).encode('utf-8') \
+                               for i in args])).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:])
+
+    def get(self, key):
+        try:
+            with open(self._get_path(key), 'rb') as fp:
+                return pickle.load(fp)
+        except Exception:
+            # missing or broken entries are just cache misses.
+            return None
+
+    def set(self, key, value):
+        path = self._get_path(key)
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            fd, tmp_path = mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump(value, fp, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            # a read-only cache is still better than no blog at all.
+            pass
+
+
+def render_environment():
+    """Returns the values used by the directives and roles, besides the
+    other files of the repository: the root of the external URLs, some
+    config values and the loaded extensions.
+
+    The results of the parser that depend on other files aren't cached at
+    all (see :func:`blohg.rst_parser.directives.depends_on_repo`).
+    """
+    if not has_app_context():
+        return ()
+    url_root = current_app.config.get('SERVER_NAME')
+    if has_request_context():
+        url_root = request.url_root
+    blohg = getattr(current_app, 'blohg', None)
+    return (url_root, current_app.config['CONTENT_DIR'],
+            current_app.config['ATTACHMENT_DIR'],
+            current_app.config['POST_EXT'],
+            getattr(blohg, 'extensions_id', None))
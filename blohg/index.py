@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.index
+    ~~~~~~~~~~~
+
+    Module with the SQLite-backed index of the metadata of the content files,
+    shared by all the processes serving the same repository.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import json
+import sqlite3
+from binascii import hexlify
+from flask.helpers import locked_cached_property
+
+from blohg.vcs import FileCtx as _FileCtx
+
+SCHEMA = """\
+CREATE TABLE IF NOT EXISTS revisions (
+    revision TEXT PRIMARY KEY,
+    created INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    revision TEXT NOT NULL,
+    path TEXT NOT NULL,
+    blob_id TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    mdate INTEGER,
+    author TEXT,
+    vars TEXT NOT NULL,
+    PRIMARY KEY (revision, path)
+);
+"""
+
+
+class IndexedFileCtx(_FileCtx):
+    """File context built from a row of the metadata index. The history
+    related properties come from the index, and the real file context is
+    only retrieved from the change context if the file data is needed.
+    """
+
+    def __init__(self, changectx, path, blob_id, date, mdate, author):
+        self._changectx = changectx
+        self._path = path
+        self._blob_id = blob_id
+        self._date = date
+        self._mdate = mdate
+        self._author = author
+
+    @locked_cached_property
+    def _filectx(self):
+        return self._changectx.get_filectx(self._path.encode('utf-8'))
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def blob_id(self):
+        return self._blob_id
+
+    @property
+    def data(self):
+        return self._filectx.data
+
+    @property
+    def content(self):
+        return self._filectx.content
+
+    @property
+    def date(self):
+        return self._date
+
+    @property
+    def mdate(self):
+        return self._mdate
+
+    @property
+    def author(self):
+        return self._author
+
+
+class MetadataIndex(object):
+    """Index of the metadata of the content files (paths, blob identifiers,
+    dates, authors and metadata variables), stored per revision in a SQLite
+    database.
+
+    The first process to build a :class:`blohg.models.Blog` for a given
+    revision writes the index, and the other processes (and restarts) build
+    their blogs from it, without querying the VCS for the history of each
+    file. Only the most recent revisions are kept.
+    """
+
+    def __init__(self, db_path, max_revisions=5):
+        self.db_path = db_path
+        self.max_revisions = max_revisions
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def get_key(self, changectx, content_dir, post_ext):
+        revision_id = changectx.revision_id
+        if hasattr(revision_id, 'hex'):  # pygit2 oid
+            revision_id = revision_id.hex
+        else:
+            revision_id = hexlify(revision_id)
+        return u'%s:%s:%s' % (revision_id, content_dir, post_ext)
+
+    def get(self, key):
+        """Returns a list of tuples ``(path, blob_id, date, mdate, author,
+        vars)`` for the given key, or ``None`` if the revision wasn't indexed
+        yet.
+        """
+        try:
+            conn = self._connect()
+            try:
+                cur = conn.execute('SELECT 1 FROM revisions WHERE '
+                                   'revision = ?', (key,))
+                if cur.fetchone() is None:
+                    return None
+                cur = conn.execute('SELECT path, blob_id, date, mdate, '
+                                   'author, vars FROM files WHERE '
+                                   'revision = ? ORDER BY path', (key,))
+                return [row[:5] + (json.loads(row[5]),) for row in cur]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+    def set(self, key, rows, now):
+        """Stores a list of tuples ``(path, blob_id, date, mdate, author,
+        vars)`` for the given key, and drops the oldest revisions.
+        """
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute('DELETE FROM files WHERE revision = ?',
+                                 (key,))
+                    conn.executemany('INSERT INTO files VALUES '
+                                     '(?, ?, ?, ?, ?, ?, ?)',
+                                     [(key,) + row[:5] + \
+                                      (json.dumps(row[5]),) for row in rows])
+                    conn.execute('INSERT OR REPLACE INTO revisions VALUES '
+                                 '(?, ?)', (key, now))
+                    old = conn.execute('SELECT revision FROM revisions '
+                                       'ORDER BY created DESC LIMIT -1 '
+                                       'OFFSET ?', (self.max_revisions,))
+                    for revision, in old.fetchall():
+                        conn.execute('DELETE FROM files WHERE revision = ?',
+                                     (revision,))
+                        conn.execute('DELETE FROM revisions WHERE '
+                                     'revision = ?', (revision,))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            # serving the blog is more important than indexing it.
+            pass
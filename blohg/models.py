@@ -10,12 +10,17 @@
 """
 
 import re
+import sys
 
+from array import array
+from bisect import bisect_left
 from datetime import datetime
 from flask.helpers import locked_cached_property
 from time import time
 from jinja2 import Markup
 
+from blohg.cache import render_environment
+from blohg.index import IndexedFileCtx
 from blohg.rst_parser import parser
 from blohg.utils import parse_date
 
@@ -23,41 +28,220 @@ re_metadata = re.compile(r'\.\. +([a-z]+): *(.+)')
 re_read_more = re.compile(r'\.\. +read_more')
 re_author = re.compile(r'^(?P<name>[^<]*[^ ])( ?<(?P<email>[^<]*)>)?$')
 
+# marks missing modification dates in the arrays of the metadata store.
+_NO_DATE = -sys.maxint - 1
+
+
+def _sorted_contains(seq, item):
+    i = bisect_left(seq, item)
+    return i < len(seq) and seq[i] == item
+
+
+class MetadataStore(object):
+    """Compact, column oriented storage for the metadata of the pages and
+    posts of a :class:`Blog`.
+
+    Paths, blob identifiers and authors are stored once per entry (authors
+    are interned), dates are stored in arrays, tags are stored as interned
+    ids, and slugs are stored as offsets of the paths. The :class:`Page` and
+    :class:`Post` objects bound to a store are just views over it, and only
+    keep their metadata variables and what was rendered for them.
+    """
+
+    def __init__(self, changectx, content_dir, post_ext, rst_header_level,
+                 render_cache=None):
+        self.changectx = changectx
+        self.content_dir = content_dir
+        self.post_ext = post_ext
+        self.rst_header_level = rst_header_level
+        self.render_cache = render_cache
+        self._strings = {}
+        self.paths = []
+        self.blob_ids = []
+        self.authors = []
+        self.dates = array('l')
+        self.mdates = array('l')
+        self.slug_ends = array('l')
+        self.tag_names = []
+        self._tag_ids = {}
+        self.tag_offsets = array('l', [0])
+        self.tag_ids = array('l')
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _intern(self, value):
+        return self._strings.setdefault(value, value)
+
+    def _get_tag_id(self, tag):
+        if tag not in self._tag_ids:
+            self._tag_ids[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+        return self._tag_ids[tag]
+
+    def add(self, obj, author=None):
+        """Copies the metadata of a :class:`Page` or :class:`Post` object to
+        the store, and binds the object to it.
+
+        :param obj: a :class:`Page` or :class:`Post` object.
+        :param author: the author of the file, if known. Otherwise it is
+                       only retrieved from the VCS when needed.
+        :return: the position of the object in the store.
+        """
+        old_store, old_i = obj._ref
+        if author is None and old_i is not None:
+            author = old_store.authors[old_i]
+        path = obj.path
+        slug = obj.slug
+        mdate = obj.mdate
+        i = len(self.paths)
+        self.paths.append(path)
+        self.blob_ids.append(obj._blob_id)
+        self.authors.append(author and self._intern(author))
+        self.dates.append(obj.date)
+        self.mdates.append(_NO_DATE if mdate is None else mdate)
+        self.slug_ends.append(-1 if slug is None else \
+                              len(self.content_dir) + 1 + len(slug))
+        if isinstance(obj, Post):  # pages don't have tags
+            self.tag_ids.extend([self._get_tag_id(tag) for tag in obj.tags])
+        self.tag_offsets.append(len(self.tag_ids))
+        obj._bind(self, i)
+        return i
+
+    def get_slug(self, i):
+        end = self.slug_ends[i]
+        if end >= 0:
+            return self.paths[i][len(self.content_dir) + 1:end]
+
+    def get_mdate(self, i):
+        mdate = self.mdates[i]
+        if mdate != _NO_DATE:
+            return mdate
+
+    def get_tags(self, i):
+        return [self.tag_names[j] for j in \
+                self.tag_ids[self.tag_offsets[i]:self.tag_offsets[i + 1]]]
+
+    def get_filectx(self, i):
+        return self.changectx.get_filectx(self.paths[i].encode('utf-8'))
+
 
 class Page(object):
     """Pages are the very basic content element of a blog. They don't have tags
     nor other fancy stuff that belongs to posts."""
 
-    def __init__(self, filectx, content_dir, post_ext, rst_header_level):
-        self._filectx = filectx
-        self._content_dir = content_dir
-        self._post_ext = post_ext
-        self._rst_header_level = rst_header_level
-        self._vars = {}
-        self._title = None
+    # the instance dict is only created when something is rendered.
+    __slots__ = ('_ref', '_source', '_metadata', '__dict__')
+
+    def __init__(self, filectx, content_dir, post_ext, rst_header_level,
+                 render_cache=None, metadata=None, store=None):
+        if store is None:
+            store = MetadataStore(None, content_dir, post_ext,
+                                  rst_header_level, render_cache)
+        self._ref = (store, None)
+        self._source = filectx
+        self._metadata = metadata
+
+    def _bind(self, store, i):
+        # the file context is retrieved again from the change context of the
+        # store, if the content is ever needed.
+        self._ref = (store, i)
+        self._source = None
+
+    def _copy(self, filectx):
+        # objects reused by another blog are copied, because the previous blog
+        # (and the requests still using it) keeps the original ones bound to
+        # its store.
+        rv = self.__class__.__new__(self.__class__)
+        rv._ref = self._ref
+        rv._source = filectx
+        rv._metadata = self._metadata
+        rv.__dict__.update(self.__dict__)
+        return rv
+
+    @property
+    def _filectx(self):
+        source = self._source
+        if source is None:
+            store, i = self._ref
+            source = self._source = store.get_filectx(i)
+        return source
 
-        # get metadata variables from rst source.
+    @property
+    def _blob_id(self):
+        store, i = self._ref
+        if i is None:
+            return self._filectx.blob_id
+        return store.blob_ids[i]
+
+    def _cached(self, func, args, cacheable=lambda rv: True):
+        render_cache = self._ref[0].render_cache
+        if render_cache is None:
+            return func()
+        key = render_cache.make_key(self._blob_id, *args)
+        rv = render_cache.get(key)
+        if rv is None:
+            rv = func()
+            if cacheable(rv):
+                render_cache.set(key, rv)
+        return rv
+
+    def _parse_vars(self):
+        rv = {}
         for i in re_metadata.finditer(self._filectx.content):
-            self._vars[i.group(1).strip()] = i.group(2).strip()
+            rv[i.group(1).strip()] = i.group(2).strip()
+        return rv
+
+    @property
+    def _vars(self):
+        # get metadata variables from rst source. the source is only read
+        # when the variables for this file are not cached yet.
+        metadata = self._metadata
+        if metadata is None:
+            metadata = self._metadata = self._cached(self._parse_vars,
+                                                     ('metadata',))
+        return metadata
+
+    def _parse(self, part, content):
+        rst_header_level = self._ref[0].rst_header_level
+        return self._cached(lambda: parser(content, rst_header_level,
+                                           ':repo:%s' % self.path),
+                            (self.path, part, rst_header_level) + \
+                            render_environment(),
+                            lambda rv: rv['cacheable'])
+
+    def preload(self, parsed_source, parsed_abstract):
+        """Sets the results of the parser for the source and the abstract of
+        this page, when they were rendered somewhere else (e.g. by
+        :func:`blohg.prerender.render_all`).
+        """
+        self.__dict__['parsed_source'] = parsed_source
+        self.__dict__['parsed_abstract'] = parsed_abstract
 
     @locked_cached_property
     def parsed_source(self):
-        return parser(self.full, self._rst_header_level,
-                      ':repo:%s' % self.path)
+        return self._parse('source', self.full)
 
     @locked_cached_property
     def parsed_abstract(self):
         if not self.read_more:
             return self.parsed_source
-        return parser(self.abstract, self._rst_header_level,
-                      ':repo:%s' % self.path)
+        return self._parse('abstract', self.abstract)
 
     @locked_cached_property
     def author(self):
         # get the author name/email from the 'author' variable or from the
         # commiter of this content to the repository.
         author_dict = {'name': None, 'email': None}
-        author = self._vars.get('author', self._filectx.author)
+        author = self._vars.get('author')
+        if author is None:
+            store, i = self._ref
+            if i is None:
+                author = self._filectx.author
+            else:
+                author = store.authors[i]
+                if author is None:
+                    author = store.authors[i] = self._filectx.author
         if not author:
             return author_dict
         rv = re_author.match(author)
@@ -92,58 +276,65 @@ class Page(object):
     def author_email(self):
         return self.author.get('email')
 
-    @locked_cached_property
+    @property
     def path(self):
-        return self._filectx.path
-
-    @locked_cached_property
-    def _slug_offset_init(self):
-        return len(self._content_dir) + 1
-
-    @locked_cached_property
-    def _slug_offset_end(self):
-        return len(self._post_ext)
+        store, i = self._ref
+        if i is None:
+            return self._filectx.path
+        return store.paths[i]
 
-    @locked_cached_property
+    @property
     def slug(self):
-        if (self.path.startswith(self._content_dir + '/') or \
-            self.path.startswith(self._content_dir + '\\')) and \
-           self.path.endswith(self._post_ext):
-            slug = self.path[self._slug_offset_init:-self._slug_offset_end]
+        store, i = self._ref
+        if i is not None:
+            return store.get_slug(i)
+        content_dir, post_ext = store.content_dir, store.post_ext
+        path = self.path
+        if (path.startswith(content_dir + '/') or \
+            path.startswith(content_dir + '\\')) and \
+           path.endswith(post_ext):
+            slug = path[len(content_dir) + 1:-len(post_ext)]
             if slug.endswith('/index') or slug.endswith('\\index') or \
                slug == 'index':
                 slug = slug[:-6]
             return slug
 
-    @locked_cached_property
+    @property
     def date(self):
         # get the creation date, from the time of the first changeset with this
         # content or from the 'date' variable.
+        store, i = self._ref
+        if i is not None:
+            return store.dates[i]
         if 'date' in self._vars:
             return parse_date(self._vars['date'])
         return parse_date(self._filectx.date)
 
-    @locked_cached_property
+    @property
     def datetime(self):
         return datetime.utcfromtimestamp(self.date)
 
-    @locked_cached_property
+    @property
     def mdate(self):
         # get the modification date, from the time of the last changeset with
         # changes for this content, from the creation date, if this content was
         # never changed, or from the 'mdate' variable.
+        store, i = self._ref
+        if i is not None:
+            return store.get_mdate(i)
         if 'mdate' in self._vars:
             return parse_date(self._vars['mdate'])
         mdate = self._filectx.mdate
         if mdate is not None:
             return parse_date(mdate)
 
-    @locked_cached_property
+    @property
     def mdatetime(self):
-        if self.mdate is not None:
-            return datetime.utcfromtimestamp(self.mdate)
+        mdate = self.mdate
+        if mdate is not None:
+            return datetime.utcfromtimestamp(mdate)
 
-    @locked_cached_property
+    @property
     def aliases(self):
         # handle aliases
         if 'aliases' not in self._vars:
@@ -190,7 +381,7 @@ class Page(object):
         return self._vars.get(key, default)
 
     def __getattr__(self, attr):
-        if attr not in self._vars:
+        if attr.startswith('_') or attr not in self._vars:
             raise AttributeError(attr)
         return self._vars[attr]
 
@@ -204,39 +395,129 @@ class Page(object):
 class Post(Page):
     """Posts are like pages, but with tags support."""
 
-    @locked_cached_property
+    __slots__ = ()
+
+    @property
     def tags(self):
         # handle tags
+        store, i = self._ref
+        if i is not None:
+            return store.get_tags(i)
         if 'tags' not in self._vars:
             return []
         return [i.strip() for i in self._vars['tags'].split(',')]
 
 
 class Blog(object):
-    """A blog is a list of posts and pages."""
+    """A blog is a list of posts and pages.
+
+    If a previous :class:`Blog` object is given, the pages and posts whose
+    files weren't changed (same blob identifier) are copied, with everything
+    that was already parsed and cached for them.
 
-    def __init__(self, changectx, content_dir, post_ext, rst_header_level):
+    If a :class:`blohg.index.MetadataIndex` is given, the list of content
+    files and their metadata are read from it when the revision was already
+    indexed, and written to it otherwise.
+    """
+
+    def __init__(self, changectx, content_dir, post_ext, rst_header_level,
+                 render_cache=None, previous=None, metadata_index=None):
         self._changectx = changectx
         self._content_dir = content_dir
         self._post_ext = post_ext
         self._rst_header_level = rst_header_level
+        self._render_cache = render_cache
         re_content = re.compile(r'^' + self._content_dir + r'[\\/](post)?.+' \
                                 + '\\' + self._post_ext + '$')
+
+        # objects from the previous blog, if built with the same settings.
+        reusable = {}
+        if previous is not None and \
+           previous._content_dir == self._content_dir and \
+           previous._post_ext == self._post_ext and \
+           previous._rst_header_level == self._rst_header_level:
+            reusable = dict([(obj.path, obj) for obj in previous._all])
+
+        # objects of files that didn't change since the previous blog are
+        # reused. the change context may tell the changed paths after listing
+        # the files, otherwise the blob identifiers are compared, and that
+        # may need the files to be read.
+        changed = None
+
+        def get_reusable(filectx):
+            obj = reusable.get(filectx.path)
+            if obj is not None and ((changed is not None and \
+                                     filectx.path not in changed) or \
+                                    obj._blob_id == filectx.blob_id):
+                return obj
+
+        self._store = MetadataStore(self._changectx, self._content_dir,
+                                    self._post_ext, self._rst_header_level,
+                                    self._render_cache)
         self._all = []
         self.tags = set()  # it will be a list at the end of this method.
         self.archives = set()  # it will be a list at the end of this method.
         self.aliases = {}
-        for fname in self._changectx.files:
-            rv = re_content.match(fname)
+
+        # file contexts and metadata variables (if known) of the content files
+        rows = None
+        if metadata_index is not None:
+            index_key = metadata_index.get_key(self._changectx,
+                                               self._content_dir,
+                                               self._post_ext)
+            rows = metadata_index.get(index_key)
+        if rows is not None:
+            content = [(IndexedFileCtx(self._changectx, *row[:5]), row[5]) \
+                       for row in rows]
+        else:
+            paths = [fname for fname in self._changectx.files \
+                     if re_content.match(fname) is not None]
+            content = [(self._changectx.get_filectx(fname, False), None) \
+                       for fname in paths]
+            if self._changectx.changed_paths is not None:
+                changed = set([i.decode('utf-8') for i in \
+                               self._changectx.changed_paths])
+
+            # the files that can't be reused are only read if their metadata
+            # isn't cached, all at once (some backends read them in a single
+            # batch). the file contexts of the content files aren't kept by
+            # the change context, so the data is freed after the metadata is
+            # parsed.
+            fetch = []
+            for i, (filectx, metadata) in enumerate(content):
+                if get_reusable(filectx) is None:
+                    metadata = self._get_cached_metadata(filectx)
+                    if metadata is None:
+                        fetch.append(i)
+                    content[i] = (filectx, metadata)
+            for i, filectx in zip(fetch, self._changectx.prefetch(
+                    [paths[i] for i in fetch], False)):
+                content[i] = (filectx, None)
+
+        new_rows = []
+        for filectx, metadata in content:
+            rv = re_content.match(filectx.path)
             if rv is not None:
-                cls = (rv.group(1) is None) and Page or Post
-                obj = cls(self._changectx.get_filectx(fname),
-                          self._content_dir, self._post_ext,
-                          self._rst_header_level)
+                obj = get_reusable(filectx)
+                if obj is None:
+                    cls = (rv.group(1) is None) and Page or Post
+                    obj = cls(filectx, self._content_dir, self._post_ext,
+                              self._rst_header_level, self._render_cache,
+                              metadata, self._store)
+                else:
+                    obj = obj._copy(filectx)
+                author = None
+                if metadata_index is not None:
+                    author = filectx.author
+                    if rows is None:
+                        new_rows.append((obj.path, filectx.blob_id,
+                                         filectx.date, filectx.mdate, author,
+                                         obj._vars))
                 for code, alias in obj.aliases:
                     self.aliases[alias] = (code, obj.slug)
+                self._store.add(obj, author)
                 self._all.append(obj)
-                if hasattr(obj, 'tags'):
+                if isinstance(obj, Post):
                     self.tags = self.tags.union(set(obj.tags))
                     self.archives.add((obj.datetime.year, obj.datetime.month))
 
@@ -249,12 +530,64 @@ class Blog(object):
         # sort self, reverse by date
         self._all.sort(lambda a, b: b.date - a.date)
 
+        if metadata_index is not None and rows is None:
+            metadata_index.set(index_key, new_rows, int(time()))
+
+        # index entries by slug. more than one file may end up with the same
+        # slug, and the lists will keep them sorted by date too.
+        self._slugs = {}
+        for obj in self._all:
+            self._slugs.setdefault(obj.slug, []).append(obj)
+
+        # inverted index of tags. the posting lists store the positions of the
+        # posts in self._all, that are already sorted by date.
+        self._tags = {}
+        for i, obj in enumerate(self._all):
+            if isinstance(obj, Post):
+                for tag in set(obj.tags):
+                    self._tags.setdefault(tag, array('l')).append(i)
+
+        # index posts by (year, month), keeping the sorting by date.
+        self._archives = {}
+        for obj in self._all:
+            if isinstance(obj, Post):
+                key = (obj.datetime.year, obj.datetime.month)
+                self._archives.setdefault(key, []).append(obj)
+
+        # negated dates, in ascending order, to bisect the published entries.
+        self._dates = array('l', [-obj.date for obj in self._all])
+        self._cutoff = None
+
+    def _get_cached_metadata(self, filectx):
+        # same key used by the pages to cache their metadata variables.
+        if self._render_cache is not None:
+            return self._render_cache.get(self._render_cache.make_key(
+                filectx.blob_id, 'metadata'))
+
+    def _get_cutoff(self):
+        """Returns a tuple with the position of the first published entry in
+        the sorted list of entries, the date when the next scheduled entry
+        goes live (or ``None``) and a dict to cache stuff that depends on the
+        published entries. Everything is kept until that date.
+        """
+        now = int(time())
+        if self._cutoff is not None:
+            until = self._cutoff[1]
+            if until is None or now < until:
+                return self._cutoff
+        cutoff = bisect_left(self._dates, -now)
+
+        # some change contexts publish scheduled entries as well.
+        while cutoff > 0 and \
+              self._changectx.published(self._all[cutoff - 1].date, now):
+            cutoff -= 1
+        until = cutoff > 0 and self._all[cutoff - 1].date or None
+        self._cutoff = cutoff, until, {}
+        return self._cutoff
+
     @property
     def published(self):
-        now = int(time())
-        for obj in self._all:
-            if self._changectx.published(obj.date, now):
-                yield obj
+        return self._all[self._get_cutoff()[0]:]
 
     def get(self, slug):
         """Method that returns a :class:`Page` or a :class:`Post` object for
@@ -263,8 +596,9 @@ class Blog(object):
         :param slug: the slug string.
         :return: a :class:`Page` or a :class:`Post`
         """
-        for entry in self.published:
-            if entry.slug == slug:
+        until = self._get_cutoff()[1]
+        for entry in self._slugs.get(slug, []):
+            if until is None or entry.date < until:
                 return entry
 
     def get_all(self, only_posts=False):
@@ -276,9 +610,14 @@ class Blog(object):
                            the static pages.
         :return: a list of :class:`Page` or :class:`Post` objects.
         """
-        if only_posts:
-            return [i for i in self.published if isinstance(i, Post)]
-        return list(self.published)
+        cutoff, until, cache = self._get_cutoff()
+        if only_posts not in cache:
+            if only_posts:
+                cache[only_posts] = [i for i in self._all[cutoff:] \
+                                     if isinstance(i, Post)]
+            else:
+                cache[only_posts] = self._all[cutoff:]
+        return list(cache[only_posts])
 
     def get_by_tag(self, tag):
         """Method that returns a list of :class:`Post` objects for a
@@ -289,17 +628,16 @@ class Blog(object):
         """
         if not isinstance(tag, list):
             tag = [tag]
-        rv = []
-        for obj in self.published:
-            if not hasattr(obj, 'tags'):
-                continue
-            found = True
-            for _tag in tag:
-                if _tag not in obj.tags:
-                    found = False
-            if found:
-                rv.append(obj)
-        return rv
+        if len(tag) == 0:
+            return self.get_all(True)
+
+        # intersect the posting lists, starting from the smallest one.
+        postings = sorted([self._tags.get(i, []) for i in set(tag)], key=len)
+        rv = postings[0]
+        for posting in postings[1:]:
+            rv = [i for i in rv if _sorted_contains(posting, i)]
+        cutoff = self._get_cutoff()[0]
+        return [self._all[i] for i in rv[bisect_left(rv, cutoff):]]
 
     def get_from_archive(self, year, month):
         """Method that returns a list of :class:`Post` objects for a
@@ -309,10 +647,6 @@ class Blog(object):
         :param month: the required month.
         :return: a list of :class:`Post` objects.
         """
-        if (year, month) not in self.archives:
-            return []
-        rv = []
-        for obj in self.published:
-            if obj.datetime.year == year and obj.datetime.month == month:
-                rv.append(obj)
-        return rv
+        until = self._get_cutoff()[1]
+        return [obj for obj in self._archives.get((year, month), []) \
+                if until is None or obj.date < until]
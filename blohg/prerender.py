@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.prerender
+    ~~~~~~~~~~~~~~~
+
+    Module with the eager rendering of pages and posts, using a pool of
+    processes.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import multiprocessing
+
+# state of each worker process, set by the pool initializer. it is inherited
+# when the workers are forked, so the entries don't need to be pickled, and
+# the module state of the parent process is never touched.
+_app = None
+_entries = []
+
+
+def _init_worker(app, entries):
+    global _app, _entries
+    _app, _entries = app, entries
+
+
+def _render(i):
+    obj = _entries[i]
+    try:
+        # directives and roles use current_app and url_for, and need a request
+        # context. external urls are built from the SERVER_NAME config.
+        with _app.test_request_context():
+            return i, obj.parsed_source, obj.parsed_abstract
+    except Exception:
+        # broken entries are left to be rendered (and fail) lazily.
+        return i, None, None
+
+
+def render_all(app, entries, processes=None):
+    """Parses the reStructuredText of the given pages and posts in a pool of
+    processes, and fills them with the results.
+
+    The processes are forked, then this function should be called before
+    starting to serve requests from threads.
+
+    :param app: the Flask application.
+    :param entries: a list of :class:`blohg.models.Page` objects.
+    :param processes: the number of processes, defaults to the number of
+                      CPUs.
+    :return: the number of entries rendered.
+    """
+    pending = [obj for obj in entries if 'parsed_source' not in obj.__dict__]
+    if len(pending) == 0:
+        return 0
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    chunksize = max(1, len(pending) / (4 * processes))
+    pool = multiprocessing.Pool(processes, _init_worker, (app, pending))
+    try:
+        rendered = 0
+        for i, parsed_source, parsed_abstract in \
+            pool.imap_unordered(_render, range(len(pending)), chunksize):
+            if parsed_source is not None:
+                pending[i].preload(parsed_source, parsed_abstract)
+                rendered += 1
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return rendered
@@ -33,6 +33,14 @@ __all__ = ['Vimeo', 'Youtube', 'Math', 'Code', 'SourceCode', 'AttachmentImage',
 GOOGLETEX_URL = 'https://chart.googleapis.com/chart?cht=tx&chl='
 
 
+def depends_on_repo(document):
+    """Marks a document as depending on other files of the repository (e.g.
+    the list of attachments or the titles of other pages), so its rendered
+    output isn't stored by the render cache.
+    """
+    document.depends_on_repo = True
+
+
 def align(argument):
     return directives.choice(argument, ('left', 'center', 'right'))
 
@@ -232,6 +240,7 @@ class AttachmentImage(Image):
         my_file = directives.uri(self.arguments[0])
         full_path = posixpath.join(current_app.config['ATTACHMENT_DIR'],
                                    my_file)
+        depends_on_repo(self.state.document)
         if full_path not in current_app.blohg.changectx.files:
             raise self.error(
                 'Error in "%s" directive: File not found: %s.' % (
@@ -249,6 +258,7 @@ class AttachmentFigure(Figure):
         my_file = directives.uri(self.arguments[0])
         full_path = posixpath.join(current_app.config['ATTACHMENT_DIR'],
                                    my_file)
+        depends_on_repo(self.state.document)
         if full_path not in current_app.blohg.changectx.files:
             raise self.error(
                 'Error in "%s" directive: File not found: %s.' % (
@@ -301,6 +311,7 @@ class SubPages(Directive):
     def run(self):
         self.options.setdefault('sort-by', 'slug')
         self.options.setdefault('sort-order', 'asc')
+        depends_on_repo(self.state.document)
         if len(self.arguments) == 0:
             prefix = ':repo:%s' % current_app.config['CONTENT_DIR']
             source = self.state.document.current_source or ''
@@ -346,6 +357,7 @@ class IncludeHg(Include):
             'encoding', self.state.document.settings.input_encoding)
         tab_width = self.options.get(
             'tab-width', self.state.document.settings.tab_width)
+        depends_on_repo(self.state.document)
         try:
             self.state.document.settings.record_dependencies.add(path)
             include_file = FileInput(
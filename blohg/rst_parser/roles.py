@@ -12,6 +12,8 @@
 from docutils.nodes import reference, paragraph
 from flask import current_app, url_for
 
+from blohg.rst_parser.directives import depends_on_repo
+
 import posixpath
 import re
 
@@ -28,6 +30,7 @@ def attachment_role(name, rawtext, text, lineno, inliner, options={},
     if '|' in text:
         text, label = text.split('|')
     full_path = posixpath.join(current_app.config['ATTACHMENT_DIR'], text)
+    depends_on_repo(inliner.document)
     if full_path not in current_app.blohg.changectx.files:
         msg = inliner.reporter.error('Error in "%s" role: File not found: %s.' \
                                      % (name, full_path), line=lineno)
@@ -53,6 +56,7 @@ def page_role(name, rawtext, text, lineno, inliner, options={}, content={}):
     match = explicit_title_re.match(text)
     if match:
         title, target = match.group(1), match.group(2)
+    depends_on_repo(inliner.document)
     metadata = current_app.blohg.content.get(target)
     if metadata is None:
         if title is not None:
@@ -22,13 +22,19 @@ class BlohgWriter(Writer):
         self.translator_class = BlohgHTMLTranslator
 
     def assemble_parts(self):
-        # we will add 2 new parts to the writer: 'first_paragraph_as_text' and
-        # 'images'
+        # we will add 3 new parts to the writer: 'first_paragraph_as_text',
+        # 'images' and 'cacheable'
         Writer.assemble_parts(self)
         self.parts['first_paragraph_as_text'] = \
             self.visitor.first_paragraph_as_text
         self.parts['images'] = self.visitor.images
 
+        # documents that depend on other files of the repository, or with
+        # errors (e.g. a missing attachment), aren't cached.
+        self.parts['cacheable'] = \
+            not getattr(self.document, 'depends_on_repo', False) and \
+            not self.document.traverse(nodes.system_message)
+
 
 class BlohgHTMLTranslator(HTMLTranslator):
 
@@ -18,7 +18,8 @@ from warnings import filterwarnings
 from werkzeug.routing import Map
 
 from blohg import create_app as _create_app
-from blohg.vcs import backends, REVISION_DEFAULT, REVISION_WORKING_DIR
+from blohg.vcs import get_backends, REVISION_DEFAULT, REVISION_WORKING_DIR
+from blohg.vcs_backends.snapshot.archive import write_archive
 
 # filter MissingURLGeneratorWarning warnings.
 filterwarnings('ignore', category=MissingURLGeneratorWarning)
@@ -72,9 +73,13 @@ class Server(_Server):
 class InitRepo(Command):
     """initialize a blohg repo, using the default template."""
 
+    @property
+    def backends(self):
+        return [i for i in get_backends() if i.creatable]
+
     def get_options(self):
         rv = ()
-        for backend in backends:
+        for backend in self.backends:
             rv += (Option('--%s' % backend.identifier, action='store_true',
                           dest=backend.identifier,
                           help='create a %s repository' % backend.name),)
@@ -82,18 +87,33 @@ class InitRepo(Command):
 
     def handle(self, app, **kwargs):
         repo = None
-        for backend in backends:
+        for backend in self.backends:
             if kwargs.get(backend.identifier, False):
                 repo = backend
                 break
         if repo is None:
-            repo = backends[0]
+            repo = self.backends[0]
         try:
             repo.create_repo(app.config['REPO_PATH'])
         except RuntimeError, err:
             print >> sys.stderr, str(err)
 
 
+class Snapshot(Command):
+    """pack the default revision of the repository into a snapshot file."""
+
+    option_list = (Option('output', help='path of the snapshot file'),)
+
+    def handle(self, app, output):
+        try:
+            changectx = app.blohg.repo.get_changectx(REVISION_DEFAULT)
+            count = write_archive(changectx, output)
+        except (IOError, OSError, RuntimeError), err:
+            print >> sys.stderr, str(err)
+        else:
+            print '%i files packed into %s' % (count, output)
+
+
 class Freeze(Command):
     """ freeze the blog into a set of static files. """
 
@@ -108,6 +128,7 @@ class Freeze(Command):
                    'views.atom': 'atom'}
         if map_html:
             mapping['views.tag'] = 'html'
+            mapping['views.archive'] = 'html'
             mapping['views.content'] = 'html'
             mapping['views.post_list'] = 'html'
             mapping['views.posts'] = 'html'
@@ -155,8 +176,14 @@ class Freeze(Command):
         freezer = Freezer(app)
 
         def static_generator(static_dir):
-            for f in app.blohg.changectx.files:
-                if f.startswith(static_dir):
+            files = app.blohg.changectx.files.prefixed(static_dir)
+
+            # read the files in chunks, that are kept by the change context
+            # while the freezer builds them.
+            for i in range(0, len(files), 100):
+                chunk = files[i:i + 100]
+                app.blohg.changectx.prefetch(chunk)
+                for f in chunk:
                     yield dict(filename=f[len(static_dir):] \
                                .strip(posixpath.sep))
 
@@ -170,6 +197,12 @@ class Freeze(Command):
             """Walk the attachment dir and freeze everything"""
             return static_generator(app.config['ATTACHMENT_DIR'])
 
+        @freezer.register_generator
+        def archive():
+            """Freeze the first page of every monthly archive"""
+            for year, month in app.blohg.content.archives:
+                yield dict(year=year, month=month)
+
         freezer.freeze()
         if serve:
             freezer.serve()
@@ -194,6 +227,7 @@ def create_script():
     server.description = 'runs the blohg local server.'
     script.add_command('runserver', server)
     script.add_command('initrepo', InitRepo())
+    script.add_command('snapshot', Snapshot())
     script.add_command('freeze', Freeze())
 
     return script
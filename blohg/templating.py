@@ -40,7 +40,6 @@ class BlohgLoader(BaseLoader):
         raise TemplateNotFound(template)
 
     def list_templates(self):
-        templates_dir = current_app.template_folder.strip(os.linesep)
-        return sorted([i[len(templates_dir) + 1:] for i in \
-                       current_app.blohg.changectx.files \
-                       if i.startswith(templates_dir + '/')])
+        templates_dir = current_app.template_folder.strip(os.linesep) + '/'
+        return [i[len(templates_dir):] for i in \
+                current_app.blohg.changectx.files.prefixed(templates_dir)]
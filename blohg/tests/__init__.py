@@ -12,6 +12,9 @@
 import unittest
 
 from blohg.tests.app import AppTestCase
+from blohg.tests.cache import RenderCacheTestCase
+from blohg.tests.index import MetadataIndexTestCase
+from blohg.tests.prerender import RenderAllTestCase
 from blohg.tests.ext import BlohgBlueprintTestCase, BlohgExtensionTestCase, \
      ExtensionImporterTestCase
 from blohg.tests.rst_parser.directives import VimeoTestCase, YoutubeTestCase, \
@@ -23,20 +26,51 @@ from blohg.tests.vcs_backends.git.changectx import ChangeCtxDefaultTestCase \
      GitChangeCtxWorkingDirTestCase
 from blohg.tests.vcs_backends.git.filectx import FileCtxTestCase as \
      GitFileCtxTestCase
+from blohg.tests.vcs_backends.git.history import HistoryTestCase as \
+     GitHistoryTestCase
+from blohg.tests.vcs_backends.gitcli import GitCliRepositoryTestCase
+from blohg.tests.vcs_backends.gitcli.changectx import \
+     ChangeCtxDefaultTestCase as GitCliChangeCtxDefaultTestCase, \
+     ChangeCtxWorkingDirTestCase as GitCliChangeCtxWorkingDirTestCase
+from blohg.tests.vcs_backends.gitcli.filectx import FileCtxTestCase as \
+     GitCliFileCtxTestCase
+from blohg.tests.vcs_backends.gitcli.git import GitTestCase as \
+     GitCliGitTestCase
+from blohg.tests.vcs_backends.gitcli.history import HistoryTestCase as \
+     GitCliHistoryTestCase
+from blohg.tests.vcs_backends.fs import FsRepositoryTestCase
+from blohg.tests.vcs_backends.fs.changectx import \
+     ChangeCtxDefaultTestCase as FsChangeCtxDefaultTestCase, \
+     ChangeCtxWorkingDirTestCase as FsChangeCtxWorkingDirTestCase
+from blohg.tests.vcs_backends.fs.filectx import FileCtxTestCase as \
+     FsFileCtxTestCase
+from blohg.tests.vcs_backends.snapshot import SnapshotRepositoryTestCase
+from blohg.tests.vcs_backends.snapshot.archive import ArchiveTestCase
+from blohg.tests.vcs_backends.snapshot.changectx import \
+     ChangeCtxDefaultTestCase as SnapshotChangeCtxDefaultTestCase, \
+     ChangeCtxWorkingDirTestCase as SnapshotChangeCtxWorkingDirTestCase
+from blohg.tests.vcs_backends.snapshot.filectx import FileCtxTestCase as \
+     SnapshotFileCtxTestCase
 from blohg.tests.vcs_backends.hg import HgRepositoryTestCase
 from blohg.tests.vcs_backends.hg.changectx import ChangeCtxDefaultTestCase, \
      ChangeCtxWorkingDirTestCase
 from blohg.tests.vcs_backends.hg.filectx import FileCtxTestCase
+from blohg.tests.vcs_backends.hg.history import HistoryTestCase
+from blohg.tests.script import ScriptTestCase
 from blohg.tests.models import BlogTestCase, PageTestCase, PostTestCase
 from blohg.tests.templating import BlohgLoaderTestCase
 from blohg.tests.utils import UtilsTestCase
-from blohg.tests.vcs import LoadRepoTestCase
+from blohg.tests.vcs import FileIndexTestCase, InSubtreesTestCase, \
+     LoadRepoTestCase, ThreadLocalHandleTestCase
 from blohg.tests.views import ViewsTestCase
 
 
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(AppTestCase))
+    suite.addTest(unittest.makeSuite(RenderCacheTestCase))
+    suite.addTest(unittest.makeSuite(MetadataIndexTestCase))
+    suite.addTest(unittest.makeSuite(RenderAllTestCase))
     suite.addTest(unittest.makeSuite(BlohgBlueprintTestCase))
     suite.addTest(unittest.makeSuite(BlohgExtensionTestCase))
     suite.addTest(unittest.makeSuite(ExtensionImporterTestCase))
@@ -52,15 +86,36 @@ def suite():
     suite.addTest(unittest.makeSuite(GitChangeCtxDefaultTestCase))
     suite.addTest(unittest.makeSuite(GitChangeCtxWorkingDirTestCase))
     suite.addTest(unittest.makeSuite(GitFileCtxTestCase))
+    suite.addTest(unittest.makeSuite(GitHistoryTestCase))
+    suite.addTest(unittest.makeSuite(GitCliRepositoryTestCase))
+    suite.addTest(unittest.makeSuite(GitCliChangeCtxDefaultTestCase))
+    suite.addTest(unittest.makeSuite(GitCliChangeCtxWorkingDirTestCase))
+    suite.addTest(unittest.makeSuite(GitCliFileCtxTestCase))
+    suite.addTest(unittest.makeSuite(GitCliGitTestCase))
+    suite.addTest(unittest.makeSuite(GitCliHistoryTestCase))
+    suite.addTest(unittest.makeSuite(FsRepositoryTestCase))
+    suite.addTest(unittest.makeSuite(FsChangeCtxDefaultTestCase))
+    suite.addTest(unittest.makeSuite(FsChangeCtxWorkingDirTestCase))
+    suite.addTest(unittest.makeSuite(FsFileCtxTestCase))
+    suite.addTest(unittest.makeSuite(SnapshotRepositoryTestCase))
+    suite.addTest(unittest.makeSuite(ArchiveTestCase))
+    suite.addTest(unittest.makeSuite(SnapshotChangeCtxDefaultTestCase))
+    suite.addTest(unittest.makeSuite(SnapshotChangeCtxWorkingDirTestCase))
+    suite.addTest(unittest.makeSuite(SnapshotFileCtxTestCase))
     suite.addTest(unittest.makeSuite(HgRepositoryTestCase))
     suite.addTest(unittest.makeSuite(ChangeCtxDefaultTestCase))
     suite.addTest(unittest.makeSuite(ChangeCtxWorkingDirTestCase))
     suite.addTest(unittest.makeSuite(FileCtxTestCase))
+    suite.addTest(unittest.makeSuite(HistoryTestCase))
+    suite.addTest(unittest.makeSuite(ScriptTestCase))
     suite.addTest(unittest.makeSuite(BlogTestCase))
     suite.addTest(unittest.makeSuite(PageTestCase))
     suite.addTest(unittest.makeSuite(PostTestCase))
     suite.addTest(unittest.makeSuite(BlohgLoaderTestCase))
     suite.addTest(unittest.makeSuite(UtilsTestCase))
     suite.addTest(unittest.makeSuite(LoadRepoTestCase))
+    suite.addTest(unittest.makeSuite(InSubtreesTestCase))
+    suite.addTest(unittest.makeSuite(FileIndexTestCase))
+    suite.addTest(unittest.makeSuite(ThreadLocalHandleTestCase))
     suite.addTest(unittest.makeSuite(ViewsTestCase))
     return suite
@@ -11,6 +11,7 @@
 """
 
 import codecs
+import mock
 import os
 import unittest
 
@@ -121,3 +122,142 @@ class AppTestCase(unittest.TestCase):
         commands.commit(self.ui, self.repo, message='foo', user='foo')
         rv = client.get('/about/')
         self.assertTrue('THIS IS another TEST!' in rv.data)
+
+    def test_list_subtrees_only(self):
+        with codecs.open(os.path.join(self.repo_path, 'README'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.config['LIST_SUBTREES_ONLY'] = True
+        app.blohg.init_repo(REVISION_DEFAULT)
+        files = app.blohg.changectx.files
+        self.assertFalse('README' in files)
+        self.assertFalse('config.yaml' in files)
+        self.assertTrue('static/screen.css' in files)
+        self.assertTrue('templates/base.html' in files)
+        self.assertTrue('content/attachments/mercurial.png' in files)
+        client = app.test_client()
+        rv = client.get('/')
+        self.assertTrue('post/lorem-ipsum' in rv.data)
+        rv = client.get('/static/screen.css')
+        self.assertEqual(rv.status_code, 200)
+
+    def test_list_subtrees_only_config_working_dir(self):
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.config['LIST_SUBTREES_ONLY'] = True
+        app.blohg.init_repo(REVISION_WORKING_DIR)
+        self.assertFalse(app.blohg.changectx.needs_reload())
+        with codecs.open(os.path.join(self.repo_path, 'config.yaml'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('\nTAGLINE: Changed\n')
+        self.assertTrue(app.blohg.changectx.needs_reload())
+        app.blohg.reload()
+        self.assertEqual(app.config['TAGLINE'], 'Changed')
+
+    def test_reload_interval(self):
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.config['RELOAD_INTERVAL'] = 3600
+        app.blohg.init_repo(REVISION_DEFAULT)
+        client = app.test_client()
+        client.get('/')
+        with mock.patch.object(app.blohg.changectx,
+                               'needs_reload') as needs_reload:
+            client.get('/')
+            client.get('/')
+            self.assertEqual(needs_reload.call_count, 0)
+            app.blohg._last_check = 0
+            client.get('/')
+            self.assertEqual(needs_reload.call_count, 1)
+
+    def test_reuse_unchanged(self):
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        for reuse in [False, True]:
+            app = create_app(repo_path=self.repo_path, autoinit=False)
+            app.config['REUSE_UNCHANGED'] = reuse
+            app.blohg.init_repo(REVISION_DEFAULT)
+            client = app.test_client()
+            client.get('/post/lorem-ipsum/')
+            self.assertTrue('parsed_source' in app.blohg.content.get(
+                'post/lorem-ipsum').__dict__)
+            with codecs.open(os.path.join(self.repo_path, 'content',
+                                          'about.rst'), 'a',
+                             encoding='utf-8') as fp:
+                fp.write('\n\nChanged.\n')
+            commands.commit(self.ui, self.repo, message='foo', user='foo')
+            client.get('/about/')
+            self.assertEqual('parsed_source' in app.blohg.content.get(
+                'post/lorem-ipsum').__dict__, reuse)
+
+    def test_reload_publishes_when_built(self):
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.blohg.init_repo(REVISION_DEFAULT)
+        changectx = app.blohg.changectx
+        content = app.blohg.content
+        with codecs.open(os.path.join(self.repo_path, 'config.yaml'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('\nTAGLINE: Changed\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+        with mock.patch('blohg.Blog', side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, app.blohg.reload)
+        self.assertTrue(app.blohg.changectx is changectx)
+        self.assertTrue(app.blohg.content is content)
+        self.assertNotEqual(app.config['TAGLINE'], 'Changed')
+        app.blohg.reload()
+        self.assertFalse(app.blohg.changectx is changectx)
+        self.assertFalse(app.blohg.content is content)
+        self.assertEqual(app.config['TAGLINE'], 'Changed')
+
+    def test_reload_locked(self):
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.blohg.init_repo(REVISION_DEFAULT)
+        changectx = app.blohg.changectx
+        with codecs.open(os.path.join(self.repo_path, 'content',
+                                      'about.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('\n\nChanged.\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+
+        # another thread is reloading the repository.
+        with app.blohg._reload_lock:
+            app.blohg.reload()
+            self.assertTrue(app.blohg.changectx is changectx)
+        app.blohg.reload()
+        self.assertFalse(app.blohg.changectx is changectx)
+
+    def test_render_cache_missing_attachment(self):
+        cache_dir = os.path.join(self.repo_path, '.cache')
+        with codecs.open(os.path.join(self.repo_path, 'content', 'post',
+                                      'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('Foo\n===\n\nSee :attachment:`foo.txt`.\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.config['RENDER_CACHE_DIR'] = cache_dir
+        app.blohg.init_repo(REVISION_DEFAULT)
+        rv = app.test_client().get('/post/foo/')
+        self.assertTrue('File not found' in rv.data)
+
+        # the attachment is committed, and the app restarted.
+        with open(os.path.join(self.repo_path, 'content', 'attachments',
+                               'foo.txt'), 'w') as fp:
+            fp.write('foo\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.config['RENDER_CACHE_DIR'] = cache_dir
+        app.blohg.init_repo(REVISION_DEFAULT)
+        rv = app.test_client().get('/post/foo/')
+        self.assertFalse('File not found' in rv.data)
+        self.assertTrue('attachments/foo.txt' in rv.data)
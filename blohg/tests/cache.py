@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.cache
+    ~~~~~~~~~~~~~~~~~
+
+    Module with tests for the blohg render cache.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from flask import Flask
+
+from blohg.cache import RenderCache, render_environment
+
+
+class RenderCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = os.path.join(mkdtemp(), 'cache')
+
+    def tearDown(self):
+        try:
+            rmtree(os.path.dirname(self.cache_dir))
+        except:
+            pass
+
+    def test_create_dir(self):
+        RenderCache(self.cache_dir)
+        self.assertTrue(os.path.isdir(self.cache_dir))
+
+    def test_make_key(self):
+        cache = RenderCache(self.cache_dir)
+        key = cache.make_key('abc', u'content/foo.rst', 'source', 3)
+        self.assertEqual(key, cache.make_key('abc', u'content/foo.rst',
+                                             'source', 3))
+        self.assertNotEqual(key, cache.make_key('abc', u'content/foo.rst',
+                                                'source', 2))
+        self.assertNotEqual(key, cache.make_key('abd', u'content/foo.rst',
+                                                'source', 3))
+
+    def test_get_and_set(self):
+        cache = RenderCache(self.cache_dir)
+        key = cache.make_key('abc')
+        self.assertTrue(cache.get(key) is None)
+        value = {'title': u'Foo', 'fragment': u'<p>bar</p>',
+                 'first_paragraph_as_text': u'bar', 'images': []}
+        cache.set(key, value)
+        self.assertEqual(cache.get(key), value)
+
+        # a new cache object should see the same entries
+        self.assertEqual(RenderCache(self.cache_dir).get(key), value)
+
+    def test_broken_entry(self):
+        cache = RenderCache(self.cache_dir)
+        key = cache.make_key('abc')
+        cache.set(key, {'title': u'Foo'})
+        with open(os.path.join(self.cache_dir, key[:2], key[2:]), 'wb') as fp:
+            fp.write('lol')
+        self.assertTrue(cache.get(key) is None)
+
+    def test_render_environment(self):
+        self.assertEqual(render_environment(), ())
+        app = Flask(__name__)
+        app.config.update(CONTENT_DIR='content', POST_EXT='.rst',
+                          ATTACHMENT_DIR='content/attachments')
+        with app.test_request_context(base_url='http://foo.com/'):
+            foo = render_environment()
+        with app.test_request_context(base_url='http://bar.com/'):
+            bar = render_environment()
+        self.assertEqual(foo[0], 'http://foo.com/')
+        self.assertNotEqual(foo, bar)
+        app.config['ATTACHMENT_DIR'] = 'attachments'
+        with app.test_request_context(base_url='http://bar.com/'):
+            self.assertNotEqual(render_environment(), bar)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.index
+    ~~~~~~~~~~~~~~~~~
+
+    Module with tests for the blohg metadata index.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import mock
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.index import IndexedFileCtx, MetadataIndex
+
+
+class MetadataIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'index.db')
+        self.rows = [(u'content/about.rst', u'abc', 1234567890, None,
+                      u'foo <foo@bar.com>', {u'title': u'About'}),
+                     (u'content/post/foo.rst', u'def', 1234567891,
+                      1234567892, u'foo', {u'tags': u'foo, bar'})]
+
+    def tearDown(self):
+        try:
+            rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def test_get_key(self):
+        index = MetadataIndex(self.db_path)
+        changectx = mock.Mock(revision_id='\x00\xff')
+        self.assertEqual(index.get_key(changectx, 'content', '.rst'),
+                         u'00ff:content:.rst')
+        changectx = mock.Mock(revision_id=mock.Mock(hex='00ff'))
+        self.assertEqual(index.get_key(changectx, 'content', '.rst'),
+                         u'00ff:content:.rst')
+
+    def test_get_and_set(self):
+        index = MetadataIndex(self.db_path)
+        self.assertTrue(index.get(u'foo') is None)
+        index.set(u'foo', self.rows, 1)
+        self.assertEqual(index.get(u'foo'), self.rows)
+        self.assertEqual(MetadataIndex(self.db_path).get(u'foo'), self.rows)
+        index.set(u'bar', [], 2)
+        self.assertEqual(index.get(u'bar'), [])
+
+    def test_max_revisions(self):
+        index = MetadataIndex(self.db_path, 2)
+        for i in range(3):
+            index.set(u'foo%i' % i, self.rows, i)
+        self.assertTrue(index.get(u'foo0') is None)
+        self.assertEqual(index.get(u'foo1'), self.rows)
+        self.assertEqual(index.get(u'foo2'), self.rows)
+
+    def test_indexed_filectx(self):
+        changectx = mock.Mock()
+        changectx.get_filectx.return_value = mock.Mock(data='bola',
+                                                       content=u'bola')
+        ctx = IndexedFileCtx(changectx, *self.rows[1][:5])
+        self.assertEqual(ctx.path, u'content/post/foo.rst')
+        self.assertEqual(ctx.blob_id, u'def')
+        self.assertEqual(ctx.date, 1234567891)
+        self.assertEqual(ctx.mdate, 1234567892)
+        self.assertEqual(ctx.author, u'foo')
+        self.assertFalse(changectx.get_filectx.called)
+        self.assertEqual(ctx.content, u'bola')
+        changectx.get_filectx.assert_called_once_with('content/post/foo.rst')
@@ -10,6 +10,7 @@
 """
 
 import codecs
+import mock
 import time
 import unittest
 import os
@@ -18,7 +19,10 @@ from mercurial import commands, hg, ui
 from shutil import rmtree
 from tempfile import mkdtemp
 
-from blohg.vcs_backends.hg.changectx import ChangeCtxDefault
+from blohg.cache import RenderCache
+from blohg.index import MetadataIndex
+from blohg.vcs_backends.hg.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
 from blohg.vcs_backends.hg.filectx import FileCtx
 from blohg.models import Blog, Page, Post
 
@@ -72,7 +76,7 @@ class PageTestCase(unittest.TestCase):
         except:
             pass
 
-    def _get_model(self, content):
+    def _get_model(self, content, render_cache=None):
         file_dir = os.path.join(self.repo_path, 'content')
         file_path = os.path.join(file_dir, 'stub.rst')
         if not os.path.isdir(file_dir):
@@ -82,7 +86,7 @@ class PageTestCase(unittest.TestCase):
         commands.commit(self.ui, self.repo, file_path, message='foo',
                         user='foo <foo@bar.com>', addremove=True)
         ctx = FileCtx(self.repo, self.repo[None], 'content/stub.rst')
-        return self.model(ctx, 'content', '.rst', 2)
+        return self.model(ctx, 'content', '.rst', 2, render_cache)
 
     def test_abstract(self):
         obj = self._get_model(self.content)
@@ -186,6 +190,43 @@ class PageTestCase(unittest.TestCase):
         self.assertEqual(obj.aliases, [(301, '/my-old-post-location/'),
                                        (302, '/another-old-location/')])
 
+    def test_render_cache(self):
+        cache = RenderCache(os.path.join(self.repo_path, '.cache'))
+        obj = self._get_model(self.content, cache)
+        full_html = obj.full_html
+        abstract_html = obj.abstract_html
+        obj = self._get_model(self.content, cache)
+        with mock.patch('blohg.models.parser') as parser:
+            self.assertEqual(obj.full_html, full_html)
+            self.assertEqual(obj.abstract_html, abstract_html)
+            self.assertFalse(parser.called)
+        obj = self._get_model(self.content + '\nChanged.\n', cache)
+        self.assertTrue('Changed.' in obj.full_html)
+
+    def test_render_cache_not_cacheable(self):
+        cache = RenderCache(os.path.join(self.repo_path, '.cache'))
+        rv = {'title': u'Foo', 'fragment': u'<p>foo</p>',
+              'first_paragraph_as_text': u'foo', 'images': [],
+              'cacheable': False}
+        for i in range(2):
+            obj = self._get_model(self.content, cache)
+            with mock.patch('blohg.models.parser',
+                            return_value=rv) as parser:
+                self.assertEqual(obj.full_html, u'<p>foo</p>')
+                self.assertTrue(parser.called)
+
+    def test_render_cache_metadata(self):
+        cache = RenderCache(os.path.join(self.repo_path, '.cache'))
+        content = self.content + """\
+.. aliases: 301:/my-old-post-location/
+"""
+        obj = self._get_model(content, cache)
+        aliases = obj.aliases
+        obj = self._get_model(content, cache)
+        with mock.patch('blohg.models.re_metadata') as re_metadata:
+            self.assertEqual(obj.aliases, aliases)
+            self.assertFalse(re_metadata.finditer.called)
+
 
 class PostTestCase(PageTestCase):
 
@@ -257,6 +298,10 @@ class BlogTestCase(unittest.TestCase):
     def test_get(self):
         self.assertEqual(self.get_model().get('about').slug, 'about')
 
+    def test_get_not_found(self):
+        self.assertTrue(self.get_model().get('foo') is None)
+        self.assertTrue(self.get_model().get('post') is None)
+
     def test_get_all(self):
         self.assertEqual(sorted([i.slug for i in self.get_model().get_all()]),
                          sorted(['page-%i' % i for i in range(3)] + \
@@ -277,6 +322,17 @@ class BlogTestCase(unittest.TestCase):
         self.assertEqual(sorted([i.slug for i in \
                                  model.get_by_tag('foo')]), ['post/foo'])
 
+    def test_get_by_tag_multiple(self):
+        model = self.get_model()
+        self.assertEqual(sorted([i.slug for i in \
+                                 model.get_by_tag(['lol', 'foo'])]),
+                         ['post/foo'])
+        self.assertEqual(sorted([i.slug for i in \
+                                 model.get_by_tag(['xd', 'hehe'])]),
+                         sorted(['post/post-%i' % i for i in range(3)]))
+        self.assertEqual(model.get_by_tag(['xd', 'foo']), [])
+        self.assertEqual(model.get_by_tag(['lol', 'unknown']), [])
+
     def test_get_from_archive(self):
         file_dir = os.path.join(self.repo_path, 'content', 'post')
         if not os.path.isdir(file_dir):
@@ -301,6 +357,127 @@ class BlogTestCase(unittest.TestCase):
         apr_2010 = model.get_from_archive(2010, 4)
         self.assertEqual(len(apr_2010), 0)
 
+    def test_previous(self):
+        old_model = self.get_model()
+        file_path = os.path.join(self.repo_path, 'content', 'about.rst')
+        with codecs.open(file_path, 'a', encoding='utf-8') as fp:
+            fp.write('\n\nChanged.\n')
+        commands.commit(self.ui, self.repo, user='foo', message='foo')
+        ctx = ChangeCtxDefault(self.repo_path)
+        model = Blog(ctx, 'content', '.rst', 3, previous=old_model)
+        self.assertTrue(model.get('page-0')._metadata is
+                        old_model.get('page-0')._metadata)
+        self.assertTrue(model.get('post/foo')._metadata is
+                        old_model.get('post/foo')._metadata)
+        self.assertFalse(model.get('about')._metadata is
+                         old_model.get('about')._metadata)
+        self.assertTrue('Changed.' in model.get('about').full)
+
+        # the reused objects are copies, the previous blog is left untouched.
+        self.assertFalse(model.get('page-0') is old_model.get('page-0'))
+        self.assertTrue(old_model.get('page-0')._ref[0] is old_model._store)
+        self.assertTrue(model.get('page-0')._ref[0] is model._store)
+        model = Blog(ctx, 'content', '.rst', 2, previous=old_model)
+        self.assertFalse(model.get('page-0')._metadata is
+                         old_model.get('page-0')._metadata)
+
+    def test_changed_paths(self):
+        # the dirstate is stable after a second from the last commit.
+        time.sleep(1)
+        ctx = ChangeCtxWorkingDir(self.repo_path)
+        old_model = Blog(ctx, 'content', '.rst', 3)
+        file_path = os.path.join(self.repo_path, 'content', 'about.rst')
+        with codecs.open(file_path, 'a', encoding='utf-8') as fp:
+            fp.write('\n\nChanged.\n')
+        self.assertTrue(ctx.needs_reload())
+        new_ctx = ChangeCtxWorkingDir(self.repo_path)
+        new_ctx.update_from(ctx)
+        model = Blog(new_ctx, 'content', '.rst', 3, previous=old_model)
+        self.assertEqual(new_ctx.changed_paths, ['content/about.rst'])
+        self.assertTrue(model.get('page-0')._metadata is
+                        old_model.get('page-0')._metadata)
+        self.assertFalse(model.get('about')._metadata is
+                         old_model.get('about')._metadata)
+        self.assertTrue('Changed.' in model.get('about').full)
+
+        # the unchanged files weren't read to compare the blob ids.
+        filectx = new_ctx.get_filectx('content/page-0.rst')
+        self.assertFalse('data' in filectx.__dict__)
+
+    def test_prefetch(self):
+        ctx = ChangeCtxDefault(self.repo_path)
+        with mock.patch.object(ctx, 'prefetch', wraps=ctx.prefetch) as \
+             prefetch:
+            old_model = Blog(ctx, 'content', '.rst', 3)
+            self.assertEqual(len(prefetch.call_args[0][0]), 8)
+        file_path = os.path.join(self.repo_path, 'content', 'about.rst')
+        with codecs.open(file_path, 'a', encoding='utf-8') as fp:
+            fp.write('\n\nChanged.\n')
+        commands.commit(self.ui, self.repo, user='foo', message='foo')
+        ctx = ChangeCtxDefault(self.repo_path)
+        with mock.patch.object(ctx, 'prefetch', wraps=ctx.prefetch) as \
+             prefetch:
+            Blog(ctx, 'content', '.rst', 3, previous=old_model)
+            prefetch.assert_called_once_with(['content/about.rst'], False)
+
+        # the data read for the metadata isn't kept by the change context.
+        self.assertFalse('content/about.rst' in ctx._filectxs)
+
+    def test_prefetch_render_cache(self):
+        cache = RenderCache(os.path.join(self.repo_path, '.cache'))
+        Blog(ChangeCtxDefault(self.repo_path), 'content', '.rst', 3, cache)
+        ctx = ChangeCtxDefault(self.repo_path)
+        with mock.patch.object(ctx, 'prefetch', wraps=ctx.prefetch) as \
+             prefetch:
+            model = Blog(ctx, 'content', '.rst', 3, cache)
+            prefetch.assert_called_once_with([], False)
+        self.assertEqual(len(model.get_all()), 8)
+        self.assertEqual(model.get('post/foo').tags, ['foo', 'bar', 'lol'])
+
+    def test_store(self):
+        model = self.get_model()
+        self.assertEqual(len(model._store), 8)
+        self.assertEqual(sorted(model._store.tag_names),
+                         ['bar', 'foo', 'hehe', 'lol', 'xd'])
+        obj = model.get('post/foo')
+        self.assertTrue(obj._source is None)
+        self.assertEqual(obj.path, 'content/post/foo.rst')
+        self.assertEqual(obj.tags, ['foo', 'bar', 'lol'])
+        self.assertTrue(obj.mdate is None)
+        self.assertTrue(obj.title.startswith('My sample'))
+        self.assertFalse(obj._source is None)
+        self.assertEqual(model.get('about').author_name, 'foo')
+
+    def test_store_page_tags(self):
+        file_path = os.path.join(self.repo_path, 'content', 'tagged.rst')
+        with codecs.open(file_path, 'w', encoding='utf-8') as fp:
+            fp.write(SAMPLE_PAGE + """
+.. tags: abc""")
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        model = self.get_model()
+        self.assertEqual(sorted(model._store.tag_names),
+                         ['bar', 'foo', 'hehe', 'lol', 'xd'])
+        self.assertEqual(model._store.get_tags(
+            model._store.paths.index('content/tagged.rst')), [])
+
+    def test_metadata_index(self):
+        index = MetadataIndex(os.path.join(self.repo_path, '.index.db'))
+        ctx = ChangeCtxDefault(self.repo_path)
+        model = Blog(ctx, 'content', '.rst', 3, metadata_index=index)
+        slugs = [i.slug for i in model.get_all()]
+        ctx = ChangeCtxDefault(self.repo_path)
+        with mock.patch.object(ctx, 'get_filectx') as get_filectx:
+            model = Blog(ctx, 'content', '.rst', 3, metadata_index=index)
+            self.assertEqual([i.slug for i in model.get_all()], slugs)
+            self.assertEqual(model.get('post/foo').tags, ['foo', 'bar', 'lol'])
+            self.assertEqual(model.get('about').author_name, 'foo')
+            self.assertEqual(sorted(model.aliases.keys()),
+                             ['/another-old-location/',
+                              '/my-old-post-location/'])
+            self.assertFalse(get_filectx.called)
+        self.assertTrue(model.get('about').title.startswith('My sample'))
+
     def test_self(self):
         self.assertEqual(sorted([i.slug for i in self.get_model().published]),
                          sorted(['page-%i' % i for i in range(3)] + \
@@ -319,5 +496,22 @@ class BlogTestCase(unittest.TestCase):
                         message='foo', addremove=True)
         model = self.get_model()
         self.assertEqual(model.get('post/scheduled'), None)
+        self.assertFalse('post/scheduled' in [i.slug for i in \
+                                              model.get_all(True)])
+        self.assertFalse('post/scheduled' in [i.slug for i in \
+                                              model.get_by_tag('lol')])
         time.sleep(2)
         self.assertEqual(model.get('post/scheduled').slug, 'post/scheduled')
+        self.assertEqual(model.get_all(True)[0].slug, 'post/scheduled')
+        self.assertEqual(model.get_by_tag('lol')[0].slug, 'post/scheduled')
+
+    def test_scheduled_working_dir(self):
+        file_dir = os.path.join(self.repo_path, 'content', 'post')
+        file_path = os.path.join(file_dir, 'scheduled.rst')
+        with codecs.open(file_path, 'w', encoding='utf-8') as fp:
+            fp.write(SAMPLE_POST + """
+.. date: """ + str(int(time.time()) + 60))
+        commands.add(self.ui, self.repo, file_path)
+        model = Blog(ChangeCtxWorkingDir(self.repo_path), 'content', '.rst', 3)
+        self.assertEqual(model.get('post/scheduled').slug, 'post/scheduled')
+        self.assertEqual(model.get_all(True)[0].slug, 'post/scheduled')
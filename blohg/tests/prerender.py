@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.prerender
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for the eager rendering of pages and posts.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import mock
+import os
+import unittest
+from mercurial import commands, hg, ui
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg import create_app, prerender
+from blohg.prerender import render_all
+from blohg.vcs_backends.hg import HgRepository
+from blohg.vcs import REVISION_DEFAULT
+
+
+class RenderAllTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        self.ui = ui.ui()
+        self.ui.setconfig('ui', 'quiet', True)
+        HgRepository.create_repo(self.repo_path)
+        self.repo = hg.repository(self.ui, self.repo_path)
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def get_app(self, eager_render):
+        app = create_app(repo_path=self.repo_path, autoinit=False)
+        app.config['EAGER_RENDER'] = eager_render
+        app.config['SERVER_NAME'] = 'example.org'
+        app.blohg.init_repo(REVISION_DEFAULT)
+        return app
+
+    def test_render_all(self):
+        app = self.get_app(False)
+        entries = app.blohg.content.get_all()
+        with app.test_request_context():
+            expected = [(i.full_raw_html, i.abstract_raw_html) \
+                        for i in entries]
+        app = self.get_app(False)
+        entries = app.blohg.content.get_all()
+        self.assertEqual(render_all(app, entries, 2), len(entries))
+        with mock.patch('blohg.models.parser') as parser:
+            self.assertEqual([(i.full_raw_html, i.abstract_raw_html) \
+                              for i in entries], expected)
+            self.assertFalse(parser.called)
+        self.assertTrue('http://example.org/attachments/mercurial.png' in
+                        app.blohg.content.get('about').full_raw_html)
+
+        # already rendered entries are skipped
+        self.assertEqual(render_all(app, entries, 2), 0)
+
+        # the state of the workers isn't set in the parent process.
+        self.assertTrue(prerender._app is None)
+        self.assertEqual(prerender._entries, [])
+
+    def test_eager_render(self):
+        app = self.get_app(2)
+        for entry in app.blohg.content.get_all():
+            self.assertTrue('parsed_source' in entry.__dict__)
+
+    def test_eager_render_disabled(self):
+        app = self.get_app(False)
+        for entry in app.blohg.content.get_all():
+            self.assertFalse('parsed_source' in entry.__dict__)
+
+    def test_eager_render_reload(self):
+        app = self.get_app(2)
+        with open(os.path.join(self.repo_path, 'content', 'about.rst'),
+                  'a') as fp:
+            fp.write('\n\nChanged.\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+        with mock.patch('blohg.render_all') as render_all:
+            app.test_client().get('/')
+            self.assertFalse(render_all.called)
+        about = app.blohg.content.get('about')
+        self.assertTrue('Changed.' in about.full)
+        self.assertFalse('parsed_source' in about.__dict__)
@@ -49,6 +49,7 @@ asd
         self.assertIn('align-center', content['fragment'])
         self.assertIn('frameborder="0"', content['fragment'])
         self.assertIn('allowfullscreen', content['fragment'])
+        self.assertTrue(content['cacheable'])
 
     def test_run(self):
         content = parser('''\
@@ -215,6 +216,7 @@ asd
                                              _external=True)
         self.assertIn('http://lol/foo.jpg', content['images'])
         self.assertIn('src="http://lol/foo.jpg"', content['fragment'])
+        self.assertFalse(content['cacheable'])
 
     def test_run(self):
         content = parser('''\
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.script
+    ~~~~~~~~~~~~~~~~~~
+
+    Module with tests for the blohg CLI script.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import mock
+import unittest
+
+from blohg.script import create_script, InitRepo
+from blohg.vcs import get_backends
+
+
+class ScriptTestCase(unittest.TestCase):
+
+    def test_create_parser(self):
+        parser = create_script().create_parser('blohg')
+        for command in ['runserver', 'initrepo', 'snapshot', 'freeze']:
+            args = parser.parse_args([command] + \
+                                     (command == 'snapshot' and ['foo'] or []))
+            self.assertTrue(args is not None)
+
+    def test_initrepo_backends(self):
+        backends = InitRepo().backends
+        self.assertTrue(len(backends) > 0)
+        self.assertEqual(backends, [i for i in get_backends()
+                                    if i.identifier != 'snapshot'])
+        parser = create_script().create_parser('blohg')
+        with mock.patch('sys.stderr'):
+            self.assertRaises(SystemExit, parser.parse_args,
+                              ['initrepo', '--snapshot'])
+        args = parser.parse_args(['initrepo', '--%s' %
+                                  backends[0].identifier])
+        self.assertTrue(getattr(args, backends[0].identifier))
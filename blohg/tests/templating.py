@@ -104,12 +104,16 @@ class BlohgLoaderTestCase(unittest.TestCase):
                               os.path.join(app.template_folder,
                                            'test.html'))
             app.preprocess_request()
+            self.assertTrue(up2date())
+            with codecs.open(new_file, 'a', encoding='utf-8') as fp:
+                fp.write('bar')
+            app.preprocess_request()
             self.assertFalse(up2date())
-            commands.commit(self.ui, self.repo, message='foo', user='foo',
-                            addremove=True)
             contents, filename, up2date = app.jinja_loader.get_source(
                 app.jinja_env, 'test.html')
-            self.assertEqual('foo', contents)
+            self.assertEqual('foobar', contents)
+            commands.commit(self.ui, self.repo, message='foo', user='foo',
+                            addremove=True)
             app.preprocess_request()
             self.assertFalse(up2date())
 
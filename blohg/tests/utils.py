@@ -11,7 +11,7 @@
 
 import unittest
 
-from blohg.utils import parse_date
+from blohg.utils import LRUCache, parse_date
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -23,3 +23,46 @@ class UtilsTestCase(unittest.TestCase):
         self.assertTrue(isinstance(from_ts, int), 'parsed ts is not an int')
         self.assertTrue(isinstance(from_str, int), 'parsed str is not an int')
         self.assertEqual(from_ts, from_str)
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'b' is the oldest now
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertFalse('b' in cache)
+        self.assertTrue(cache.get('b') is None)
+        self.assertEqual(cache.get('b', 4), 4)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_cache_maxbytes(self):
+        cache = LRUCache(10, 5, len)
+        cache.set('a', 'aa')
+        cache.set('b', 'bb')
+        self.assertEqual(len(cache), 2)
+        cache.set('c', 'cc')
+        self.assertEqual(len(cache), 2)
+        self.assertFalse('a' in cache)
+
+        # items that grew after being stored are measured again on request.
+        value = ['b']
+        cache.set('b', value)
+        value.extend(['b', 'b'])
+        cache.set('d', 'd')
+        self.assertTrue('c' in cache)
+        cache.measure('b', ['b'])  # not the stored item
+        self.assertTrue('c' in cache)
+        cache.measure('b', value)
+        self.assertFalse('c' in cache)
+        self.assertTrue('b' in cache)
+        self.assertTrue('d' in cache)
+        self.assertEqual(cache._size, 4)
+
+        # the most recent item is kept, even if too big.
+        cache.set('e', 'eeeeee')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('e'), 'eeeeee')
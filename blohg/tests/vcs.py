@@ -9,6 +9,7 @@
     :license: GPL-2, see LICENSE for more details.
 """
 
+import threading
 import unittest
 from pygit2 import init_repository
 from shutil import rmtree
@@ -16,7 +17,7 @@ from tempfile import mkdtemp
 
 from blohg.vcs_backends.hg import HgRepository
 from blohg.vcs_backends.git import GitRepository
-from blohg.vcs import load_repo
+from blohg.vcs import FileIndex, ThreadLocalHandle, in_subtrees, load_repo
 
 
 class LoadRepoTestCase(unittest.TestCase):
@@ -48,3 +49,79 @@ class LoadRepoTestCase(unittest.TestCase):
     def test_no_backend(self):
         with self.assertRaises(RuntimeError):
             load_repo(self.repo_path)
+
+
+class InSubtreesTestCase(unittest.TestCase):
+
+    def test_all(self):
+        self.assertTrue(in_subtrees('foo/bar.rst', None))
+
+    def test_files(self):
+        subtrees = ['content', 'static/css']
+        self.assertTrue(in_subtrees('content/foo.rst', subtrees))
+        self.assertTrue(in_subtrees('static/css/foo.css', subtrees))
+        self.assertFalse(in_subtrees('static/foo.js', subtrees))
+        self.assertFalse(in_subtrees('contents/foo.rst', subtrees))
+        self.assertFalse(in_subtrees('config.yaml', subtrees))
+
+    def test_dirs(self):
+        subtrees = ['content', 'static/css']
+        self.assertTrue(in_subtrees('content', subtrees, True))
+        self.assertTrue(in_subtrees('content/post', subtrees, True))
+        self.assertTrue(in_subtrees('static', subtrees, True))
+        self.assertFalse(in_subtrees('static', subtrees))
+        self.assertFalse(in_subtrees('media', subtrees, True))
+
+
+class FileIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.files = FileIndex(['static/b.css', 'config.yaml',
+                                'static/a.css', 'staticfoo', 'templates/x'])
+
+    def test_list(self):
+        self.assertEqual(self.files, ['config.yaml', 'static/a.css',
+                                      'static/b.css', 'staticfoo',
+                                      'templates/x'])
+
+    def test_contains(self):
+        self.assertTrue('static/a.css' in self.files)
+        self.assertFalse('static' in self.files)
+
+    def test_prefixed(self):
+        self.assertEqual(self.files.prefixed('static/'),
+                         ['static/a.css', 'static/b.css'])
+        self.assertEqual(self.files.prefixed('static'),
+                         ['static/a.css', 'static/b.css', 'staticfoo'])
+        self.assertEqual(self.files.prefixed('templates/'), ['templates/x'])
+        self.assertEqual(self.files.prefixed('media/'), [])
+        self.assertEqual(FileIndex().prefixed('static/'), [])
+
+
+class ThreadLocalHandleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.handle = ThreadLocalHandle(lambda: {'foo': object()})
+
+    def test_get(self):
+        handle = self.handle.get()
+        self.assertTrue(self.handle.get() is handle)
+        self.assertTrue(self.handle['foo'] is handle['foo'])
+        self.assertEqual(self.handle.keys(), ['foo'])
+
+    def test_threads(self):
+        handles = []
+
+        def run():
+            handles.append(self.handle.get())
+            handles.append(self.handle.get())
+
+        threads = [threading.Thread(target=run) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(handles[0] is handles[1])
+        self.assertTrue(handles[2] is handles[3])
+        self.assertFalse(handles[0] is handles[2])
+        self.assertFalse(self.handle.get() in handles)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.fs
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Package with tests for blohg integration with plain directories.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.fs import FsRepository
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs import REVISION_DEFAULT, REVISION_WORKING_DIR
+
+
+class FsRepositoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        with codecs.open(os.path.join(self.repo_path, 'config.yaml'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('TITLE: foo\n')
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def test_create_repo(self):
+        repo_path = mkdtemp()
+        try:
+            FsRepository.create_repo(repo_path)
+            for f in [os.path.join('content', 'attachments', 'mercurial.png'),
+                      os.path.join('content', 'post', 'example-post.rst'),
+                      os.path.join('content', 'post', 'lorem-ipsum.rst'),
+                      os.path.join('content', 'about.rst'),
+                      os.path.join('static', 'screen.css'),
+                      os.path.join('templates', 'base.html'),
+                      os.path.join('templates', 'posts.html'),
+                      os.path.join('templates', 'post_list.html'),
+                      'config.yaml']:
+                self.assertTrue(os.path.exists(os.path.join(repo_path, f)),
+                                'Not found: %s' % f)
+            self.assertTrue(FsRepository.supported(repo_path))
+            self.assertRaises(RuntimeError, FsRepository.create_repo,
+                              repo_path)
+        finally:
+            rmtree(repo_path)
+
+    def test_supported(self):
+        self.assertTrue(FsRepository.supported(self.repo_path))
+        self.assertFalse(FsRepository.supported(os.path.join(self.repo_path,
+                                                             'lol')))
+        for vcs_dir in ['.hg', '.git']:
+            os.makedirs(os.path.join(self.repo_path, vcs_dir))
+            try:
+                self.assertFalse(FsRepository.supported(self.repo_path))
+            finally:
+                os.rmdir(os.path.join(self.repo_path, vcs_dir))
+        os.unlink(os.path.join(self.repo_path, 'config.yaml'))
+        self.assertFalse(FsRepository.supported(self.repo_path))
+
+    def test_get_changectx_rev_default(self):
+        repo = FsRepository(self.repo_path)
+        self.assertTrue(isinstance(repo.get_changectx(REVISION_DEFAULT),
+                                   ChangeCtxDefault),
+                        'changectx object is not an instance of '
+                        'ChangeCtxDefault')
+
+    def test_get_changectx_rev_working_dir(self):
+        repo = FsRepository(self.repo_path)
+        self.assertTrue(isinstance(repo.get_changectx(REVISION_WORKING_DIR),
+                                   ChangeCtxWorkingDir),
+                        'changectx object is not an instance of '
+                        'ChangeCtxWorkingDir')
+
+    def test_get_changectx_invalid(self):
+        repo = FsRepository(self.repo_path)
+        self.assertRaises(RuntimeError, repo.get_changectx, 42)
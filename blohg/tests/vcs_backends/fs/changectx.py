@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.fs.changectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with plain directories (change
+    context).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import sleep, time
+
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir, DATES_FILE
+
+
+class ChangeCtxBaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+
+        # create files
+        self.repo_files = ['a%i.rst' % i for i in range(5)]
+        for i in self.repo_files:
+            with codecs.open(os.path.join(self.repo_path, i), 'w',
+                             encoding='utf-8') as fp:
+                fp.write('dumb file %s\n' % i)
+        os.makedirs(os.path.join(self.repo_path, 'content', 'post'))
+        os.makedirs(os.path.join(self.repo_path, '.hg'))
+        self.repo_files.append('content/post/foo.rst')
+        with codecs.open(os.path.join(self.repo_path, 'content', 'post',
+                                      'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo\n')
+        with codecs.open(os.path.join(self.repo_path, '.hg', 'lol'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    @property
+    def ctx_class(self):
+        raise NotImplementedError
+
+    def get_ctx(self):
+        return self.ctx_class(self.repo_path)
+
+
+class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
+
+    ctx_class = ChangeCtxDefault
+
+    def test_files(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files))
+
+        # the sidecar file isn't listed
+        with codecs.open(os.path.join(self.repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('a0.rst: 1234567890\n')
+        self.assertEqual(self.get_ctx().files, sorted(self.repo_files))
+
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst',
+                                     'content/post/foo.rst'])
+
+    def test_get_filectx(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.get_filectx('a1.rst').content,
+                         'dumb file a1.rst\n')
+        self.assertEqual(ctx.get_filectx('content/post/foo.rst').content,
+                         'foo\n')
+        for path in ['lol.rst', 'content', '../a1.rst', 'content/../a1.rst',
+                     os.path.join(self.repo_path, 'a1.rst'), '.hg/lol']:
+            self.assertRaises(RuntimeError, ctx.get_filectx, path)
+
+    def test_get_filectx_identity(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectx)
+        self.assertFalse(self.get_ctx().get_filectx('a1.rst') is filectx)
+
+    def test_get_filectx_cache_bytes(self):
+        ctx = self.get_ctx()
+        ctx.filectx_cache_bytes = 2000
+        with open(os.path.join(self.repo_path, 'big.bin'), 'wb') as fp:
+            fp.write('x' * 4000)
+        ctx.get_filectx('a1.rst')
+        filectx = ctx.get_filectx('big.bin')
+        self.assertTrue('a1.rst' in ctx._filectxs)
+
+        # the limit is enforced as soon as the data is loaded.
+        filectx.data
+        self.assertFalse('a1.rst' in ctx._filectxs)
+        self.assertTrue('big.bin' in ctx._filectxs)
+        ctx.get_filectx('a2.rst')
+        self.assertFalse('big.bin' in ctx._filectxs)
+        self.assertTrue('a2.rst' in ctx._filectxs)
+
+        # file contexts that aren't kept aren't measured.
+        filectx = ctx.get_filectx('big.bin', False)
+        filectx.data
+        self.assertTrue('a2.rst' in ctx._filectxs)
+
+    def test_dates(self):
+        self.assertEqual(self.get_ctx()._dates, {})
+        with codecs.open(os.path.join(self.repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('a0.rst: 1234567890\n'
+                     'content/post/foo.rst:\n'
+                     '  date: 2009-02-13 23:31:30\n'
+                     '  mdate: 1234567899\n'
+                     '  author: foo <foo@example.com>\n')
+        self.assertEqual(self.get_ctx()._dates, {
+            'a0.rst': {'date': 1234567890},
+            'content/post/foo.rst': {'date': 1234567890,
+                                     'mdate': 1234567899,
+                                     'author': 'foo <foo@example.com>'}})
+
+    def test_dates_invalid(self):
+        with codecs.open(os.path.join(self.repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('- a0.rst\n')
+        self.assertRaises(RuntimeError, getattr, self.get_ctx(), '_dates')
+
+    def test_revision_id(self):
+        ctx = self.get_ctx()
+        self.assertEqual(len(ctx.revision_id), 20)
+        self.assertEqual(ctx.revision_id, self.get_ctx().revision_id)
+        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('testing\n')
+        self.assertNotEqual(ctx.revision_id, self.get_ctx().revision_id)
+
+    def test_needs_reload(self):
+        ctx = self.get_ctx()
+
+        # the files weren't listed yet
+        self.assertTrue(ctx.needs_reload())
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
+
+        # files edited in place aren't detected
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertFalse(ctx.needs_reload())
+
+        # add a file to a subdirectory
+        with codecs.open(os.path.join(self.repo_path, 'content', 'post',
+                                      'bar.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('bar\n')
+        self.assertTrue(ctx.needs_reload())
+
+        # reload
+        ctx = self.get_ctx()
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
+
+        # remove a file
+        os.unlink(os.path.join(self.repo_path, 'a1.rst'))
+        self.assertTrue(ctx.needs_reload())
+
+        # replace a file, like rsync
+        ctx = self.get_ctx()
+        ctx.files
+        tmp_path = os.path.join(self.repo_path, '.a2.rst.tmp')
+        with codecs.open(tmp_path, 'w', encoding='utf-8') as fp:
+            fp.write('lol\n')
+        os.rename(tmp_path, os.path.join(self.repo_path, 'a2.rst'))
+        self.assertTrue(ctx.needs_reload())
+
+        # changes in the sidecar file
+        ctx = self.get_ctx()
+        ctx.files
+        with codecs.open(os.path.join(self.repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('a0.rst: 1234567890\n')
+        self.assertTrue(ctx.needs_reload())
+
+    def test_needs_reload_excluded(self):
+        ctx = self.get_ctx()
+        ctx.excluded_paths = [os.path.join(self.repo_path, '.cache'),
+                              os.path.join(self.repo_path, 'index.db')]
+        os.makedirs(os.path.join(self.repo_path, '.cache', 'ab'))
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
+
+        # files written by blohg aren't listed, nor seen as changes.
+        for path in ['.cache/ab/cd', 'index.db', 'index.db-journal']:
+            with open(os.path.join(self.repo_path, path), 'w') as fp:
+                fp.write('lol\n')
+        self.assertFalse(ctx.needs_reload())
+        new_ctx = self.get_ctx()
+        new_ctx.excluded_paths = ctx.excluded_paths
+        self.assertFalse([i for i in new_ctx.files \
+                          if i.startswith('.cache') or i.startswith('index')])
+        with open(os.path.join(self.repo_path, 'index.rst'), 'w') as fp:
+            fp.write('lol\n')
+        self.assertTrue(ctx.needs_reload())
+
+    def test_needs_reload_outside_of_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['content']
+        ctx.files
+
+        # the root directory changed, but nothing listed.
+        os.makedirs(os.path.join(self.repo_path, 'lol'))
+        self.assertFalse(ctx.needs_reload())
+        ctx = self.get_ctx()
+        ctx.subtrees = ['content']
+        ctx.files
+        with codecs.open(os.path.join(self.repo_path, 'lol', 'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo\n')
+        self.assertFalse(ctx.needs_reload())
+
+    def test_filectx_needs_reload(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+
+        # reload
+        new_ctx = self.get_ctx()
+        new_filectx = new_ctx.get_filectx('a1.rst')
+        self.assertFalse(new_ctx.filectx_needs_reload(new_filectx))
+
+        # file context from the previous change context
+        self.assertTrue(new_ctx.filectx_needs_reload(filectx))
+
+    def test_published(self):
+        ctx = self.get_ctx()
+        date = int(time() + 1)
+        self.assertFalse(ctx.published(date, time()))
+        sleep(1)
+        self.assertTrue(ctx.published(date, time()))
+
+
+class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
+
+    ctx_class = ChangeCtxWorkingDir
+
+    def test_files(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files))
+
+    def test_get_filectx(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertEqual(filectx.content, 'dumb file a1.rst\n')
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectx)
+        self.assertRaises(RuntimeError, ctx.get_filectx, '../a1.rst')
+
+    def test_needs_reload(self):
+        ctx = self.get_ctx()
+
+        # the files weren't listed yet
+        self.assertTrue(ctx.needs_reload())
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
+
+        # change a file
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertTrue(ctx.needs_reload())
+
+        # reload, taking over the state of the previous change context
+        new_ctx = self.get_ctx()
+        new_ctx.update_from(ctx)
+        new_ctx.files
+        self.assertEqual(new_ctx.changed_paths, ['a1.rst'])
+        self.assertFalse(new_ctx.needs_reload())
+
+        # changes in the sidecar file may change anything
+        with codecs.open(os.path.join(self.repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('a0.rst: 1234567890\n')
+        self.assertTrue(new_ctx.needs_reload())
+        ctx = self.get_ctx()
+        ctx.update_from(new_ctx)
+        ctx.files
+        self.assertTrue(ctx.changed_paths is None)
+        self.assertFalse(ctx.needs_reload())
+
+    def test_needs_reload_excluded(self):
+        ctx = self.get_ctx()
+        ctx.excluded_paths = [os.path.join(self.repo_path, '.cache')]
+        ctx.files
+        os.makedirs(os.path.join(self.repo_path, '.cache', 'ab'))
+        with open(os.path.join(self.repo_path, '.cache', 'ab', 'cd'),
+                  'w') as fp:
+            fp.write('lol\n')
+        self.assertFalse(ctx.needs_reload())
+
+    def test_filectx_needs_reload(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+
+        # the files weren't listed yet
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+        ctx.files
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+
+    def test_published(self):
+        ctx = self.get_ctx()
+        date = int(time() + 1)
+        self.assertTrue(ctx.published(date, time()))
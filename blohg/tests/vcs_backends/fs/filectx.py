@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.fs.filectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with plain directories (file
+    context).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault, DATES_FILE
+
+
+class FileCtxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        self.file_name = 'foo.rst'
+        self.file_path = os.path.join(self.repo_path, self.file_name)
+        with codecs.open(self.file_path, 'w', encoding='utf-8') as fp:
+            fp.write(u'test ç\n')
+        os.utime(self.file_path, (1234567890, 1234567890))
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def get_ctx(self):
+        return ChangeCtxDefault(self.repo_path).get_filectx(self.file_name)
+
+    def write_dates(self, data):
+        with codecs.open(os.path.join(self.repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write(data)
+
+    def test_path(self):
+        self.assertEqual(self.get_ctx().path, u'foo.rst')
+
+    def test_content(self):
+        self.assertEqual(self.get_ctx().content, u'test ç\n')
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertEqual(self.get_ctx().content, u'test ç\nlol\n')
+
+    def test_blob_id(self):
+        blob_id = self.get_ctx().blob_id
+        self.assertEqual(len(blob_id), 40)
+        self.assertEqual(self.get_ctx().blob_id, blob_id)
+        os.utime(self.file_path, (1234567899, 1234567899))
+        self.assertNotEqual(self.get_ctx().blob_id, blob_id)
+
+    def test_date_and_mdate_from_mtime(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.date, 1234567890)
+        self.assertTrue(ctx.mdate is None)
+        self.assertEqual(ctx.author, u'')
+
+    def test_date_and_mdate_from_dates_file(self):
+        self.write_dates(u'foo.rst:\n'
+                         u'  date: 2009-02-13 23:31:00\n'
+                         u'  mdate: 1234567899\n'
+                         u'  author: fóo <foo@example.com>\n')
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.date, 1234567860)
+        self.assertEqual(ctx.mdate, 1234567899)
+        self.assertEqual(ctx.author, u'fóo <foo@example.com>')
+
+    def test_date_from_dates_file_only(self):
+        self.write_dates(u'foo.rst: 1234567800\n'
+                         u'bar.rst: 1234567801\n')
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.date, 1234567800)
+        self.assertTrue(ctx.mdate is None)
+        self.assertEqual(ctx.author, u'')
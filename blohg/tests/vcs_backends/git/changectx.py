@@ -10,6 +10,7 @@
 """
 
 import codecs
+import mock
 import os
 import unittest
 
@@ -58,6 +59,26 @@ class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
 
     ctx_class = ChangeCtxDefault
 
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst'])
+
+    def test_get_filectx_identity(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectx)
+        self.assertFalse(self.get_ctx().get_filectx('a1.rst') is filectx)
+
+    def test_get_filectx_from_entries(self):
+        ctx = self.get_ctx()
+        ctx.files
+        with mock.patch('blohg.vcs_backends.git.filectx.FileCtx.'
+                        'get_entry_from_basetree') as get_entry:
+            filectx = ctx.get_filectx('a1.rst')
+            self.assertFalse(get_entry.called)
+        self.assertEqual(filectx.content, 'dumb file a1.rst\n')
+
     def test_files(self):
 
         new_file = 'a.rst'
@@ -106,6 +127,23 @@ class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
         # shouldn't need a reload again
         self.assertFalse(ctx.needs_reload())
 
+    def test_needs_reload_without_changes(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a0.rst')
+        with mock.patch.object(ctx._repo, 'lookup_reference') as lookup:
+            self.assertFalse(ctx.needs_reload())
+            self.assertFalse(ctx.filectx_needs_reload(filectx))
+            self.assertFalse(lookup.called)
+
+    def test_needs_reload_packed_refs(self):
+        ctx = self.get_ctx()
+        with open(os.path.join(self.repo.path, 'packed-refs'), 'w') as fp:
+            fp.write('# pack-refs with: peeled\n')
+        self.assertFalse(ctx.needs_reload())
+        with mock.patch.object(ctx._repo, 'lookup_reference') as lookup:
+            self.assertFalse(ctx.needs_reload())
+            self.assertFalse(lookup.called)
+
     def test_filectx_needs_reload(self):
 
         # add a file to repo
@@ -152,6 +190,11 @@ class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
 
     ctx_class = ChangeCtxWorkingDir
 
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst'])
+
     def test_files(self):
 
         new_file = 'a.rst'
@@ -181,59 +224,71 @@ class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
 
     def test_needs_reload(self):
         ctx = self.get_ctx()
+
+        # the files weren't listed yet
         self.assertTrue(ctx.needs_reload())
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
 
-        # add a file to repo
-        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'w',
+        # change a file
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
                          encoding='utf-8') as fp:
-            fp.write('testing\n')
-
-        # should always be true
+            fp.write('lol\n')
         self.assertTrue(ctx.needs_reload())
 
-        git_commit(self.repo, self.tree, ['a.rst'], [self.old_commit])
-
-        # should need a reload now, after the commit
-        self.assertTrue(ctx.needs_reload())
+        # reload, taking over the state of the previous change context
+        new_ctx = self.get_ctx()
+        new_ctx.update_from(ctx)
+        new_ctx.files
+        self.assertEqual(new_ctx.changed_paths, ['a1.rst'])
+        self.assertFalse(new_ctx.needs_reload())
 
-        # reload
+        # commits may change anything
+        git_commit(self.repo, self.tree, ['a1.rst'], [self.old_commit])
+        self.assertTrue(new_ctx.needs_reload())
         ctx = self.get_ctx()
+        ctx.update_from(new_ctx)
+        ctx.files
+        self.assertTrue(ctx.changed_paths is None)
+        self.assertFalse(ctx.needs_reload())
 
-        # should still need a reload, right after the reload
-        self.assertTrue(ctx.needs_reload())
-
-    def test_filectx_needs_reload(self):
+    def test_needs_reload_untracked(self):
+        ctx = self.get_ctx()
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
 
-        # add a file to repo
-        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'w',
-                         encoding='utf-8') as fp:
-            fp.write('testing\n')
+        # untracked files aren't listed.
+        os.makedirs(os.path.join(self.repo_path, 'build'))
+        for path in ['build/a.html', 'a.rst']:
+            with open(os.path.join(self.repo_path, path), 'w') as fp:
+                fp.write('lol\n')
+        self.assertFalse(ctx.needs_reload())
         self.repo.index.add('a.rst')
         self.repo.index.write()
+        self.assertTrue(ctx.needs_reload())
 
+    def test_filectx_needs_reload(self):
         ctx = self.get_ctx()
-        filectx = ctx.get_filectx('a.rst')
+        filectx = ctx.get_filectx('a1.rst')
 
+        # the files weren't listed yet
         self.assertTrue(ctx.filectx_needs_reload(filectx))
+        ctx.files
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
 
-        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'w',
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
                          encoding='utf-8') as fp:
-            fp.write('testing\n')
-
-        # should always be true
-        self.assertTrue(ctx.filectx_needs_reload(filectx))
-
-        git_commit(self.repo, self.tree, ['a.rst'], [self.old_commit])
-
-        # should need a reload now, after the commit
+            fp.write('lol\n')
         self.assertTrue(ctx.filectx_needs_reload(filectx))
 
         # reload
-        ctx = self.get_ctx()
-        filectx = ctx.get_filectx('a.rst')
+        new_ctx = self.get_ctx()
+        new_ctx.files
+        new_filectx = new_ctx.get_filectx('a1.rst')
+        self.assertFalse(new_ctx.filectx_needs_reload(new_filectx))
 
-        # should still need a reload, right after the reload
-        self.assertTrue(ctx.filectx_needs_reload(filectx))
+        # file context from the previous change context
+        self.assertTrue(new_ctx.filectx_needs_reload(filectx))
 
     def test_published(self):
         ctx = self.get_ctx()
@@ -18,6 +18,7 @@ from shutil import rmtree
 from tempfile import mkdtemp
 
 from blohg.vcs_backends.git.filectx import FileCtx
+from blohg.vcs_backends.git.history import History
 from blohg.tests.vcs_backends.git.utils import git_commit
 
 
@@ -34,6 +35,7 @@ class FileCtxTestCase(unittest.TestCase):
         self.tree = self.repo.TreeBuilder()
         self.last_commit = git_commit(self.repo, self.tree, [self.file_name])
         self.changectx = self.repo.head
+        self.history = History(self.repo)
 
     def tearDown(self):
         try:
@@ -42,31 +44,43 @@ class FileCtxTestCase(unittest.TestCase):
             pass
 
     def test_path(self):
-        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history)
         self.assertEqual(ctx.path, 'foo.rst')
 
     def test_content(self):
-        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history)
         self.assertEqual(ctx.content, 'test\n')
         with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
             fp.write('lol\n')  # change file without git add
-        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history)
         self.assertEqual(ctx.content, 'test\n')
 
     def test_content_from_index_read_without_git_add(self):
-        ctx = FileCtx(self.repo, self.changectx, self.file_name, True)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history,
+                      True)
         self.assertEqual(ctx.content, 'test\n')
         with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
             fp.write('lol\n')  # change file without git add
-        ctx = FileCtx(self.repo, self.changectx, self.file_name, True)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history,
+                      True)
         self.assertEqual(ctx.content, 'test\nlol\n')
 
     def test_author(self):
-        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history)
         self.assertEqual(ctx.author, 'foo <foo@example.com>')
 
+    def test_blob_id(self):
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history)
+        self.assertEqual(ctx.blob_id, self.repo.index[self.file_name].hex)
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')  # change file without git add
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history,
+                      True)
+        self.assertEqual(len(ctx.blob_id), 40)
+        self.assertNotEqual(ctx.blob_id, self.repo.index[self.file_name].hex)
+
     def test_date_and_mdate(self):
-        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name, self.history)
         time.sleep(1)
         self.assertTrue(ctx.date < time.time())
         self.assertTrue(ctx.mdate is None)
@@ -75,6 +89,7 @@ class FileCtxTestCase(unittest.TestCase):
         with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
             fp.write('foo\n')
         git_commit(self.repo, self.tree, [self.file_name], [self.last_commit])
-        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name,
+                      History(self.repo))
         self.assertEqual(ctx.date, old_date)
         self.assertTrue(ctx.mdate > old_date)
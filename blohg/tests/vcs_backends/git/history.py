@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.git.history
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with git (history index).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import mock
+import os
+import unittest
+from pygit2 import init_repository, Repository, Signature
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.git.filectx import FileCtx
+from blohg.vcs_backends.git.history import History
+from blohg.tests.vcs_backends.git.utils import git_commit
+
+
+class HistoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        self.cache_dir = mkdtemp()
+        init_repository(self.repo_path, False)
+        self.repo = Repository(self.repo_path)
+        self.tree = self.repo.TreeBuilder()
+        self.commits = []
+        self._commit({'a.rst': 'a\n', 'b.rst': 'b\n'})
+        self._commit({'c.rst': 'c\n'})
+        self._commit({'a.rst': 'aa\n'})
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+            rmtree(self.cache_dir)
+        except:
+            pass
+
+    def _commit(self, files):
+        for name, content in files.items():
+            with codecs.open(os.path.join(self.repo_path, name), 'w',
+                             encoding='utf-8') as fp:
+                fp.write(content)
+        self.commits.append(git_commit(self.repo, self.tree, files.keys(),
+                                       self.commits[-1:]))
+
+    def test_get(self):
+        history = History(self.repo)
+        first, last = history.get('a.rst')
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[2])
+        first, last = history.get('b.rst')
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[0])
+        first, last = history.get('c.rst')
+        self.assertEqual(first.oid, self.commits[1])
+        self.assertEqual(last.oid, self.commits[1])
+        self.assertEqual(history.get('d.rst'), (None, None))
+
+    def test_deleted_and_added_again(self):
+        os.unlink(os.path.join(self.repo_path, 'b.rst'))
+        self.repo.index.remove('b.rst')
+        self.repo.index.write()
+        self.tree.remove('b.rst')
+        sign = Signature('foo', 'foo@example.com')
+        self.commits.append(self.repo.create_commit(
+            'refs/heads/master', sign, sign, 'foo', self.tree.write(),
+            self.commits[-1:]))
+        first, last = History(self.repo).get('b.rst')
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[3])
+        self._commit({'b.rst': 'bb\n'})
+        first, last = History(self.repo).get('b.rst')
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[4])
+
+    def test_filectx(self):
+        history = History(self.repo)
+        changectx = self.repo.head
+        for name, first, last in [('a.rst', 0, 2), ('b.rst', 0, None),
+                                  ('c.rst', 1, None)]:
+            ctx = FileCtx(self.repo, changectx, name, history)
+            self.assertEqual(ctx.date,
+                             self.repo[self.commits[first]].author.time)
+            if last is None:
+                self.assertTrue(ctx.mdate is None)
+            else:
+                self.assertEqual(ctx.mdate,
+                                 self.repo[self.commits[last]].author.time)
+            self.assertEqual(ctx.author, 'foo <foo@example.com>')
+
+    def test_not_persisted(self):
+        History(self.repo).get('a.rst')
+        self.assertFalse([i for i in os.listdir(self.repo.path) \
+                          if 'history' in i])
+        history = History(self.repo)
+        with mock.patch.object(history, '_changed_paths',
+                               wraps=history._changed_paths) as changed_paths:
+            history.get('a.rst')
+            self.assertTrue(changed_paths.called)
+
+    def test_persisted(self):
+        History(self.repo, cache_dir=self.cache_dir).get('a.rst')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        history = History(self.repo, cache_dir=self.cache_dir)
+        with mock.patch.object(history, '_changed_paths') as changed_paths:
+            first, last = history.get('a.rst')
+            self.assertFalse(changed_paths.called)
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[2])
+
+    def test_fast_forward(self):
+        History(self.repo, cache_dir=self.cache_dir).get('a.rst')
+        self._commit({'b.rst': 'bb\n'})
+        history = History(self.repo, cache_dir=self.cache_dir)
+        with mock.patch.object(history, '_changed_paths',
+                               wraps=history._changed_paths) as changed_paths:
+            first, last = history.get('b.rst')
+            self.assertEqual(changed_paths.call_count, 1)
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[3])
+        first, last = history.get('a.rst')
+        self.assertEqual(last.oid, self.commits[2])
+
+    def test_force_push(self):
+        History(self.repo, cache_dir=self.cache_dir).get('a.rst')
+
+        # rewrite the branch, on top of the first commit.
+        sign = Signature('foo', 'foo@example.com')
+        commit = self.repo.create_commit(None, sign, sign, 'bar',
+                                         self.repo[self.commits[0]].tree.oid,
+                                         [self.commits[0]])
+        self.repo.lookup_reference('refs/heads/master').target = commit
+        history = History(self.repo, cache_dir=self.cache_dir)
+        first, last = history.get('a.rst')
+        self.assertEqual(first.oid, self.commits[0])
+        self.assertEqual(last.oid, self.commits[0])
+        self.assertEqual(history.get('c.rst'), (None, None))
+
+    def test_save_failure(self):
+        history = History(self.repo, cache_dir=self.cache_dir)
+        history._save('0' * 40, {'\xff.rst': (None, None)})
+        self.assertEqual(os.listdir(self.cache_dir), [])
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.gitcli
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Package with tests for blohg integration with the git command line tool.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.gitcli import GitCliRepository
+from blohg.vcs_backends.gitcli.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs import REVISION_DEFAULT, REVISION_WORKING_DIR
+from blohg.tests.vcs_backends.gitcli.utils import git_commit, git_init
+
+
+class GitCliRepositoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        git_init(self.repo_path)
+        with codecs.open(os.path.join(self.repo_path, 'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo')
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def test_create_repo(self):
+        repo_path = mkdtemp()
+        try:
+            GitCliRepository.create_repo(repo_path)
+            for f in [os.path.join('content', 'attachments', 'mercurial.png'),
+                      os.path.join('content', 'post', 'example-post.rst'),
+                      os.path.join('content', 'post', 'lorem-ipsum.rst'),
+                      os.path.join('content', 'about.rst'),
+                      os.path.join('static', 'screen.css'),
+                      os.path.join('templates', 'base.html'),
+                      os.path.join('templates', 'posts.html'),
+                      os.path.join('templates', 'post_list.html'),
+                      'config.yaml', '.gitignore', '.git']:
+                self.assertTrue(os.path.exists(os.path.join(repo_path, f)),
+                                'Not found: %s' % f)
+            self.assertTrue(GitCliRepository.supported(repo_path))
+        finally:
+            rmtree(repo_path)
+
+    def test_supported(self):
+        self.assertTrue(GitCliRepository.supported(self.repo_path))
+        repo_path = mkdtemp()
+        try:
+            self.assertFalse(GitCliRepository.supported(repo_path))
+            git_init(repo_path, bare=True)
+            self.assertTrue(GitCliRepository.supported(repo_path))
+        finally:
+            rmtree(repo_path)
+
+    def test_get_changectx_rev_default(self):
+        git_commit(self.repo_path, ['foo.rst'])
+        git_repo = GitCliRepository(self.repo_path)
+        self.assertTrue(isinstance(git_repo.get_changectx(REVISION_DEFAULT),
+                                   ChangeCtxDefault),
+                        'changectx object is not an instance of '
+                        'ChangeCtxDefault')
+
+    def test_get_changectx_rev_working_dir(self):
+        git_commit(self.repo_path, ['foo.rst'])
+        git_repo = GitCliRepository(self.repo_path)
+        self.assertTrue(
+            isinstance(git_repo.get_changectx(REVISION_WORKING_DIR),
+                       ChangeCtxWorkingDir),
+            'changectx object is not an instance of ChangeCtxWorkingDir')
+
+    def test_get_changectx_no_commits(self):
+        git_repo = GitCliRepository(self.repo_path)
+        self.assertRaises(RuntimeError, git_repo.get_changectx,
+                          REVISION_DEFAULT)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.gitcli.changectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with the git command line tool
+    (change context).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import mock
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import sleep, time
+
+from blohg.vcs_backends.gitcli.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs_backends.gitcli.git import Git
+from blohg.tests.vcs_backends.gitcli.utils import git, git_commit, git_init
+
+
+class ChangeCtxBaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        git_init(self.repo_path)
+
+        # create files and commit
+        self.repo_files = ['a%i.rst' % i for i in range(5)]
+        for i in self.repo_files:
+            with codecs.open(os.path.join(self.repo_path, i), 'w',
+                             encoding='utf-8') as fp:
+                fp.write('dumb file %s\n' % i)
+        os.makedirs(os.path.join(self.repo_path, 'content', 'post'))
+        self.repo_files.append('content/post/foo.rst')
+        with codecs.open(os.path.join(self.repo_path, 'content', 'post',
+                                      'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo\n')
+        git_commit(self.repo_path, self.repo_files)
+        self.git = Git(self.repo_path)
+
+    def tearDown(self):
+        self.git.close()
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    @property
+    def ctx_class(self):
+        raise NotImplementedError
+
+    def get_ctx(self):
+        return self.ctx_class(self.git)
+
+
+class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
+
+    ctx_class = ChangeCtxDefault
+
+    def test_files(self):
+
+        new_file = 'a.rst'
+
+        # add a file to repo
+        with codecs.open(os.path.join(self.repo_path, new_file), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('testing\n')
+
+        # before commit files
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files))
+
+        git_commit(self.repo_path, [new_file])
+
+        # after commit files
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files + [new_file]))
+
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst',
+                                     'content/post/foo.rst'])
+
+    def test_get_filectx(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.get_filectx('a1.rst').content,
+                         'dumb file a1.rst\n')
+        self.assertEqual(ctx.get_filectx('content/post/foo.rst').content,
+                         'foo\n')
+        self.assertRaises(RuntimeError, ctx.get_filectx, 'lol.rst')
+
+    def test_get_filectx_identity(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectx)
+        self.assertFalse(self.get_ctx().get_filectx('a1.rst') is filectx)
+
+    def test_prefetch(self):
+        ctx = self.get_ctx()
+        ctx.files
+        with mock.patch.object(self.git, 'cat_file') as cat_file:
+            filectxs = ctx.prefetch(['a1.rst', 'content/post/foo.rst'])
+            self.assertFalse(cat_file.called)
+        self.assertEqual([i.content for i in filectxs],
+                         ['dumb file a1.rst\n', 'foo\n'])
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectxs[0])
+        filectxs = ctx.prefetch(['a2.rst'], False)
+        self.assertEqual(filectxs[0].content, 'dumb file a2.rst\n')
+        self.assertFalse('a2.rst' in ctx._filectxs)
+
+    def test_needs_reload(self):
+        ctx = self.get_ctx()
+        self.assertFalse(ctx.needs_reload())
+
+        # add a file to repo
+        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('testing\n')
+
+        # should still be false
+        self.assertFalse(ctx.needs_reload())
+
+        git_commit(self.repo_path, ['a.rst'])
+
+        # should need a reload now, after the commit
+        self.assertTrue(ctx.needs_reload())
+
+        # reload
+        ctx = self.get_ctx()
+
+        # shouldn't need a reload again
+        self.assertFalse(ctx.needs_reload())
+
+    def test_needs_reload_without_changes(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a0.rst')
+        with mock.patch.object(self.git, 'rev_parse') as rev_parse:
+            self.assertFalse(ctx.needs_reload())
+            self.assertFalse(ctx.filectx_needs_reload(filectx))
+            self.assertFalse(rev_parse.called)
+
+    def test_needs_reload_packed_refs(self):
+        ctx = self.get_ctx()
+        git(self.repo_path, 'pack-refs', '--all')
+        self.assertFalse(ctx.needs_reload())
+        with mock.patch.object(self.git, 'rev_parse') as rev_parse:
+            self.assertFalse(ctx.needs_reload())
+            self.assertFalse(rev_parse.called)
+
+    def test_filectx_needs_reload(self):
+
+        # add a file to repo
+        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('testing\n')
+
+        git_commit(self.repo_path, ['a.rst'])
+
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a.rst')
+
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+        with codecs.open(os.path.join(self.repo_path, 'a.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+
+        # should still be false
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+        git_commit(self.repo_path, ['a.rst'])
+
+        # should need a reload now, after the commit
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+
+        # reload
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a.rst')
+
+        # shouldn't need a reload again
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+    def test_published(self):
+        ctx = self.get_ctx()
+        date = int(time() + 1)
+        self.assertFalse(ctx.published(date, time()))
+        sleep(1)
+        self.assertTrue(ctx.published(date, time()))
+
+
+class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
+
+    ctx_class = ChangeCtxWorkingDir
+
+    def test_files(self):
+
+        new_file = 'a.rst'
+
+        # add a file to repo
+        with codecs.open(os.path.join(self.repo_path, new_file), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('testing\n')
+        git(self.repo_path, 'add', new_file)
+
+        # before commit files
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files + [new_file]))
+
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst'])
+
+    def test_get_filectx(self):
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')  # change file without git add
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.get_filectx('a1.rst').content,
+                         'dumb file a1.rst\nlol\n')
+        self.assertRaises(RuntimeError, ctx.get_filectx, 'lol.rst')
+
+    def test_needs_reload(self):
+        ctx = self.get_ctx()
+
+        # the files weren't listed yet
+        self.assertTrue(ctx.needs_reload())
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
+
+        # change a file
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertTrue(ctx.needs_reload())
+
+        # reload, taking over the state of the previous change context
+        new_ctx = self.get_ctx()
+        new_ctx.update_from(ctx)
+        new_ctx.files
+        self.assertEqual(new_ctx.changed_paths, ['a1.rst'])
+        self.assertFalse(new_ctx.needs_reload())
+
+        # commits may change anything
+        git_commit(self.repo_path, ['a1.rst'])
+        self.assertTrue(new_ctx.needs_reload())
+        ctx = self.get_ctx()
+        ctx.update_from(new_ctx)
+        ctx.files
+        self.assertTrue(ctx.changed_paths is None)
+        self.assertFalse(ctx.needs_reload())
+
+    def test_needs_reload_untracked(self):
+        ctx = self.get_ctx()
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
+
+        # untracked files aren't listed.
+        os.makedirs(os.path.join(self.repo_path, 'build'))
+        for path in ['build/a.html', 'a.rst']:
+            with open(os.path.join(self.repo_path, path), 'w') as fp:
+                fp.write('lol\n')
+        self.assertFalse(ctx.needs_reload())
+        git(self.repo_path, 'add', 'a.rst')
+        self.assertTrue(ctx.needs_reload())
+
+    def test_filectx_needs_reload(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+
+        # the files weren't listed yet
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+        ctx.files
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+
+        # reload
+        new_ctx = self.get_ctx()
+        new_ctx.files
+        new_filectx = new_ctx.get_filectx('a1.rst')
+        self.assertFalse(new_ctx.filectx_needs_reload(new_filectx))
+
+        # file context from the previous change context
+        self.assertTrue(new_ctx.filectx_needs_reload(filectx))
+
+    def test_published(self):
+        ctx = self.get_ctx()
+        date = int(time() + 1)
+        self.assertTrue(ctx.published(date, time()))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.gitcli.filectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with the git command line tool
+    (file context).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import time
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.gitcli.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs_backends.gitcli.git import Git
+from blohg.tests.vcs_backends.gitcli.utils import git, git_commit, git_init
+
+
+class FileCtxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        git_init(self.repo_path)
+        self.file_name = 'foo.rst'
+        self.file_path = os.path.join(self.repo_path, self.file_name)
+        with codecs.open(self.file_path, 'w', encoding='utf-8') as fp:
+            fp.write('test\n')
+        git_commit(self.repo_path, [self.file_name], date=1234567890)
+        self.git = Git(self.repo_path)
+
+    def tearDown(self):
+        self.git.close()
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def get_ctx(self, working_dir=False):
+        if working_dir:
+            return ChangeCtxWorkingDir(self.git).get_filectx(self.file_name)
+        return ChangeCtxDefault(self.git).get_filectx(self.file_name)
+
+    def test_path(self):
+        self.assertEqual(self.get_ctx().path, 'foo.rst')
+
+    def test_content(self):
+        self.assertEqual(self.get_ctx().content, 'test\n')
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')  # change file without git add
+        self.assertEqual(self.get_ctx().content, 'test\n')
+
+    def test_content_from_index_read_without_git_add(self):
+        self.assertEqual(self.get_ctx(True).content, 'test\n')
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')  # change file without git add
+        self.assertEqual(self.get_ctx(True).content, 'test\nlol\n')
+
+    def test_author(self):
+        self.assertEqual(self.get_ctx().author, 'foo <foo@example.com>')
+
+    def test_blob_id(self):
+        blob_id = git(self.repo_path, 'rev-parse', 'HEAD:foo.rst').strip()
+        self.assertEqual(self.get_ctx().blob_id, blob_id)
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')  # change file without git add
+        ctx = self.get_ctx(True)
+        self.assertEqual(len(ctx.blob_id), 40)
+        self.assertNotEqual(ctx.blob_id, blob_id)
+
+    def test_date_and_mdate(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.date, 1234567890)
+        self.assertTrue(ctx.mdate is None)
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('foo\n')
+        git_commit(self.repo_path, [self.file_name], date=1234567899)
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.date, 1234567890)
+        self.assertEqual(ctx.mdate, 1234567899)
+
+    def test_date_uncommitted(self):
+        with codecs.open(os.path.join(self.repo_path, 'bar.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('bar\n')
+        git(self.repo_path, 'add', 'bar.rst')
+        ctx = ChangeCtxWorkingDir(self.git).get_filectx('bar.rst')
+        self.assertTrue(abs(ctx.date - time.time()) < 10)
+        self.assertTrue(ctx.mdate is None)
+        self.assertEqual(ctx.author, 'foo <foo@example.com>')
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.gitcli.git
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for the wrapper of the git command line tool.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import mock
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.gitcli.git import Git
+from blohg.tests.vcs_backends.gitcli.utils import git, git_commit, git_init
+
+
+class GitTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        git_init(self.repo_path)
+        with codecs.open(os.path.join(self.repo_path, 'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo\n')
+        self.commit = git_commit(self.repo_path, ['foo.rst'])
+        self.git = Git(self.repo_path)
+
+    def tearDown(self):
+        self.git.close()
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def test_rev_parse(self):
+        self.assertEqual(self.git.rev_parse('refs/heads/master'), self.commit)
+        self.assertTrue(self.git.rev_parse('refs/heads/lol') is None)
+
+    def test_cat_file(self):
+        blob_id = git(self.repo_path, 'rev-parse', 'HEAD:foo.rst').strip()
+        self.assertEqual(self.git.cat_file('HEAD:foo.rst'),
+                         (blob_id, 'foo\n'))
+        self.assertEqual(self.git.cat_file(blob_id), (blob_id, 'foo\n'))
+        self.assertRaises(RuntimeError, self.git.cat_file, 'HEAD:bar.rst')
+        self.assertRaises(RuntimeError, self.git.cat_file, 'HEAD')
+
+        # the same process is reused.
+        batch = self.git._batch
+        self.git.cat_file(blob_id)
+        self.assertTrue(self.git._batch is batch)
+
+    def test_cat_files(self):
+        blob_id = git(self.repo_path, 'rev-parse', 'HEAD:foo.rst').strip()
+        names = ['HEAD:foo.rst', blob_id] * 10
+        with mock.patch('blohg.vcs_backends.gitcli.git.BATCH_SIZE', 50):
+            self.assertEqual(self.git.cat_files(names),
+                             [(blob_id, 'foo\n')] * 20)
+        self.assertRaises(RuntimeError, self.git.cat_files,
+                          ['HEAD:bar.rst', blob_id])
+
+        # the process is still usable after a missing object.
+        self.assertEqual(self.git.cat_file(blob_id), (blob_id, 'foo\n'))
+
+    def test_cat_file_forked(self):
+        self.git.cat_file('HEAD:foo.rst')
+        batch = self.git._batch
+        with mock.patch('os.getpid', return_value=-1):
+            self.assertEqual(self.git.cat_file('HEAD:foo.rst')[1], 'foo\n')
+        self.assertFalse(self.git._batch is batch)
+        batch.stdin.close()
+        batch.wait()
+
+    def test_git_dir(self):
+        self.assertEqual(os.path.realpath(self.git.git_dir),
+                         os.path.realpath(os.path.join(self.repo_path,
+                                                       '.git')))
+        self.assertFalse(self.git.bare)
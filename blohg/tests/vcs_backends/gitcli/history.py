@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.gitcli.history
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with the git command line tool
+    (history index).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.gitcli.git import Git
+from blohg.vcs_backends.gitcli.history import History
+from blohg.tests.vcs_backends.gitcli.utils import git, git_commit, git_init
+
+
+class HistoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        git_init(self.repo_path)
+        self.commits = []
+        self._commit({'a.rst': 'a\n', 'b.rst': 'b\n'})
+        self._commit({'c.rst': 'c\n'})
+        self._commit({'a.rst': 'aa\n'})
+        self.git = Git(self.repo_path)
+
+    def tearDown(self):
+        self.git.close()
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def _commit(self, files):
+        for name, content in files.items():
+            with codecs.open(os.path.join(self.repo_path, name), 'w',
+                             encoding='utf-8') as fp:
+                fp.write(content)
+        self.commits.append(git_commit(self.repo_path, files.keys(),
+                                       date=1234567890 + len(self.commits)))
+
+    def get(self, path):
+        first, last = History(self.git, 'HEAD').get(path)
+        return first and first[0], last and last[0]
+
+    def test_get(self):
+        self.assertEqual(self.get('a.rst'), (self.commits[0],
+                                             self.commits[2]))
+        self.assertEqual(self.get('b.rst'), (self.commits[0],
+                                             self.commits[0]))
+        self.assertEqual(self.get('c.rst'), (self.commits[1],
+                                             self.commits[1]))
+        self.assertEqual(self.get('d.rst'), (None, None))
+        first, last = History(self.git, 'HEAD').get('c.rst')
+        self.assertEqual(first, (self.commits[1], 1234567891,
+                                 'foo <foo@example.com>'))
+
+    def test_deleted_and_added_again(self):
+        # like the pygit2 backend, deletions are changes of the path.
+        git(self.repo_path, 'rm', '-q', 'b.rst')
+        git(self.repo_path, 'commit', '-q', '-m', 'foo')
+        self.commits.append(git(self.repo_path, 'rev-parse', 'HEAD').strip())
+        self.assertEqual(self.get('b.rst'), (self.commits[0],
+                                             self.commits[3]))
+        self._commit({'b.rst': 'bb\n'})
+        self.assertEqual(self.get('b.rst'), (self.commits[0],
+                                             self.commits[4]))
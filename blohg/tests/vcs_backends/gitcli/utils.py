@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.gitcli.utils
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with the utilities for git command line tool support testing.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+from subprocess import check_output
+
+
+def git(repo_path, *args):
+    env = dict(os.environ)
+    env.update({'GIT_AUTHOR_NAME': 'foo',
+                'GIT_AUTHOR_EMAIL': 'foo@example.com',
+                'GIT_COMMITTER_NAME': 'foo',
+                'GIT_COMMITTER_EMAIL': 'foo@example.com'})
+    return check_output(['git'] + list(args), cwd=repo_path, env=env)
+
+
+def git_init(repo_path, bare=False):
+    args = bare and ['init', '-q', '--bare'] or ['init', '-q']
+    git(repo_path, *args)
+    git(repo_path, 'symbolic-ref', 'HEAD', 'refs/heads/master')
+    if not bare:
+        git(repo_path, 'config', 'user.name', 'foo')
+        git(repo_path, 'config', 'user.email', 'foo@example.com')
+
+
+def git_commit(repo_path, files, message='foo', date=None):
+    git(repo_path, 'add', '--', *files)
+    args = ['commit', '-q', '-m', message]
+    if date is not None:
+        args += ['--date', '%i +0000' % date]
+    git(repo_path, *args)
+    return git(repo_path, 'rev-parse', 'HEAD').strip()
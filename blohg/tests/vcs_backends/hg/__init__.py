@@ -73,3 +73,32 @@ class HgRepositoryTestCase(unittest.TestCase):
                                    ChangeCtxWorkingDir),
                         'changectx object is not an instance of '
                         'ChangeCtxWorkingDir')
+
+    def test_get_changectx_shared_repo(self):
+        hg_repo = HgRepository(self.repo_path)
+        with codecs.open(os.path.join(self.repo_path, 'foo.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo')
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        ctx = hg_repo.get_changectx(REVISION_DEFAULT)
+        self.assertEqual(ctx.files, ['foo.rst'])
+        self.assertFalse(ctx.needs_reload())
+        with codecs.open(os.path.join(self.repo_path, 'bar.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('bar')
+        commands.commit(self.ui, self.repo, message='bar', user='foo',
+                        addremove=True)
+        self.assertTrue(ctx.needs_reload())
+        new_ctx = hg_repo.get_changectx(REVISION_DEFAULT)
+        self.assertTrue(new_ctx._repo.get() is ctx._repo.get())
+        self.assertEqual(new_ctx.files, ['bar.rst', 'foo.rst'])
+        self.assertFalse(new_ctx.needs_reload())
+
+        # the working directory shares the handle too.
+        with codecs.open(os.path.join(self.repo_path, 'baz.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('baz')
+        ctx = hg_repo.get_changectx(REVISION_WORKING_DIR)
+        self.assertTrue(ctx._repo.get() is new_ctx._repo.get())
+        self.assertEqual(ctx.files, ['bar.rst', 'baz.rst', 'foo.rst'])
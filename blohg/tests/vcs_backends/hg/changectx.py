@@ -10,7 +10,9 @@
 """
 
 import codecs
+import mock
 import os
+import threading
 import unittest
 
 from mercurial import commands, hg, ui
@@ -60,6 +62,11 @@ class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
 
     ctx_class = ChangeCtxDefault
 
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst'])
+
     def test_files(self):
 
         new_file = 'a.rst'
@@ -86,6 +93,43 @@ class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
             self.assertTrue(f in ctx.files, 'file not found in stable '
                             'state: %s' % f)
 
+    def test_get_filectx_identity(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectx)
+        self.assertFalse(self.get_ctx().get_filectx('a1.rst') is filectx)
+
+    def test_threads(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        node = ctx._ctx.node()
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+        self.assertNotEqual(self.repo['tip'].node(), node)
+        rv = []
+
+        def run():
+            rv.append((ctx._repo.get(), ctx._ctx.node(), filectx.content))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+        # other threads use their own handles, bound to the same revision.
+        repo, thread_node, content = rv[0]
+        self.assertFalse(repo is ctx._repo.get())
+        self.assertEqual(thread_node, node)
+        self.assertEqual(content, 'dumb file a1.rst\n')
+
+    def test_prefetch(self):
+        ctx = self.get_ctx()
+        filectxs = ctx.prefetch(['a1.rst', 'a3.rst'])
+        self.assertEqual([i.path for i in filectxs], ['a1.rst', 'a3.rst'])
+        for filectx in filectxs:
+            self.assertTrue('data' in filectx.__dict__)
+
     def test_needs_reload(self):
         ctx = self.get_ctx()
         self.assertFalse(ctx.needs_reload())
@@ -110,6 +154,14 @@ class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
         # shouldn't need a reload again
         self.assertFalse(ctx.needs_reload())
 
+    def test_needs_reload_without_changes(self):
+        ctx = self.get_ctx()
+        with mock.patch.object(ctx._repo, 'branchtip') as branchtip:
+            with mock.patch.object(hg, 'repository') as repository:
+                self.assertFalse(ctx.needs_reload())
+                self.assertFalse(branchtip.called)
+                self.assertFalse(repository.called)
+
     def test_filectx_needs_reload(self):
 
         # add a file to repo
@@ -144,6 +196,37 @@ class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
         # shouldn't need a reload again
         self.assertFalse(ctx.filectx_needs_reload(filectx))
 
+    def test_filectx_needs_reload_other_branch(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a0.rst')
+
+        # a commit of another file, and of the file in another branch.
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+        commands.branch(self.ui, self.repo, 'other')
+        with codecs.open(os.path.join(self.repo_path, 'a0.rst'), 'a',
+                         encoding='utf-8') as fp:
+            fp.write('lol\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+        new_ctx = self.get_ctx()
+        self.assertFalse(new_ctx.filectx_needs_reload(filectx))
+        self.assertFalse(new_ctx.filectx_needs_reload(
+            new_ctx.get_filectx('a0.rst')))
+
+    def test_filectx_needs_reload_without_changes(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a0.rst')
+        with mock.patch.object(ctx._repo, 'file') as file_:
+            self.assertFalse(ctx.filectx_needs_reload(filectx))
+            self.assertFalse(file_.called)
+
+        # a file context from a previous change context.
+        new_ctx = self.get_ctx()
+        self.assertFalse(new_ctx.filectx_needs_reload(filectx))
+
     def test_published(self):
         ctx = self.get_ctx()
         date = int(time() + 1)
@@ -156,6 +239,11 @@ class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
 
     ctx_class = ChangeCtxWorkingDir
 
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst'])
+
     def test_files(self):
 
         new_file = 'a.rst'
@@ -183,60 +271,88 @@ class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
                             'state: %s' % f)
 
     def test_needs_reload(self):
+        # mercurial rewrites the dirstate on every status while the mtimes of
+        # the files are in the same second of the last commit.
+        sleep(1)
         ctx = self.get_ctx()
+
+        # the files weren't listed yet
         self.assertTrue(ctx.needs_reload())
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
 
-        # add a file to repo
-        with codecs.open(os.path.join(self.repo.path, 'a.rst'), 'w',
+        # change a file
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
                          encoding='utf-8') as fp:
-            fp.write('testing\n')
-
-        # should always be true
+            fp.write('lol\n')
         self.assertTrue(ctx.needs_reload())
 
+        # reload, taking over the state of the previous change context
+        new_ctx = self.get_ctx()
+        new_ctx.update_from(ctx)
+        new_ctx.files
+        self.assertEqual(new_ctx.changed_paths, ['a1.rst'])
+        self.assertFalse(new_ctx.needs_reload())
+
+        # commits may change anything
         commands.commit(self.ui, self.repo, message='foo', user='foo',
                         addremove=True)
+        self.assertTrue(new_ctx.needs_reload())
+        ctx = self.get_ctx()
+        ctx.update_from(new_ctx)
+        ctx.files
+        self.assertTrue(ctx.changed_paths is None)
+        self.assertFalse(ctx.needs_reload())
 
-        # should need a reload now, after the commit
-        self.assertTrue(ctx.needs_reload())
-
-        # reload
+    def test_needs_reload_ignored(self):
+        with codecs.open(os.path.join(self.repo_path, '.hgignore'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('syntax: glob\nbuild\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo',
+                        addremove=True)
+        sleep(1)
         ctx = self.get_ctx()
+        ctx.excluded_paths = [os.path.join(self.repo_path, '.cache'),
+                              os.path.join(self.repo_path, 'index.db')]
+        ctx.files
+        self.assertFalse(ctx.needs_reload())
 
-        # should still need a reload, right after the reload
+        # files ignored by mercurial, or written by blohg.
+        for path in ['build', '.cache']:
+            os.makedirs(os.path.join(self.repo_path, path))
+        for path in ['build/a.html', '.cache/a', 'index.db',
+                     'index.db-journal']:
+            with open(os.path.join(self.repo_path, path), 'w') as fp:
+                fp.write('lol\n')
+        self.assertFalse(ctx.needs_reload())
+
+        # unknown files are listed.
+        with open(os.path.join(self.repo_path, 'index.rst'), 'w') as fp:
+            fp.write('lol\n')
         self.assertTrue(ctx.needs_reload())
 
     def test_filectx_needs_reload(self):
-
-        # add a file to repo
-        with codecs.open(os.path.join(self.repo.path, 'a.rst'), 'w',
-                         encoding='utf-8') as fp:
-            fp.write('testing\n')
-
         ctx = self.get_ctx()
-        filectx = ctx.get_filectx('a.rst')
+        filectx = ctx.get_filectx('a1.rst')
 
+        # the files weren't listed yet
         self.assertTrue(ctx.filectx_needs_reload(filectx))
+        ctx.files
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
 
-        with codecs.open(os.path.join(self.repo.path, 'a.rst'), 'w',
+        with codecs.open(os.path.join(self.repo_path, 'a1.rst'), 'a',
                          encoding='utf-8') as fp:
-            fp.write('testing\n')
-
-        # should always be true
-        self.assertTrue(ctx.filectx_needs_reload(filectx))
-
-        commands.commit(self.ui, self.repo, message='foo', user='foo',
-                        addremove=True)
-
-        # should need a reload now, after the commit
+            fp.write('lol\n')
         self.assertTrue(ctx.filectx_needs_reload(filectx))
 
         # reload
-        ctx = self.get_ctx()
-        filectx = ctx.get_filectx('a.rst')
+        new_ctx = self.get_ctx()
+        new_ctx.files
+        new_filectx = new_ctx.get_filectx('a1.rst')
+        self.assertFalse(new_ctx.filectx_needs_reload(new_filectx))
 
-        # should still need a reload, right after the reload
-        self.assertTrue(ctx.filectx_needs_reload(filectx))
+        # file context from the previous change context
+        self.assertTrue(new_ctx.filectx_needs_reload(filectx))
 
     def test_published(self):
         ctx = self.get_ctx()
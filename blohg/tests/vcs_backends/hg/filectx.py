@@ -58,6 +58,23 @@ class FileCtxTestCase(unittest.TestCase):
         ctx = FileCtx(self.repo, self.changectx, self.file_name)
         self.assertEqual(ctx.author, 'foo <foo@bar.com>')
 
+    def test_blob_id(self):
+        ctx = FileCtx(self.repo, self.repo['tip'], self.file_name)
+        blob_id = ctx.blob_id
+        self.assertEqual(len(blob_id), 40)
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')
+        commands.commit(self.ui, self.repo, message='foo', user='foo')
+        ctx = FileCtx(self.repo, self.repo['tip'], self.file_name)
+        self.assertNotEqual(ctx.blob_id, blob_id)
+        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        wd_blob_id = ctx.blob_id
+        self.assertEqual(len(wd_blob_id), 40)
+        with codecs.open(self.file_path, 'a', encoding='utf-8') as fp:
+            fp.write('lol\n')
+        ctx = FileCtx(self.repo, self.changectx, self.file_name)
+        self.assertNotEqual(ctx.blob_id, wd_blob_id)
+
     def test_date_and_mdate(self):
         ctx = FileCtx(self.repo, self.changectx, self.file_name)
         time.sleep(1)
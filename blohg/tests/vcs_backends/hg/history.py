@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.hg.history
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with mercurial (file history).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+import unittest
+from mercurial import commands, hg, ui
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.hg.history import History
+
+
+class HistoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_path = mkdtemp()
+        self.ui = ui.ui()
+        self.ui.setconfig('ui', 'quiet', True)
+        commands.init(self.ui, self.repo_path)
+        self.repo = hg.repository(self.ui, self.repo_path)
+        self.commit(['a.rst', 'b.rst'], 'foo', '1000000000 0')
+        self.commit(['a.rst'], 'bar', '1000000010 0')
+        self.commit(['a.rst', 'c.rst'], 'baz', '1000000020 0')
+
+    def tearDown(self):
+        try:
+            rmtree(self.repo_path)
+        except:
+            pass
+
+    def commit(self, files, user, date):
+        for f in files:
+            with codecs.open(os.path.join(self.repo_path, f), 'a',
+                             encoding='utf-8') as fp:
+                fp.write('%s\n' % user)
+        commands.commit(self.ui, self.repo, message='foo', user=user,
+                        date=date, addremove=True)
+
+    def test_get(self):
+        history = History(self.repo, 2)
+        self.assertEqual(history.get('a.rst'),
+                         (3, 1000000000, 1000000020, 'foo'))
+        self.assertEqual(history.get('b.rst'), (1, 1000000000, None, 'foo'))
+        self.assertEqual(history.get('c.rst'), (1, 1000000020, None, 'baz'))
+
+        # the changesets are read once.
+        self.assertEqual(sorted(history._changesets), [0, 2])
+
+    def test_get_old_revision(self):
+        history = History(self.repo, 1)
+        self.assertEqual(history.get('a.rst'),
+                         (2, 1000000000, 1000000010, 'foo'))
+
+    def test_get_working_dir(self):
+        history = History(self.repo)
+        self.assertEqual(history.get('a.rst'),
+                         (3, 1000000000, 1000000020, 'foo'))
+        with codecs.open(os.path.join(self.repo_path, 'd.rst'), 'w',
+                         encoding='utf-8') as fp:
+            fp.write('foo\n')
+        self.assertEqual(history.get('d.rst'), (0, 0, None, ''))
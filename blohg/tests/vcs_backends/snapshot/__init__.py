@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.snapshot
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Package with tests for blohg integration with snapshot files.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.snapshot import SnapshotRepository
+from blohg.vcs_backends.snapshot.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs import REVISION_DEFAULT, REVISION_WORKING_DIR, load_repo
+from blohg.tests.vcs_backends.snapshot.utils import create_snapshot
+
+
+class SnapshotRepositoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.repo_path = os.path.join(self.tmp_dir, 'repo')
+        self.snapshot_path = os.path.join(self.tmp_dir, 'blog.snapshot')
+        create_snapshot(self.repo_path, self.snapshot_path,
+                        {'config.yaml': u'TITLE: foo\n'})
+
+    def tearDown(self):
+        try:
+            rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def test_create_repo(self):
+        self.assertRaises(RuntimeError, SnapshotRepository.create_repo,
+                          os.path.join(self.tmp_dir, 'lol'))
+        self.assertFalse(SnapshotRepository.creatable)
+
+    def test_supported(self):
+        self.assertTrue(SnapshotRepository.supported(self.snapshot_path))
+        self.assertFalse(SnapshotRepository.supported(self.repo_path))
+        self.assertFalse(SnapshotRepository.supported(
+            os.path.join(self.repo_path, 'config.yaml')))
+        self.assertFalse(SnapshotRepository.supported(
+            os.path.join(self.tmp_dir, 'lol')))
+
+    def test_load_repo(self):
+        repo = load_repo(self.snapshot_path)
+        self.assertTrue(isinstance(repo, SnapshotRepository))
+
+    def test_get_changectx_rev_default(self):
+        repo = SnapshotRepository(self.snapshot_path)
+        self.assertTrue(isinstance(repo.get_changectx(REVISION_DEFAULT),
+                                   ChangeCtxDefault),
+                        'changectx object is not an instance of '
+                        'ChangeCtxDefault')
+
+    def test_get_changectx_rev_working_dir(self):
+        repo = SnapshotRepository(self.snapshot_path)
+        self.assertTrue(isinstance(repo.get_changectx(REVISION_WORKING_DIR),
+                                   ChangeCtxWorkingDir),
+                        'changectx object is not an instance of '
+                        'ChangeCtxWorkingDir')
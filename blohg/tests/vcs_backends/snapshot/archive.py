@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.snapshot.archive
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for the snapshot files.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault as \
+     FsChangeCtxDefault
+from blohg.vcs_backends.snapshot.archive import Archive
+from blohg.tests.vcs_backends.snapshot.utils import create_snapshot
+
+
+class ArchiveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.repo_path = os.path.join(self.tmp_dir, 'repo')
+        self.snapshot_path = os.path.join(self.tmp_dir, 'blog.snapshot')
+        self.count = create_snapshot(
+            self.repo_path, self.snapshot_path,
+            {'config.yaml': u'TITLE: foo\n', 'empty.rst': u'',
+             'content/post/foo.rst': u'Fóo\n===\n'},
+            u'content/post/foo.rst:\n'
+            u'  date: 1234567890\n'
+            u'  mdate: 1234567899\n'
+            u'  author: fóo <foo@example.com>\n')
+
+    def tearDown(self):
+        try:
+            rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def test_write(self):
+        self.assertEqual(self.count, 3)
+
+        # no temporary files left behind
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)),
+                         ['blog.snapshot', 'repo'])
+
+    def test_read(self):
+        archive = Archive(self.snapshot_path)
+        changectx = FsChangeCtxDefault(self.repo_path)
+        self.assertEqual(archive.revision_id, changectx.revision_id)
+        self.assertEqual(sorted(archive.entries),
+                         ['config.yaml', 'content/post/foo.rst',
+                          'empty.rst'])
+        for path in archive.entries:
+            filectx = changectx.get_filectx(path)
+            offset, size, blob_id, date, mdate, author = \
+                archive.entries[path]
+            self.assertEqual(archive.read(offset, size), filectx.data)
+            self.assertEqual(str(archive.view(offset, size)), filectx.data)
+            self.assertEqual(blob_id, filectx.blob_id)
+            self.assertEqual(date, filectx.date)
+            self.assertEqual(mdate, filectx.mdate)
+            self.assertEqual(author, filectx.author)
+        self.assertEqual(archive.entries['content/post/foo.rst'][3:],
+                         (1234567890, 1234567899,
+                          u'fóo <foo@example.com>'))
+
+    def test_supported(self):
+        self.assertTrue(Archive.supported(self.snapshot_path))
+        self.assertFalse(Archive.supported(
+            os.path.join(self.repo_path, 'config.yaml')))
+        self.assertFalse(Archive.supported(os.path.join(self.tmp_dir,
+                                                        'lol')))
+
+    def test_invalid(self):
+        for data in ['', 'lol', 'BLOHGSNP']:
+            with open(self.snapshot_path, 'wb') as fp:
+                fp.write(data)
+            self.assertRaises(RuntimeError, Archive, self.snapshot_path)
+        self.assertRaises(RuntimeError, Archive,
+                          os.path.join(self.tmp_dir, 'lol'))
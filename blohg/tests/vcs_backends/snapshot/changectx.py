@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.snapshot.changectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with snapshot files (change
+    context).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import sleep, time
+
+from blohg.vcs_backends.snapshot.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.tests.vcs_backends.snapshot.utils import create_snapshot
+
+
+class ChangeCtxBaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.repo_path = os.path.join(self.tmp_dir, 'repo')
+        self.snapshot_path = os.path.join(self.tmp_dir, 'blog.snapshot')
+        self.repo_files = dict([('a%i.rst' % i, u'dumb file a%i.rst\n' % i) \
+                                for i in range(5)])
+        self.repo_files['content/post/foo.rst'] = u'foo\n'
+        create_snapshot(self.repo_path, self.snapshot_path, self.repo_files)
+
+    def tearDown(self):
+        try:
+            rmtree(self.tmp_dir)
+        except:
+            pass
+
+    @property
+    def ctx_class(self):
+        raise NotImplementedError
+
+    def get_ctx(self):
+        return self.ctx_class(self.snapshot_path)
+
+
+class ChangeCtxDefaultTestCase(ChangeCtxBaseTestCase):
+
+    ctx_class = ChangeCtxDefault
+
+    def test_files(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files))
+
+    def test_files_subtrees(self):
+        ctx = self.get_ctx()
+        ctx.subtrees = ['a1.rst', 'a3.rst', 'content']
+        self.assertEqual(ctx.files, ['a1.rst', 'a3.rst',
+                                     'content/post/foo.rst'])
+
+    def test_get_filectx(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.get_filectx('a1.rst').content,
+                         'dumb file a1.rst\n')
+        self.assertEqual(ctx.get_filectx('content/post/foo.rst').content,
+                         'foo\n')
+        self.assertRaises(RuntimeError, ctx.get_filectx, 'lol.rst')
+
+    def test_get_filectx_identity(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectx)
+        self.assertFalse(self.get_ctx().get_filectx('a1.rst') is filectx)
+
+    def test_prefetch(self):
+        ctx = self.get_ctx()
+        filectxs = ctx.prefetch(['a1.rst', 'content/post/foo.rst'])
+        self.assertEqual([i.content for i in filectxs],
+                         ['dumb file a1.rst\n', 'foo\n'])
+        self.assertTrue(ctx.get_filectx('a1.rst') is filectxs[0])
+
+    def test_needs_reload(self):
+        ctx = self.get_ctx()
+        filectx = ctx.get_filectx('a1.rst')
+        self.assertFalse(ctx.needs_reload())
+        self.assertFalse(ctx.filectx_needs_reload(filectx))
+
+        # a new snapshot replaces the old one
+        self.repo_files['a1.rst'] = u'lol\n'
+        create_snapshot(self.repo_path, self.snapshot_path, self.repo_files)
+        self.assertTrue(ctx.needs_reload())
+        self.assertTrue(ctx.filectx_needs_reload(filectx))
+
+        # the old snapshot is still mapped
+        self.assertEqual(filectx.content, 'dumb file a1.rst\n')
+
+        # reload
+        new_ctx = self.get_ctx()
+        new_filectx = new_ctx.get_filectx('a1.rst')
+        self.assertFalse(new_ctx.needs_reload())
+        self.assertFalse(new_ctx.filectx_needs_reload(new_filectx))
+        self.assertEqual(new_filectx.content, 'lol\n')
+
+        # file context from the previous change context
+        self.assertTrue(new_ctx.filectx_needs_reload(filectx))
+
+        # the snapshot was removed
+        os.unlink(self.snapshot_path)
+        self.assertTrue(new_ctx.needs_reload())
+
+    def test_published(self):
+        ctx = self.get_ctx()
+        date = int(time() + 1)
+        self.assertFalse(ctx.published(date, time()))
+        sleep(1)
+        self.assertTrue(ctx.published(date, time()))
+
+
+class ChangeCtxWorkingDirTestCase(ChangeCtxBaseTestCase):
+
+    ctx_class = ChangeCtxWorkingDir
+
+    def test_files(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.files, sorted(self.repo_files))
+
+    def test_published(self):
+        ctx = self.get_ctx()
+        date = int(time() + 1)
+        self.assertTrue(ctx.published(date, time()))
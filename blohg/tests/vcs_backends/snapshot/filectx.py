@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.snapshot.filectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with tests for blohg integration with snapshot files (file
+    context).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault as \
+     FsChangeCtxDefault
+from blohg.vcs_backends.snapshot.changectx import ChangeCtxDefault
+from blohg.tests.vcs_backends.snapshot.utils import create_snapshot
+
+
+class FileCtxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.repo_path = os.path.join(self.tmp_dir, 'repo')
+        self.snapshot_path = os.path.join(self.tmp_dir, 'blog.snapshot')
+        self.file_name = 'foo.rst'
+        create_snapshot(self.repo_path, self.snapshot_path,
+                        {self.file_name: u'test ç\n', 'bar.rst': u'bar\n'},
+                        u'foo.rst:\n'
+                        u'  date: 1234567890\n'
+                        u'  mdate: 1234567899\n'
+                        u'  author: fóo <foo@example.com>\n')
+
+    def tearDown(self):
+        try:
+            rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def get_ctx(self):
+        return ChangeCtxDefault(self.snapshot_path).get_filectx(self.file_name)
+
+    def test_path(self):
+        self.assertEqual(self.get_ctx().path, u'foo.rst')
+
+    def test_content(self):
+        self.assertEqual(self.get_ctx().data, 'test \xc3\xa7\n')
+        self.assertEqual(self.get_ctx().content, u'test ç\n')
+
+    def test_view(self):
+        ctx = self.get_ctx()
+        self.assertTrue(isinstance(ctx.view, buffer))
+        self.assertEqual(str(ctx.view), 'test \xc3\xa7\n')
+        self.assertEqual(ctx.content, u'test ç\n')
+        self.assertFalse('data' in ctx.__dict__)
+
+    def test_blob_id(self):
+        fs_ctx = FsChangeCtxDefault(self.repo_path)
+        self.assertEqual(self.get_ctx().blob_id,
+                         fs_ctx.get_filectx(self.file_name).blob_id)
+
+    def test_date_and_mdate(self):
+        ctx = self.get_ctx()
+        self.assertEqual(ctx.date, 1234567890)
+        self.assertEqual(ctx.mdate, 1234567899)
+
+    def test_author(self):
+        self.assertEqual(self.get_ctx().author, u'fóo <foo@example.com>')
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.tests.vcs_backends.snapshot.utils
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with the utilities for snapshot support testing.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import codecs
+import os
+
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault, DATES_FILE
+from blohg.vcs_backends.snapshot.archive import write_archive
+
+
+def create_snapshot(repo_path, snapshot_path, files, dates=None):
+    """Writes the given files (a dict mapping paths to unicode contents) to
+    a plain directory, and packs it into a snapshot file.
+    """
+    for path, content in files.iteritems():
+        full_path = os.path.join(repo_path, path)
+        if not os.path.isdir(os.path.dirname(full_path)):
+            os.makedirs(os.path.dirname(full_path))
+        with codecs.open(full_path, 'w', encoding='utf-8') as fp:
+            fp.write(content)
+    if dates is not None:
+        with codecs.open(os.path.join(repo_path, DATES_FILE), 'w',
+                         encoding='utf-8') as fp:
+            fp.write(dates)
+    return write_archive(ChangeCtxDefault(repo_path), snapshot_path)
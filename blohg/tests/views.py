@@ -11,6 +11,7 @@
 
 import os
 import unittest
+from datetime import datetime
 from hashlib import md5
 from mercurial import commands, hg, ui
 from shutil import rmtree
@@ -84,6 +85,18 @@ class ViewsTestCase(unittest.TestCase):
         rv = c.get('/tag/foo-bar/')
         self.assertEqual(rv.status_code, 404)
 
+    def test_archive(self):
+        c = self.app.test_client()
+        now = datetime.utcnow()
+        rv = c.get('/archive/%i/%i/' % (now.year, now.month))
+        self.assertTrue('<html' in rv.data)
+        for i in ['/post/example-post/', '/post/lorem-ipsum/']:
+            self.assertTrue(i in rv.data, '%r not in archive' % i)
+        rv = c.get('/archive/%i/%i/2/' % (now.year, now.month))
+        self.assertEqual(rv.status_code, 404)
+        rv = c.get('/archive/2000/1/')
+        self.assertEqual(rv.status_code, 404)
+
     def test_source(self):
         c = self.app.test_client()
         rv = c.get('/source/post/lorem-ipsum/')
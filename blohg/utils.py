@@ -10,6 +10,8 @@
 """
 
 from calendar import timegm
+from collections import OrderedDict
+from threading import Lock
 from time import strptime
 
 
@@ -31,3 +33,74 @@ def parse_date(date):
         timetuple = strptime(date, '%Y-%m-%d %H:%M:%S')
         return timegm(timetuple)
     raise TypeError('Invalid type (%s): %r' % (date.__class__.__name__, date))
+
+
+class LRUCache(object):
+    """Thread-safe mapping that keeps at most ``maxsize`` items, discarding
+    the least recently used ones.
+
+    If ``maxbytes`` is given, the least recently used items are discarded as
+    well while the total of ``sizeof`` of the items exceeds it. The size of
+    each item is measured when it is stored. Items that grow after being
+    stored (e.g. objects that load their data lazily) should be measured
+    again with :meth:`measure`.
+    """
+
+    def __init__(self, maxsize=128, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self._lock = Lock()
+
+    def _measure(self, key, value):
+        if self.maxbytes is not None:
+            size = self.sizeof(value)
+            self._size += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+
+    def _discard(self):
+        # the most recently used item is kept, even if too big.
+        while len(self._data) > self.maxsize or (self.maxbytes is not None \
+              and self._size > self.maxbytes and len(self._data) > 1):
+            key = self._data.popitem(last=False)[0]
+            self._size -= self._sizes.pop(key, 0)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            self._measure(key, value)
+            self._discard()
+
+    def measure(self, key, value):
+        """Measures again the size of an item, if ``value`` is still the item
+        stored with ``key``, discarding other items if needed.
+        """
+        with self._lock:
+            if self._data.get(key) is value:
+                self._measure(key, value)
+                self._discard()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
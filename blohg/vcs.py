@@ -10,7 +10,13 @@
 """
 
 import os
+import sys
+import threading
 from abc import ABCMeta, abstractmethod, abstractproperty
+from bisect import bisect_left
+from flask.helpers import locked_cached_property
+
+from blohg.utils import LRUCache
 
 REVISION_WORKING_DIR, REVISION_DEFAULT = 1, 2
 
@@ -19,6 +25,10 @@ class Repository:
 
     __metaclass__ = ABCMeta
 
+    # backends that can't create new repositories are left out of the
+    # ``initrepo`` command.
+    creatable = True
+
     def __init__(self, path):
         self.path = path
 
@@ -51,6 +61,46 @@ class ChangeCtx:
 
     __metaclass__ = ABCMeta
 
+    # list of directories that should be listed by the ``files`` property,
+    # or ``None`` to list everything. Set by blohg before listing files.
+    subtrees = None
+
+    # list of the paths that were added, removed or modified since the change
+    # context that this one replaced, or ``None`` if unknown. Set by the
+    # backends that can tell it, after blohg calls ``update_from``.
+    changed_paths = None
+
+    # absolute paths of the files and directories written by blohg itself
+    # (e.g. the caches), that aren't seen as changes of the working
+    # directory. Set by blohg.
+    excluded_paths = ()
+
+    # directory where the backends may persist data that is expensive to
+    # build (e.g. indexes of the history), or ``None`` to persist nothing.
+    # Set by blohg from the ``RENDER_CACHE_DIR`` config.
+    cache_dir = None
+
+    # maximum number of file contexts kept by ``_filectxs``, and maximum size
+    # of the strings (data, content) cached by them, in bytes.
+    filectx_cache_size = 1000
+    filectx_cache_bytes = 32 * 1024 * 1024
+
+    @staticmethod
+    def _filectx_sizeof(filectx):
+        # the same string may be cached by many properties.
+        strings = dict([(id(i), i) for i in filectx.__dict__.itervalues() \
+                        if isinstance(i, basestring)])
+        return sum([sys.getsizeof(i) for i in strings.itervalues()])
+
+    @locked_cached_property
+    def _filectxs(self):
+        """Identity map of the file contexts of this change context, so the
+        properties cached by the file contexts survive between requests, until
+        the next reload.
+        """
+        return LRUCache(self.filectx_cache_size, self.filectx_cache_bytes,
+                        self._filectx_sizeof)
+
     @abstractmethod
     def __init__(self):
         pass
@@ -75,8 +125,42 @@ class ChangeCtx:
     def published(self, date, now):
         pass
 
+    def get_filectx(self, path, keep=True):
+        """Returns the file context of the given path, reusing the one from
+        ``_filectxs``, if any. New file contexts are only stored there if
+        ``keep`` is true, otherwise they (and their data) are freed as soon
+        as the caller drops them.
+        """
+        filectx = self._filectxs.get(path)
+        if filectx is None:
+            filectx = self._new_filectx(path)
+            if keep:
+                # measured again when their data is loaded.
+                filectx._cached_by = self._filectxs, path
+                self._filectxs.set(path, filectx)
+        return filectx
+
     @abstractmethod
-    def get_filectx(self, path):
+    def _new_filectx(self, path):
+        pass
+    def prefetch(self, paths, keep=True):
+        """Returns the file contexts of the given paths, with their data
+        already read. Backends that can read many files at once should
+        override this method.
+        The ``keep`` argument is passed to :meth:`get_filectx`.
+        """
+        rv = []
+        for path in paths:
+            filectx = self.get_filectx(path, keep)
+            filectx.data
+            rv.append(filectx)
+        return rv
+
+    def update_from(self, changectx):
+        """Called by blohg with the change context that this one replaces, on
+        reload. Backends that keep some state between reloads should take it
+        over here.
+        """
         pass
 
     @abstractmethod
@@ -84,6 +168,118 @@ class ChangeCtx:
         pass
 
 
+class WorkingDirSnapshot(object):
+    """Mixin for the change contexts of working directories, that detects
+    changes comparing snapshots of the modification times and sizes of the
+    listed files, and of the metadata files of the VCS.
+
+    The snapshot is taken right before listing the files, and then compared
+    with a new one by ``needs_reload``. The next change context takes over
+    the new snapshot, with the list of changed paths.
+
+    Classes using it should define ``_snapshot_root`` and
+    ``_snapshot_extra_files``, and should access ``_snapshot`` before
+    listing the files. They may override ``_snapshot_paths`` to stat just
+    the files tracked by the VCS, or ``_snapshot_ignored`` to skip the files
+    ignored by it, when the directory is walked.
+    """
+
+    _pending = None  # (snapshot, changed paths) found by needs_reload
+    _previous = None  # (snapshot, changed paths) from the previous changectx
+
+    def _snapshot_paths(self):
+        """Returns the list of paths to be stat'ed, or ``None`` to walk the
+        whole directory.
+        """
+        return None
+
+    def _snapshot_ignored(self, path):
+        return False
+
+    def _snapshot_ignore(self):
+        excluded = is_excluded(self._snapshot_root, self.excluded_paths)
+        return lambda path: excluded(path) or self._snapshot_ignored(path)
+
+    def _take_snapshot(self):
+        extra = stat_files(self._snapshot_root, [],
+                           self._snapshot_extra_files)
+        files = stat_files(self._snapshot_root, self.subtrees,
+                           ignore=self._snapshot_ignore(),
+                           paths=self._snapshot_paths())
+        files.update(extra)
+        return self.subtrees, files
+
+    @locked_cached_property
+    def _snapshot(self):
+        previous, self._previous = self._previous, None
+        if previous is None or previous[0][0] != self.subtrees:
+            return self._take_snapshot()
+        (subtrees, files), changed = previous
+
+        # the VCS metadata may have changed after the previous snapshot (e.g.
+        # a commit, or the listing of the files updating the dirstate).
+        extra = stat_files(self._snapshot_root, [],
+                           self._snapshot_extra_files)
+        for path, value in extra.iteritems():
+            if files[path] != value:
+                files = dict(files, **extra)
+                changed = None
+                break
+        self.changed_paths = changed
+        return subtrees, files
+
+    def update_from(self, changectx):
+        self._previous = getattr(changectx, '_pending', None)
+
+    def needs_reload(self):
+        if '_snapshot' not in self.__dict__:  # files not listed yet
+            return True
+        snapshot = self._take_snapshot()
+        if snapshot == self._snapshot:
+            return False
+        old, new = self._snapshot[1], snapshot[1]
+        changed = sorted([path for path in set(old).union(new) \
+                          if old.get(path) != new.get(path)])
+
+        # changes in the VCS metadata (e.g. commits) may change anything.
+        for path in self._snapshot_extra_files:
+            if path in changed:
+                changed = None
+                break
+        self._pending = snapshot, changed
+        return True
+
+    def filectx_needs_reload(self, filectx):
+        if self.get_filectx(filectx._path) is not filectx:
+            return True
+        snapshot = self.__dict__.get('_snapshot')
+        if snapshot is None:
+            return True
+        try:
+            st = os.stat(os.path.join(self._snapshot_root, filectx._path))
+        except OSError:
+            return True
+        return snapshot[1].get(filectx._path) != (st.st_mtime, st.st_size)
+
+
+class filectx_data_property(locked_cached_property):
+    """A :class:`locked_cached_property` for the properties of the file
+    contexts that load the data of the files. The file contexts kept by the
+    cache of a change context are measured again after the data is loaded.
+    """
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+        loaded = self.__name__ in obj.__dict__
+        value = locked_cached_property.__get__(self, obj, type)
+        cached_by = obj.__dict__.get('_cached_by')
+        if not loaded and cached_by is not None:
+            cache, key = cached_by
+            cache.measure(key, obj)
+        return value
+
+
 class FileCtx:
 
     __metaclass__ = ABCMeta
@@ -92,6 +288,10 @@ class FileCtx:
     def __init__(self, repo, changectx, path, **kwargs):
         pass
 
+    @abstractproperty
+    def blob_id(self):
+        pass
+
     @abstractproperty
     def data(self):
         pass
@@ -113,6 +313,162 @@ class FileCtx:
         pass
 
 
+class FileIndex(list):
+    """Sorted list of the files of a change context, as returned by the
+    ``files`` property, with a hashed set for membership tests and bisect
+    ranges for prefix lookups. It must not be modified after creation.
+    """
+
+    def __init__(self, files=()):
+        list.__init__(self, sorted(files))
+        self._set = frozenset(self)
+
+    def __contains__(self, path):
+        return path in self._set
+
+    def prefixed(self, prefix):
+        """Returns the sorted list of files starting with the given prefix
+        (e.g. a directory name followed by a slash).
+        """
+        start = end = bisect_left(self, prefix)
+        while end < len(self) and self[end].startswith(prefix):
+            end += 1
+        return self[start:end]
+
+
+class ThreadLocalHandle(object):
+    """Proxy for the handles of libraries that can't be shared by threads
+    (e.g. the repository objects of the VCS libraries). Each thread (and each
+    process, after a fork) gets its own handle, created by the given factory
+    the first time it is needed, and the attribute and item lookups are
+    forwarded to the handle of the current thread.
+
+    Objects returned by the handles (e.g. revisions or files) are bound to
+    the handle of the thread that looked them up, and should be looked up
+    again by the other threads.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+
+    def get(self):
+        """Returns the handle of the current thread."""
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) != pid:
+            local.handle = self._factory()
+            local.pid = pid
+        return local.handle
+
+    def __getattr__(self, name):
+        if name in ('_factory', '_local'):  # not initialized yet
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __getitem__(self, key):
+        return self.get()[key]
+
+
+def in_subtrees(path, subtrees, is_dir=False):
+    """Checks if a path is inside of one of the given directories. For
+    directories, also checks if one of the given directories is inside of it.
+
+    :param path: the path, relative to the repository root.
+    :param subtrees: a list of directories, or ``None`` for the whole
+                     repository.
+    :param is_dir: a boolean that tells if the path is a directory.
+    :return: a boolean.
+    """
+    if subtrees is None:
+        return True
+    for subtree in subtrees:
+        if path == subtree or path.startswith(subtree + '/'):
+            return True
+        if is_dir and subtree.startswith(path + '/'):
+            return True
+    return False
+
+
+def is_excluded(root, excluded_paths):
+    """Returns a function that tells if a path, relative to the given root,
+    is one of the given absolute paths or is inside of one of them. The
+    files written by blohg itself (e.g. the caches, and the journals of the
+    SQLite index, like ``index.db-journal``) are excluded this way from the
+    listings and snapshots of directories, or each write would be seen as a
+    change.
+    """
+    root = os.path.abspath(root)
+    excluded = [os.path.relpath(os.path.abspath(i), root).replace(os.sep, '/')
+                for i in excluded_paths]
+
+    def func(path):
+        for i in excluded:
+            if path.startswith(i) and (len(path) == len(i) or \
+                                       path[len(i)] in '/-'):
+                return True
+        return False
+    return func
+
+
+def stat_files(root, subtrees=None, extra_files=(), ignore=None,
+               paths=None):
+    """Returns a dict with the modification time and the size of the files
+    inside of a directory, filtered by the given subtrees, skipping the VCS
+    directories.
+
+    :param root: the directory path.
+    :param subtrees: a list of directories, or ``None`` for the whole
+                     directory.
+    :param extra_files: a list of paths (e.g. metadata files of the VCS)
+                        that are always included, with ``None`` if they
+                        don't exist. They are stat'ed before anything else.
+    :param ignore: a function that returns ``True`` for the paths (of files
+                   and directories) that must be skipped, if any.
+    :param paths: a list of the paths to be stat'ed (e.g. the files tracked
+                  by the VCS), instead of walking the directory.
+    :return: a dict mapping the paths, relative to the root, to tuples
+             ``(mtime, size)``.
+    """
+    rv = {}
+    for path in extra_files:
+        try:
+            st = os.stat(os.path.join(root, path))
+        except OSError:
+            rv[path] = None
+        else:
+            rv[path] = st.st_mtime, st.st_size
+    if ignore is None:
+        ignore = lambda path: False
+    if paths is not None:
+        for path in paths:
+            if not in_subtrees(path, subtrees) or ignore(path):
+                continue
+            try:
+                st = os.stat(os.path.join(root, path))
+            except OSError:
+                continue
+            rv[path] = st.st_mtime, st.st_size
+        return rv
+    for dirpath, dirnames, filenames in os.walk(root):
+        prefix = os.path.relpath(dirpath, root).replace(os.sep, '/') + '/'
+        if prefix == './':
+            prefix = ''
+        dirnames[:] = [i for i in dirnames if i not in ('.hg', '.git') and \
+                       in_subtrees(prefix + i, subtrees, True) and \
+                       not ignore(prefix + i)]
+        for filename in filenames:
+            path = prefix + filename
+            if not in_subtrees(path, subtrees) or ignore(path):
+                continue
+            try:
+                st = os.stat(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+            rv[path] = st.st_mtime, st.st_size
+    return rv
+
+
 def _get_backends():
     cwd = os.path.dirname(os.path.abspath(__file__))
     backends_dir = os.path.join(cwd, 'vcs_backends')
@@ -129,12 +485,28 @@ def _get_backends():
     return rv
 
 
-backends = _get_backends()
-del _get_backends
+_backends = None
+
+
+def get_backends():
+    """Returns the list of the available backends, sorted by their order.
+
+    The backends are only imported when this function is called for the
+    first time, because some VCS libraries are slow to import.
+    """
+    global _backends
+    if _backends is None:
+        _backends = _get_backends()
+    return _backends
 
 
 def load_repo(repo_path):
-    for backend in backends:
+    # snapshots are loaded without importing the other backends.
+    if os.path.isfile(repo_path):
+        from blohg.vcs_backends.snapshot import SnapshotRepository
+        if SnapshotRepository.supported(repo_path):
+            return SnapshotRepository(repo_path)
+    for backend in get_backends():
         if backend.supported(repo_path):
             return backend(repo_path)
     raise RuntimeError('No VCS backend available for %s. If you are trying to '
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.fs
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Package with all the classes and functions needed to serve blohg from a
+    plain directory, without any VCS (e.g. a tree deployed with rsync).
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import shutil
+
+from pkg_resources import resource_filename, resource_listdir
+from blohg.vcs_backends.fs.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs import Repository, REVISION_DEFAULT, REVISION_WORKING_DIR
+
+
+class FsRepository(Repository):
+    """Main entrypoint for the plain directory layer. This class offers
+    abstract access to everything needed by blohg from the file system.
+
+    It is the last backend tried by blohg, and only for directories without
+    VCS metadata.
+    """
+
+    identifier = 'fs'
+    name = 'Plain directory'
+    order = 100
+
+    def get_changectx(self, revision=REVISION_DEFAULT):
+        """Method that returns a change context for a given Revision state.
+
+        blohg supports 2 revision states, and both list all the files of the
+        directory:
+
+        - default: detects added, removed and renamed files, with a stat of
+                   the directories, and hides the posts with dates in the
+                   future.
+        - working_dir: detects any change in the files, with a stat of each
+                       of them, and shows everything.
+        """
+        if revision == REVISION_DEFAULT:
+            return ChangeCtxDefault(self.path)
+        elif revision == REVISION_WORKING_DIR:
+            return ChangeCtxWorkingDir(self.path)
+        raise RuntimeError('Invalid repository revision: %r' % revision)
+
+    @staticmethod
+    def create_repo(repo_path):
+        """Function to initialize a blohg repo, with the default template files
+        inside.
+        """
+
+        template_path = resource_filename('blohg', 'repo_template')
+        template_rootfiles = resource_listdir('blohg', 'repo_template')
+
+        initialized = False
+        for f in template_rootfiles:
+            if os.path.exists(os.path.join(repo_path, f)):
+                initialized = True
+
+        if initialized:
+            raise RuntimeError('repository already initialized: %s' % \
+                               repo_path)
+
+        if not os.path.exists(repo_path):
+            os.makedirs(repo_path)
+
+        for f in template_rootfiles:
+            full_path = os.path.join(template_path, f)
+            if os.path.isdir(full_path):
+                shutil.copytree(full_path, os.path.join(repo_path, f))
+            elif os.path.isfile(full_path):
+                shutil.copy2(full_path, os.path.join(repo_path, f))
+            else:
+                raise RuntimeError('unrecognized file: %s' % full_path)
+
+    @staticmethod
+    def supported(repo_path):
+        if not os.path.isdir(repo_path):
+            return False
+        files = os.listdir(repo_path)
+
+        # repositories are handled by the VCS backends, or fail loudly if
+        # their backend isn't available.
+        if '.hg' in files or '.git' in files:
+            return False
+        return 'config.yaml' in files
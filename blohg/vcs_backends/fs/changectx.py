@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.fs.changectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with classes to represent the change context of a plain directory.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import posixpath
+import stat
+import time
+import yaml
+from calendar import timegm
+from datetime import datetime
+from flask.helpers import locked_cached_property
+from hashlib import sha1
+from zlib import adler32
+
+from blohg.utils import parse_date
+from blohg.vcs_backends.fs.filectx import FileCtx
+from blohg.vcs import ChangeCtx, FileIndex, WorkingDirSnapshot, \
+     in_subtrees, is_excluded
+
+# sidecar file with the dates and authors of the files, relative to the root
+# of the directory.
+DATES_FILE = '.blohg-dates.yaml'
+
+
+class ChangeCtxDefault(ChangeCtx):
+    """Class with the specific implementation details for the change context
+    of the default revision state of the directory.
+
+    Changes are detected comparing the modification times of the listed
+    directories, that change when files are added, removed or replaced (e.g.
+    by rsync, that writes temporary files and renames them), and of the
+    config and sidecar files. The changed directories are listed again, so
+    writes of files that aren't listed (e.g. the caches of blohg) are
+    ignored. Files edited in place are only seen by ``filectx_needs_reload``.
+    """
+
+    def __init__(self, repo_path):
+        self._repo_path = repo_path
+
+    @locked_cached_property
+    def _extra_files(self):
+        return ['config.yaml', DATES_FILE]
+
+    def _stat(self, path):
+        try:
+            st = os.stat(os.path.join(self._repo_path, path))
+        except OSError:
+            return None
+        return st.st_mtime, st.st_size
+
+    def _stat_paths(self, paths):
+        return dict([(i, self._stat(i)) for i in paths])
+
+    def _list_dir(self, prefix, excluded):
+        """Returns the subdirectories of a directory, and a dict mapping its
+        files to their modification times, inodes and sizes.
+        """
+        dirs, files = [], {}
+        try:
+            names = os.listdir(os.path.join(self._repo_path, prefix))
+        except OSError:
+            return dirs, files
+        for name in names:
+            path = posixpath.join(prefix, name)
+            if excluded(path):
+                continue
+            try:
+                st = os.stat(os.path.join(self._repo_path, path))
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                if name not in ('.hg', '.git') and \
+                   in_subtrees(path, self.subtrees, True):
+                    dirs.append(path)
+            elif name != DATES_FILE and in_subtrees(path, self.subtrees):
+                files[path] = st.st_mtime, st.st_ino, st.st_size
+        return sorted(dirs), files
+
+    @locked_cached_property
+    def _excluded(self):
+        return is_excluded(self._repo_path, self.excluded_paths)
+
+    @locked_cached_property
+    def _listing(self):
+        # each directory is stat'ed before being listed, so a change made in
+        # between is seen by the next check. the entries of each directory
+        # are kept, to tell the changes of the listed files from the writes
+        # of files that aren't listed (e.g. the caches of blohg).
+        stats = self._stat_paths(self._extra_files)
+        dirs = {}
+        pending = ['']
+        while pending:
+            prefix = pending.pop()
+            dir_stat = self._stat(prefix)
+            subdirs, files = self._list_dir(prefix, self._excluded)
+            dirs[prefix] = dir_stat, subdirs, files
+            pending.extend(subdirs)
+        files = []
+        for entry in dirs.itervalues():
+            files.extend(entry[2])
+        return stats, dirs, FileIndex(files)
+
+    @locked_cached_property
+    def files(self):
+        return self._listing[2]
+
+    @locked_cached_property
+    def revision_id(self):
+        # a hash of the state of the listed files, that identifies the listing
+        # (e.g. for the metadata index).
+        stats, dirs = self._listing[:2]
+        files = {}
+        for entry in dirs.itervalues():
+            files.update(entry[2])
+        return sha1(repr((sorted(stats.items()),
+                          sorted(files.items())))).digest()
+
+    @locked_cached_property
+    def _dates(self):
+        """Dict mapping the paths of the files to dicts with their ``date``,
+        ``mdate`` and ``author``, read from the sidecar file, if any.
+        """
+        real_file = os.path.join(self._repo_path, DATES_FILE)
+        if not os.path.isfile(real_file):
+            return {}
+        with open(real_file, 'r') as fp:
+            entries = yaml.safe_load(fp) or {}
+        if not isinstance(entries, dict):
+            raise RuntimeError('Invalid dates file: %s' % real_file)
+        rv = {}
+        for path, entry in entries.iteritems():
+            if not isinstance(entry, dict):
+                entry = {'date': entry}
+            if isinstance(path, unicode):
+                path = path.encode('utf-8')
+            rv[path] = dict(entry)
+            for key in ['date', 'mdate']:
+                value = rv[path].get(key)
+                if isinstance(value, datetime):  # parsed by yaml, as UTC
+                    rv[path][key] = timegm(value.utctimetuple())
+                elif value is not None:
+                    rv[path][key] = parse_date(value)
+        return rv
+
+    def needs_reload(self):
+        if '_listing' not in self.__dict__:  # files not listed yet
+            return True
+        stats, dirs = self._listing[:2]
+        if self._stat_paths(stats) != stats:
+            return True
+        for prefix, (dir_stat, subdirs, files) in dirs.items():
+            new_stat = self._stat(prefix)
+            if new_stat == dir_stat:
+                continue
+
+            # files were added, removed or replaced in the directory, maybe
+            # just files that aren't listed.
+            if self._list_dir(prefix, self._excluded) != (subdirs, files):
+                return True
+            dirs[prefix] = new_stat, subdirs, files
+        return False
+
+    def filectx_needs_reload(self, filectx):
+        if filectx._changectx is not self:
+            return True
+        st = self._stat(filectx._path)
+        return st != (filectx._stat.st_mtime, filectx._stat.st_size)
+
+    def published(self, date, now):
+        return date <= now
+
+    def etag(self, filectx):
+        return 'blohg-%i-%i-%s' % (filectx.mdate or filectx.date,
+                                   len(filectx.data), adler32(filectx.path)
+                                   & 0xffffffff)
+
+    def _new_filectx(self, path):
+        return FileCtx(self._repo_path, self, path)
+
+
+class ChangeCtxWorkingDir(WorkingDirSnapshot, ChangeCtxDefault):
+    """Class with the specific implementation details for the change context
+    of the working dir of the directory. It inherits the common implementation
+    from the class :class:`ChangeCtxDefault`, but detects changes comparing
+    the modification times and sizes of all the listed files.
+    """
+
+    revision_id = None
+
+    @locked_cached_property
+    def _snapshot_root(self):
+        return self._repo_path
+
+    @locked_cached_property
+    def _snapshot_extra_files(self):
+        return self._extra_files
+
+    @locked_cached_property
+    def files(self):
+        self._snapshot  # taken before listing the files
+        return self._listing[2]
+
+    def published(self, date, now):
+        return True
+
+    def etag(self, filectx):
+        return 'blohg-%i-%i-%s' % (time.time(), len(filectx.data),
+                                   adler32(filectx.path) & 0xffffffff)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.fs.filectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with classes to represent the file context of a plain directory.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import posixpath
+import stat
+from flask.helpers import locked_cached_property
+from hashlib import sha1
+
+from blohg.vcs import FileCtx as _FileCtx, filectx_data_property
+
+
+class FileCtx(_FileCtx):
+    """Base class that represents a file context."""
+
+    def __init__(self, repo_path, changectx, path):
+        self._repo_path = repo_path
+        self._changectx = changectx
+        self._path = path
+
+        # only paths inside of the directory are valid, like with the VCS
+        # backends.
+        if posixpath.isabs(path) or posixpath.normpath(path) != path or \
+           path.split('/')[0] in ('..', '.hg', '.git'):
+            raise RuntimeError('Invalid file path: %s' % path)
+        try:
+            self._stat = os.stat(os.path.join(self._repo_path, self._path))
+        except OSError, err:
+            raise RuntimeError('File not found: %s (%s)' % (path, err))
+        if not stat.S_ISREG(self._stat.st_mode):
+            raise RuntimeError('Not a regular file: %s' % path)
+
+    @locked_cached_property
+    def _entry(self):
+        return self._changectx._dates.get(self._path, {})
+
+    @locked_cached_property
+    def path(self):
+        """UTF-8 encoded file path, relative to the repository root."""
+        return self._path.decode('utf-8')
+
+    @locked_cached_property
+    def blob_id(self):
+        """Identifier of the content of the file (the SHA-1 hash of the path,
+        the modification time and the size of the file, that are kept by
+        rsync for unchanged files).
+        """
+        return sha1('%s\0%r\0%i' % (self._path, self._stat.st_mtime,
+                                    self._stat.st_size)).hexdigest()
+
+    @filectx_data_property
+    def data(self):
+        """Raw data of the file."""
+        with open(os.path.join(self._repo_path, self._path), 'rb') as fp:
+            return fp.read()
+
+    @filectx_data_property
+    def content(self):
+        """UTF-8 encoded content of the file."""
+        return self.data.decode('utf-8')
+
+    @locked_cached_property
+    def date(self):
+        """Unix timestamp of the creation date of the file, from the sidecar
+        file, or the modification time of the file.
+        """
+        date = self._entry.get('date')
+        if date is None:
+            return int(self._stat.st_mtime)
+        return date
+
+    @locked_cached_property
+    def mdate(self):
+        """Unix timestamp of the last modification date of the file, from the
+        sidecar file, if any.
+        """
+        return self._entry.get('mdate')
+
+    @locked_cached_property
+    def author(self):
+        """The creator of the file, from the sidecar file, if any."""
+        author = self._entry.get('author')
+        if author is None:
+            return u''
+        if isinstance(author, str):
+            return author.decode('utf-8')
+        return author
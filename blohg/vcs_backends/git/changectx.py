@@ -9,13 +9,17 @@
     :license: GPL-2, see LICENSE for more details.
 """
 
+import os
+import stat
 import time
 from flask.helpers import locked_cached_property
-from pygit2 import Repository, GIT_OBJ_BLOB, GIT_OBJ_TREE
+from pygit2 import Repository
 from zlib import adler32
 
 from blohg.vcs_backends.git.filectx import FileCtx
-from blohg.vcs import ChangeCtx
+from blohg.vcs_backends.git.history import History
+from blohg.vcs import ChangeCtx, FileIndex, ThreadLocalHandle, \
+     WorkingDirSnapshot, in_subtrees
 
 
 class ChangeCtxDefault(ChangeCtx):
@@ -26,24 +30,53 @@ class ChangeCtxDefault(ChangeCtx):
 
     def __init__(self, repo_path):
         self._repo_path = repo_path
-        self._repo = Repository(self._repo_path)
-        self._ctx = self._repo[self.revision_id]
+
+        # pygit2 objects can't be shared by threads. each thread uses its own
+        # repository and commit objects, bound to the same revision.
+        self._repo = ThreadLocalHandle(lambda: Repository(self._repo_path))
+
+        # the files are stat'ed before resolving the revision, so a change in
+        # between is seen by the next check.
+        self._refs_stat = self._stat_refs()
+        self._ctx = ThreadLocalHandle(lambda: self._repo[self.revision_id])
+        self._ctx.get()  # fails early for invalid revisions
+
+        # shared by all the file contexts, only built if some file needs it.
+        self._history = History(self._repo)
+
+    @property
+    def cache_dir(self):
+        return self._history.cache_dir
+
+    @cache_dir.setter
+    def cache_dir(self, value):
+        # the history index is persisted there, if set.
+        self._history.cache_dir = value
 
     @locked_cached_property
-    def files(self):
-        def r(_files, repo, tree, prefix=None):
+    def _entries(self):
+        # flattened map of the listed files to their blob ids. the file modes
+        # of the tree entries are enough to tell trees from files, without
+        # loading the blobs.
+        def r(_entries, repo, tree, prefix=None):
             for entry in tree:
-                obj = repo[entry.oid]
                 filename = prefix and (prefix + '/' + entry.name) or entry.name
-                if obj.type == GIT_OBJ_TREE:
-                    r(_files, repo, obj, filename)
-                elif obj.type == GIT_OBJ_BLOB:
-                    _files.append(filename)
+                if stat.S_ISDIR(entry.filemode):
+                    if in_subtrees(filename, self.subtrees, True):
+                        r(_entries, repo, repo[entry.oid], filename)
+                elif stat.S_ISREG(entry.filemode) or \
+                     stat.S_ISLNK(entry.filemode):
+                    if in_subtrees(filename, self.subtrees):
+                        _entries[filename] = entry.oid
                 else:
                     raise RuntimeError('Invalid object: %s' % filename)
-        f = []
-        r(f, self._repo, self._ctx.tree)
-        return sorted(f)
+        e = {}
+        r(e, self._repo, self._ctx.tree)
+        return e
+
+    @locked_cached_property
+    def files(self):
+        return FileIndex(self._entries)
 
     @locked_cached_property
     def revision_id(self):
@@ -56,14 +89,40 @@ class ChangeCtxDefault(ChangeCtx):
             raise RuntimeError('Branch "master" not found!')
         return ref.target
 
+    def _stat_refs(self):
+        """Returns the modification time, inode and size of the files that
+        may store the "master" reference (the loose ref and the packed refs).
+        Any update of the reference replaces one of them.
+        """
+        rv = []
+        for name in ['refs/heads/master', 'packed-refs']:
+            try:
+                st = os.stat(os.path.join(self._repo.path, name))
+            except OSError:
+                rv.append(None)
+            else:
+                rv.append((st.st_mtime, st.st_ino, st.st_size))
+        return rv
+
     def needs_reload(self):
+        # the reference is only looked up if the files changed.
+        refs_stat = self._stat_refs()
+        if refs_stat == self._refs_stat:
+            return False
         try:
             ref = self._repo.lookup_reference('refs/heads/master')
         except Exception:
             return True
-        return self.revision_id != ref.target
+        if self.revision_id != ref.target:
+            return True
+
+        # the files changed, but not the revision (e.g. the refs were packed).
+        self._refs_stat = refs_stat
+        return False
 
     def filectx_needs_reload(self, filectx):
+        if self._stat_refs() == self._refs_stat:
+            return filectx._changectx.oid != self.revision_id
         try:
             ref = self._repo.lookup_reference('refs/heads/master')
         except Exception:
@@ -78,11 +137,16 @@ class ChangeCtxDefault(ChangeCtx):
                                    len(filectx.data), adler32(filectx.path)
                                    & 0xffffffff)
 
-    def get_filectx(self, path):
-        return FileCtx(self._repo, self._ctx, path)
+    def _new_filectx(self, path):
+        # the listing isn't forced here, because blohg reads the config file
+        # before setting the subtrees. files that weren't listed are looked up
+        # in the tree.
+        entries = self.__dict__.get('_entries', {})
+        return FileCtx(self._repo, self._ctx, path, self._history,
+                       oid=entries.get(path))
 
 
-class ChangeCtxWorkingDir(ChangeCtxDefault):
+class ChangeCtxWorkingDir(WorkingDirSnapshot, ChangeCtxDefault):
     """Class with the specific implementation details for the change context
     of the working dir of the repository. It inherits the common implementation
     from the class :class:`ChangeCtxBase`.
@@ -100,18 +164,26 @@ class ChangeCtxWorkingDir(ChangeCtxDefault):
                                'first commit.')
 
     @locked_cached_property
-    def files(self):
-        return [entry.path for entry in self._repo.index]
+    def _snapshot_root(self):
+        return self._repo.workdir
 
-    def needs_reload(self):
-        """This change context is mainly used by the command-line tool, and
-        didn't provides any reliable way to evaluate its "freshness". Always
-        reload.
-        """
-        return True
+    @locked_cached_property
+    def _snapshot_extra_files(self):
+        # the listing comes from the index, and the dates from HEAD. the
+        # config file is always read, even if outside of the subtrees.
+        return ['config.yaml'] + \
+               [os.path.join(self._repo.path, i) for i in \
+                ['index', 'HEAD', 'refs/heads/master', 'packed-refs']]
+
+    def _snapshot_paths(self):
+        # only the files from the index are listed.
+        return [entry.path for entry in self._repo.index]
 
-    def filectx_needs_reload(self, filectx):
-        return True
+    @locked_cached_property
+    def files(self):
+        self._snapshot  # taken before listing the files
+        return FileIndex([entry.path for entry in self._repo.index \
+                          if in_subtrees(entry.path, self.subtrees)])
 
     def published(self, date, now):
         return True
@@ -120,5 +192,6 @@ class ChangeCtxWorkingDir(ChangeCtxDefault):
         return 'blohg-%i-%i-%s' % (time.time(), len(filectx.data),
                                    adler32(filectx.path) & 0xffffffff)
 
-    def get_filectx(self, path):
-        return FileCtx(self._repo, self._ctx, path, use_index=True)
+    def _new_filectx(self, path):
+        return FileCtx(self._repo, self._ctx, path, self._history,
+                       use_index=True)
@@ -10,72 +10,66 @@
 """
 
 import os
+import stat
 import time
 from flask.helpers import locked_cached_property
-from pygit2 import GIT_OBJ_BLOB, GIT_SORT_REVERSE, GIT_SORT_TIME, \
-    GIT_SORT_TOPOLOGICAL
+from hashlib import sha1
 
-from blohg.vcs import FileCtx as _FileCtx
+from blohg.vcs import FileCtx as _FileCtx, filectx_data_property
 
 
 class FileCtx(_FileCtx):
     """Base class that represents a file context."""
 
-    def __init__(self, repo, changectx, path, use_index=False):
+    def __init__(self, repo, changectx, path, history, use_index=False,
+                 oid=None):
         self._repo = repo
         self._changectx = changectx
         self._path = path
         self._use_index = use_index
-        try:
-            oid = self._changectx.oid
-        except AttributeError:
-            oid = self._changectx.target
-        self._ctx = self.get_fileobj_from_basetree(
-            self._repo[oid].tree, self._path)
-        if not self._ctx or self._ctx.type != GIT_OBJ_BLOB or use_index:
+        self._history = history
+
+        # just find the blob id here, if not given by the change context. the
+        # blob is only loaded when needed.
+        if oid is None and not use_index:
+            try:
+                tree = self._repo[self._changectx.oid].tree
+            except AttributeError:
+                tree = self._repo[self._changectx.target].tree
+            entry = self.get_entry_from_basetree(tree, self._path)
+            if entry is not None and (stat.S_ISREG(entry.filemode) or
+                                      stat.S_ISLNK(entry.filemode)):
+                oid = entry.oid
+        if oid is None:
             try:
-                self._ctx = self._repo[self._repo.index[self._path].oid]
+                oid = self._repo.index[self._path].oid
             except:
                 raise RuntimeError('Invalid file: %s' % self._path)
+        self._oid = oid
 
-    def get_fileobj_from_basetree(self, basetree, path):
-        tree = [basetree]
-        for piece in path.split('/'):
-            try:
-                tree.append(self._repo[tree.pop()[piece].oid])
-            except KeyError:
-                return None
-        return tree.pop()
+    @property
+    def _ctx(self):
+        # looked up by the current thread, that may not be the one that
+        # created the file context.
+        return self._repo[self._oid]
+
+    def get_entry_from_basetree(self, basetree, path):
+        tree = basetree
+        pieces = path.split('/')
+        try:
+            for piece in pieces[:-1]:
+                tree = self._repo[tree[piece].oid]
+            return tree[pieces[-1]]
+        except (KeyError, TypeError):
+            return None
 
     @locked_cached_property
     def _first_changeset(self):
-        try:
-            ref = self._repo.lookup_reference('refs/heads/master')
-        except Exception:
-            raise RuntimeError('Branch "master" not found!')
-        for commit in self._repo.walk(ref.target,
-                                      GIT_SORT_TOPOLOGICAL |
-                                      GIT_SORT_TIME |
-                                      GIT_SORT_REVERSE):
-            obj = self.get_fileobj_from_basetree(commit.tree, self._path)
-            if obj is not None:
-                return commit
+        return self._history.get(self._path)[0]
 
     @locked_cached_property
     def _last_changeset(self):
-        try:
-            ref = self._repo.lookup_reference('refs/heads/master')
-        except Exception:
-            return
-        head = ref.get_object()
-        for commit in self._repo.walk(ref.target,
-                                      GIT_SORT_TOPOLOGICAL |
-                                      GIT_SORT_TIME):
-            diff = self._repo.diff(head, commit)
-            for patch in diff:
-                if patch.new_file_path == self._path:
-                    return head
-            head = commit
+        return self._history.get(self._path)[1]
 
     @locked_cached_property
     def path(self):
@@ -83,6 +77,15 @@ class FileCtx(_FileCtx):
         return self._path.decode('utf-8')
 
     @locked_cached_property
+    def blob_id(self):
+        """Identifier of the content of the file (the blob hash, or the SHA-1
+        hash of the data for files read from the working directory).
+        """
+        if self._use_index:
+            return sha1(self.data).hexdigest()
+        return self._oid.hex
+
+    @filectx_data_property
     def data(self):
         """Raw data of the file."""
         # This hack avoids 'git add'ing files after every edit.
@@ -94,7 +97,7 @@ class FileCtx(_FileCtx):
                     return fp.read()
         return self._ctx.data
 
-    @locked_cached_property
+    @filectx_data_property
     def content(self):
         """UTF-8 encoded content of the file."""
         return self.data.decode('utf-8')
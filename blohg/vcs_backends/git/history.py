@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.git.history
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with the index of the history of the files of a Git branch.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import json
+import os
+import stat
+from flask.helpers import locked_cached_property
+from hashlib import sha1
+from pygit2 import GIT_SORT_REVERSE, GIT_SORT_TIME, GIT_SORT_TOPOLOGICAL, Oid
+from tempfile import mkstemp
+
+# bump this to invalidate the files written by previous versions.
+FILE_VERSION = 1
+
+
+class History(object):
+    """Index of the first and the last commits that touched each file of a
+    branch.
+
+    The index is built on first use, in a single walk of the branch, diffing
+    each commit against its first parent once, instead of walking the
+    history for each file.
+
+    If a cache directory is set, the index is saved there, with the commit
+    it was built at. When the branch is fast-forwarded, only the new commits
+    are walked to update it. Otherwise (e.g. after a force-push) it is built
+    again. The repository itself is never written.
+    """
+
+    def __init__(self, repo, ref_name='refs/heads/master', cache_dir=None):
+        self._repo = repo
+        self._ref_name = ref_name
+        self.cache_dir = cache_dir
+
+    @property
+    def _file(self):
+        if self.cache_dir is None:
+            return None
+        # the cache directory may be shared by several repositories.
+        key = sha1(os.path.abspath(self._repo.path)).hexdigest()
+        return os.path.join(self.cache_dir, 'git_history_%s.json' % key)
+
+    def _list_tree(self, tree, prefix=None):
+        for entry in tree:
+            path = prefix and (prefix + '/' + entry.name) or entry.name
+            if stat.S_ISDIR(entry.filemode):
+                for i in self._list_tree(self._repo[entry.oid], path):
+                    yield i
+            else:
+                yield path
+
+    def _changed_paths(self, commit):
+        parents = commit.parents
+        if len(parents) == 0:
+            return self._list_tree(commit.tree)
+        return [patch.new_file_path for patch in \
+                self._repo.diff(parents[0], commit)]
+
+    def _load(self):
+        if self._file is None:
+            return None, {}
+        try:
+            with open(self._file, 'rb') as fp:
+                data = json.load(fp)
+        except Exception:
+            # missing or broken files just trigger a full rebuild.
+            return None, {}
+        if data.get('version') != FILE_VERSION:
+            return None, {}
+        return str(data['commit']), \
+               dict([(path.encode('utf-8'), (str(first), str(last))) \
+                     for path, (first, last) in data['paths'].items()])
+
+    def _save(self, commit, index):
+        file_ = self._file
+        if file_ is None:
+            return
+        try:
+            data = {'version': FILE_VERSION, 'commit': commit,
+                    'paths': dict([(path.decode('utf-8'), value) \
+                                   for path, value in index.items()])}
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            fd, tmp_path = mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as fp:
+                json.dump(data, fp)
+            os.rename(tmp_path, file_)
+        except Exception:
+            # paths that aren't UTF-8 can't be stored, and read-only cache
+            # directories can't be written. the index is just built again by
+            # the next process.
+            pass
+
+    def _is_ancestor(self, commit, target):
+        try:
+            base = self._repo.merge_base(Oid(hex=commit), target)
+        except Exception:
+            # the commit may be gone, after a force-push and a gc.
+            return False
+        return base is not None and base.hex == commit
+
+    @locked_cached_property
+    def _index(self):
+        try:
+            ref = self._repo.lookup_reference(self._ref_name)
+        except Exception:
+            raise RuntimeError('Branch "master" not found!')
+        commit, index = self._load()
+        if commit == ref.target.hex:
+            return index
+        walker = self._repo.walk(ref.target, GIT_SORT_TOPOLOGICAL |
+                                 GIT_SORT_TIME | GIT_SORT_REVERSE)
+        if commit is not None and self._is_ancestor(commit, ref.target):
+            # fast-forward: only the new commits need to be walked.
+            walker.hide(Oid(hex=commit))
+        else:
+            index = {}
+        for commit in walker:
+            for path in self._changed_paths(commit):
+                first = path in index and index[path][0] or commit.hex
+                index[path] = (first, commit.hex)
+        self._save(ref.target.hex, index)
+        return index
+
+    def get(self, path):
+        """Returns a tuple with the first and the last commits that touched
+        the given path, or ``(None, None)`` if the path was never committed.
+        """
+        if path not in self._index:
+            return None, None
+        first, last = self._index[path]
+        return self._repo[first], self._repo[last]
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.gitcli.changectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with classes to represent Git change context, read from the git
+    command line tool.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import time
+from flask.helpers import locked_cached_property
+from zlib import adler32
+
+from blohg.vcs_backends.gitcli.filectx import FileCtx
+from blohg.vcs_backends.gitcli.history import History
+from blohg.vcs import ChangeCtx, FileIndex, WorkingDirSnapshot, \
+     in_subtrees
+
+
+class ChangeCtxDefault(ChangeCtx):
+    """Class with the specific implementation details for the change context
+    of the default revision state of the repository.
+    """
+
+    def __init__(self, git):
+        self._git = git
+
+        # the files are stat'ed before resolving the revision, so a change in
+        # between is seen by the next check.
+        self._refs_stat = self._stat_refs()
+        revision_id = self.revision_id
+
+        # only built if some file needs it.
+        self._history = History(self._git, revision_id)
+
+    @locked_cached_property
+    def _entries(self):
+        # flattened map of the listed files to their blob ids.
+        args = ['ls-tree', '-r', '-z', '--full-tree', self.revision_id]
+        if self.subtrees is not None:
+            args += ['--'] + list(self.subtrees)
+        entries = {}
+        for line in self._git.run(*args).split('\0'):
+            if not line:
+                continue
+            info, path = line.split('\t', 1)
+            mode, type, oid = info.split(' ')
+            if type != 'blob':
+                raise RuntimeError('Invalid object: %s' % path)
+            if in_subtrees(path, self.subtrees):
+                entries[path] = oid
+        return entries
+
+    @locked_cached_property
+    def files(self):
+        return FileIndex(self._entries)
+
+    @locked_cached_property
+    def revision_id(self):
+        rv = self._git.rev_parse('refs/heads/master')
+        if rv is None:
+            raise RuntimeError('Branch "master" not found!')
+        return rv
+
+    def _stat_refs(self):
+        """Returns the modification time, inode and size of the files that
+        may store the "master" reference (the loose ref and the packed refs).
+        Any update of the reference replaces one of them.
+        """
+        rv = []
+        for name in ['refs/heads/master', 'packed-refs']:
+            try:
+                st = os.stat(os.path.join(self._git.git_dir, name))
+            except OSError:
+                rv.append(None)
+            else:
+                rv.append((st.st_mtime, st.st_ino, st.st_size))
+        return rv
+
+    def needs_reload(self):
+        # the reference is only resolved if the files changed.
+        refs_stat = self._stat_refs()
+        if refs_stat == self._refs_stat:
+            return False
+        if self.revision_id != self._git.rev_parse('refs/heads/master'):
+            return True
+
+        # the files changed, but not the revision (e.g. the refs were packed).
+        self._refs_stat = refs_stat
+        return False
+
+    def filectx_needs_reload(self, filectx):
+        revision_id = filectx._changectx.revision_id
+        if self._stat_refs() == self._refs_stat:
+            return revision_id != self.revision_id
+        return revision_id != self._git.rev_parse('refs/heads/master')
+
+    def published(self, date, now):
+        return date <= now
+
+    def etag(self, filectx):
+        return 'blohg-%i-%i-%s' % (filectx.mdate or filectx.date,
+                                   len(filectx.data), adler32(filectx.path)
+                                   & 0xffffffff)
+
+    def _new_filectx(self, path):
+        return FileCtx(self._git, self, path)
+
+    def prefetch(self, paths, keep=True):
+        # the blobs that weren't read yet are requested at once to the batch
+        # process. files from the working directory are read from disk.
+        filectxs = [self.get_filectx(path, keep) for path in paths]
+        pending = [i for i in filectxs if not i._use_index and \
+                   '_blob_data' not in i.__dict__]
+        blobs = self._git.cat_files([i._oid for i in pending])
+        for filectx, (oid, data) in zip(pending, blobs):
+            filectx._blob_data = data
+        for filectx in filectxs:
+            filectx.data
+        return filectxs
+
+
+class ChangeCtxWorkingDir(WorkingDirSnapshot, ChangeCtxDefault):
+    """Class with the specific implementation details for the change context
+    of the working dir of the repository. It inherits the common implementation
+    from the class :class:`ChangeCtxDefault`.
+    """
+
+    @locked_cached_property
+    def _snapshot_root(self):
+        return self._git.repo_path
+
+    @locked_cached_property
+    def _snapshot_extra_files(self):
+        # the listing comes from the index, and the dates from HEAD. the
+        # config file is always read, even if outside of the subtrees.
+        return ['config.yaml'] + \
+               [os.path.join(self._git.git_dir, i) for i in \
+                ['index', 'HEAD', 'refs/heads/master', 'packed-refs']]
+
+    def _snapshot_paths(self):
+        # only the files from the index are listed.
+        return [i for i in self._git.run('ls-files', '-z').split('\0') if i]
+
+    @locked_cached_property
+    def _entries(self):
+        # files from the index, with their blob ids.
+        self._snapshot  # taken before listing the files
+        entries = {}
+        for line in self._git.run('ls-files', '-s', '-z').split('\0'):
+            if not line:
+                continue
+            info, path = line.split('\t', 1)
+            if in_subtrees(path, self.subtrees):
+                entries[path] = info.split(' ')[1]
+        return entries
+
+    @locked_cached_property
+    def revision_id(self):
+        if self._git.bare:
+            raise RuntimeError('Bare repositories should be deployed with '
+                               'REVISION_DEFAULT change context')
+        rv = self._git.rev_parse('HEAD')
+        if rv is None:
+            raise RuntimeError('HEAD reference not found! Please do your '
+                               'first commit.')
+        return rv
+
+    def published(self, date, now):
+        return True
+
+    def etag(self, filectx):
+        return 'blohg-%i-%i-%s' % (time.time(), len(filectx.data),
+                                   adler32(filectx.path) & 0xffffffff)
+
+    def _new_filectx(self, path):
+        return FileCtx(self._git, self, path, use_index=True)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.gitcli.filectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with classes to represent Git file context, read from the git
+    command line tool.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import time
+from flask.helpers import locked_cached_property
+from hashlib import sha1
+
+from blohg.vcs import FileCtx as _FileCtx, filectx_data_property
+
+
+class FileCtx(_FileCtx):
+    """Base class that represents a file context."""
+
+    def __init__(self, git, changectx, path, use_index=False):
+        self._git = git
+        self._changectx = changectx
+        self._path = path
+        self._use_index = use_index
+
+        # the blob id usually comes from the listing of the change context,
+        # but the listing isn't forced here, because blohg reads the config
+        # file before setting the subtrees. files that weren't listed are read
+        # right away (from the index or from the revision), to validate them.
+        entries = changectx.__dict__.get('_entries', {})
+        self._oid = entries.get(path)
+        if self._oid is None:
+            if use_index:
+                name = ':%s' % self._path
+            else:
+                name = '%s:%s' % (changectx.revision_id, self._path)
+            self._oid, self._blob_data = self._git.cat_file(name)
+
+    @locked_cached_property
+    def _blob_data(self):
+        return self._git.cat_file(self._oid)[1]
+
+    @locked_cached_property
+    def path(self):
+        """UTF-8 encoded file path, relative to the repository root."""
+        return self._path.decode('utf-8')
+
+    @locked_cached_property
+    def blob_id(self):
+        """Identifier of the content of the file (the blob hash, or the SHA-1
+        hash of the data for files read from the working directory).
+        """
+        if self._use_index:
+            return sha1(self.data).hexdigest()
+        return self._oid
+
+    @filectx_data_property
+    def data(self):
+        """Raw data of the file."""
+        # files from the working directory don't need to be 'git add'ed after
+        # every edit, like with the pygit2 backend.
+        if self._use_index:
+            real_file = os.path.join(self._git.repo_path, self._path)
+            if os.path.isfile(real_file):
+                with open(real_file, 'r') as fp:
+                    return fp.read()
+        return self._blob_data
+
+    @filectx_data_property
+    def content(self):
+        """UTF-8 encoded content of the file."""
+        return self.data.decode('utf-8')
+
+    @locked_cached_property
+    def date(self):
+        """Unix timestamp of the creation date of the file (date of the first
+        commit).
+        """
+        first = self._changectx._history.get(self._path)[0]
+        if first is None:
+            return int(time.time())
+        return first[1]
+
+    @locked_cached_property
+    def mdate(self):
+        """Unix timestamp of the last modification date of the file (date of
+        the most recent commit).
+        """
+        first, last = self._changectx._history.get(self._path)
+        if last is not None and last[0] != first[0]:
+            return last[1]
+
+    @locked_cached_property
+    def author(self):
+        """The creator of the file (commiter of the first revision of the
+        file)."""
+        first = self._changectx._history.get(self._path)[0]
+        if first is not None:
+            return first[2].decode('utf-8')
+        return ('%s <%s>' % (self._git.config('user.name'),
+                             self._git.config('user.email'))).decode('utf-8')
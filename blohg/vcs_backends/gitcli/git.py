@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.gitcli.git
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with a wrapper for the git command line tool.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+from flask.helpers import locked_cached_property
+from subprocess import Popen, PIPE
+from threading import Lock
+
+# maximum size of the object names written to the batch process at once. the
+# names must fit in the pipe buffer, because the output is only read after
+# writing them.
+BATCH_SIZE = 16384
+
+
+class Git(object):
+    """Wrapper for the git command line tool, running on a given repository.
+
+    Objects are read from a long-lived ``git cat-file --batch`` process,
+    shared by all the threads (and restarted in forked processes).
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self._lock = Lock()
+        self._batch = None
+        self._batch_pid = None
+
+    def _run(self, *args):
+        proc = Popen(['git'] + list(args), cwd=self.repo_path, stdout=PIPE,
+                     stderr=PIPE)
+        out, err = proc.communicate()
+        return proc.returncode, out, err
+
+    def run(self, *args):
+        """Runs a git command and returns its output.
+
+        :raises RuntimeError: if the command fails.
+        """
+        returncode, out, err = self._run(*args)
+        if returncode != 0:
+            raise RuntimeError('git %s failed: %s' % (args[0], err.strip()))
+        return out
+
+    def rev_parse(self, name):
+        """Returns the object id for a given name, or ``None`` if not
+        found.
+        """
+        returncode, out, err = self._run('rev-parse', '--verify', '-q',
+                                         name + '^{commit}')
+        if returncode != 0:
+            return None
+        return out.strip()
+
+    def config(self, name):
+        returncode, out, err = self._run('config', name)
+        return out.strip()
+
+    @locked_cached_property
+    def git_dir(self):
+        return os.path.join(self.repo_path,
+                            self.run('rev-parse', '--git-dir').strip())
+
+    @locked_cached_property
+    def bare(self):
+        return self.run('rev-parse', '--is-bare-repository').strip() == 'true'
+
+    def _start_batch(self):
+        self._batch = Popen(['git', 'cat-file', '--batch'],
+                            cwd=self.repo_path, stdin=PIPE, stdout=PIPE)
+        self._batch_pid = os.getpid()
+
+    def _stop_batch(self):
+        try:
+            self._batch.stdin.close()
+            self._batch.wait()
+        except Exception:
+            pass
+        self._batch = None
+
+    def _read_object(self):
+        header = self._batch.stdout.readline().split()
+        if len(header) != 3:  # missing or ambiguous object
+            return None
+        oid, type, size = header
+        data = self._batch.stdout.read(int(size))
+        self._batch.stdout.read(1)  # trailing line feed
+        return oid, type, data
+
+    def cat_files(self, names):
+        """Returns a list of tuples with the object id and the data of the
+        blobs, for the given object names (object ids or
+        ``<revision>:<path>``). The names are written to the batch process
+        in chunks, instead of waiting for each object before asking for the
+        next one.
+
+        :raises RuntimeError: if any of the blobs is not found.
+        """
+        objects = []
+        with self._lock:
+            if self._batch is None or self._batch_pid != os.getpid() or \
+               self._batch.poll() is not None:
+                self._start_batch()
+            try:
+                i = 0
+                while i < len(names):
+                    chunk = []
+                    size = 0
+                    while i < len(names) and (not chunk or \
+                                              size + len(names[i]) < \
+                                              BATCH_SIZE):
+                        chunk.append(names[i])
+                        size += len(names[i]) + 1
+                        i += 1
+                    self._batch.stdin.write(''.join([name + '\n' \
+                                                     for name in chunk]))
+                    self._batch.stdin.flush()
+                    for name in chunk:
+                        objects.append((name, self._read_object()))
+            except (IOError, OSError, ValueError):
+                # the next call starts a new process.
+                self._stop_batch()
+                raise RuntimeError('Failed to read objects from git')
+        rv = []
+        for name, obj in objects:
+            if obj is None or obj[1] != 'blob':
+                raise RuntimeError('Invalid object: %s' % name)
+            rv.append((obj[0], obj[2]))
+        return rv
+
+    def cat_file(self, name):
+        """Returns a tuple with the object id and the data of a blob, for a
+        given object name (an object id or ``<revision>:<path>``).
+
+        :raises RuntimeError: if the blob is not found.
+        """
+        return self.cat_files([name])[0]
+
+    def close(self):
+        with self._lock:
+            if self._batch is not None and self._batch_pid == os.getpid():
+                self._stop_batch()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.gitcli.history
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with the index of the history of the files of a Git branch, read
+    from the git command line tool.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+from flask.helpers import locked_cached_property
+
+
+class History(object):
+    """Index of the first and the last commits that touched each file of a
+    revision, read from a single ``git log --name-status`` run.
+
+    Commits are tuples ``(id, author time, author)``. Merge commits are not
+    diffed, so the changes brought by a merge are credited to the commits
+    of the merged branch. Deletions are changes of the path too, then files
+    that were deleted and added again keep their first commit, like with the
+    pygit2 backend.
+    """
+
+    def __init__(self, git, revision_id):
+        self._git = git
+        self._revision_id = revision_id
+
+    @locked_cached_property
+    def _index(self):
+        out = self._git.run('log', '--reverse', '--topo-order', '--no-renames',
+                            '--name-status', '-z',
+                            '--format=%x01%H %at %an <%ae>',
+                            self._revision_id, '--')
+        index = {}
+        for record in out.split('\x01')[1:]:
+            header, _, changes = record.partition('\0')
+            oid, date, author = header.split(' ', 2)
+            commit = (oid, int(date), author)
+            changes = changes.lstrip('\n').split('\0')
+            for path in changes[1::2]:
+                first = path in index and index[path][0] or commit
+                index[path] = (first, commit)
+        return index
+
+    def get(self, path):
+        """Returns a tuple with the first and the last commits that touched
+        the given path, or ``(None, None)`` if the path was never committed.
+        """
+        return self._index.get(path, (None, None))
@@ -20,11 +20,13 @@ import codecs
 import os
 import shutil
 
-from mercurial import commands, error, ui as _ui
+from flask.helpers import locked_cached_property
+from mercurial import commands, error, hg, ui as _ui
 from pkg_resources import resource_filename, resource_listdir
 from blohg.vcs_backends.hg.changectx import ChangeCtxDefault, \
      ChangeCtxWorkingDir
-from blohg.vcs import Repository, REVISION_DEFAULT, REVISION_WORKING_DIR
+from blohg.vcs import Repository, ThreadLocalHandle, REVISION_DEFAULT, \
+     REVISION_WORKING_DIR
 
 
 class HgRepository(Repository):
@@ -36,6 +38,12 @@ class HgRepository(Repository):
     name = 'Mercurial'
     order = 0
 
+    @locked_cached_property
+    def _repo(self):
+        # one handle per thread for all the change contexts, instead of
+        # opening the repository again on every reload.
+        return ThreadLocalHandle(lambda: hg.repository(_ui.ui(), self.path))
+
     def get_changectx(self, revision=REVISION_DEFAULT):
         """Method that returns a change context for a given Revision state.
 
@@ -55,9 +63,9 @@ class HgRepository(Repository):
         content suitable for publishing.
         """
         if revision == REVISION_DEFAULT:
-            return ChangeCtxDefault(self.path)
+            return ChangeCtxDefault(self.path, self._repo)
         elif revision == REVISION_WORKING_DIR:
-            return ChangeCtxWorkingDir(self.path)
+            return ChangeCtxWorkingDir(self.path, self._repo)
         raise RuntimeError('Invalid repository revision: %r' % revision)
 
     @staticmethod
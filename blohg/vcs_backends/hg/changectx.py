@@ -9,25 +9,42 @@
     :license: GPL-2, see LICENSE for more details.
 """
 
+import os
 import time
 from flask.helpers import locked_cached_property
 from mercurial import error, hg, ui
 from zlib import adler32
 
 from blohg.vcs_backends.hg.filectx import FileCtx
-from blohg.vcs import ChangeCtx
+from blohg.vcs_backends.hg.history import History, count_revisions
+from blohg.vcs import ChangeCtx, FileIndex, ThreadLocalHandle, \
+     WorkingDirSnapshot, in_subtrees
 
 
 class ChangeCtxBase(ChangeCtx):
     """Base class that represents a change context."""
 
-    def __init__(self, repo_path):
+    def __init__(self, repo_path, repo=None):
         self._repo_path = repo_path
-        self._ui = ui.ui()
-        self._repo = hg.repository(self._ui, self._repo_path)
-        self._ctx = self._repo[self.revision_id]
+        if repo is None:
+            repo = ThreadLocalHandle(lambda: hg.repository(ui.ui(),
+                                                           self._repo_path))
+        self._handles = repo
+
+        # each thread uses its own repository handle, refreshed the first time
+        # it is used by this change context, and its own mercurial change
+        # context, bound to the same revision.
+        self._repo = ThreadLocalHandle(self._get_repo)
+        self._ctx = ThreadLocalHandle(lambda: self._repo[self.revision_id])
         self.revno = self._ctx.rev()
 
+    def _get_repo(self):
+        # shared repository handle. mercurial only reloads the caches whose
+        # files changed since they were read.
+        repo = self._handles.get()
+        repo.invalidate()
+        return repo
+
     @locked_cached_property
     def files(self):
         files = set(self._ctx.manifest().keys())
@@ -35,10 +52,15 @@ class ChangeCtxBase(ChangeCtx):
             files = files.union(set(self._extra_files))
         except:
             pass
-        return sorted(files)
+        return FileIndex([i for i in files if in_subtrees(i, self.subtrees)])
+
+    @locked_cached_property
+    def _history(self):
+        # shared by all the file contexts.
+        return History(self._repo, self.revno)
 
-    def get_filectx(self, path):
-        return FileCtx(self._repo, self._ctx, path)
+    def _new_filectx(self, path):
+        return FileCtx(self._repo, self._ctx, path, self._history)
 
 
 class ChangeCtxDefault(ChangeCtxBase):
@@ -47,36 +69,72 @@ class ChangeCtxDefault(ChangeCtxBase):
     implementation from the class :class:`ChangeCtxBase`.
     """
 
-    def __init__(self, repo_path):
-        ChangeCtxBase.__init__(self, repo_path)
+    def __init__(self, repo_path, repo=None):
+        if repo is None:
+            repo = ThreadLocalHandle(lambda: hg.repository(ui.ui(),
+                                                           repo_path))
+
+        # stat the changelog before resolving the revision, so a commit made
+        # in between is seen by needs_reload.
+        self._changelog_stat = self._stat_changelog(repo)
+        ChangeCtxBase.__init__(self, repo_path, repo)
         if self.revno is None:
             raise RuntimeError('No commits found in the repository!')
 
-    @property
+    @locked_cached_property
     def revision_id(self):
         try:
             return self._repo.branchtip('default')
         except error.RepoLookupError:
             return None
 
+    @staticmethod
+    def _stat_changelog(repo):
+        """Returns the modification time, inode and size of the changelog
+        index. Any commit or strip changes it.
+        """
+        try:
+            st = os.stat(repo.sjoin('00changelog.i'))
+        except OSError:
+            return None
+        return st.st_mtime, st.st_ino, st.st_size
+
     def needs_reload(self):
         if self.revno is None:
             return True
-        repo = hg.repository(self._ui, self._repo_path)
+        changelog_stat = self._stat_changelog(self._repo)
+        if changelog_stat == self._changelog_stat:
+            return False
+        self._repo.invalidate()
         try:
-            revision_id = repo.branchtip('default')
+            revision_id = self._repo.branchtip('default')
         except error.RepoLookupError:
             return True
-        revision = repo[revision_id]
-        return revision.rev() > self.revno
+        if revision_id != self.revision_id:
+            return True
+
+        # the changelog changed, but not the tip of the 'default' branch.
+        self._changelog_stat = changelog_stat
+        return False
 
     def filectx_needs_reload(self, filectx):
-        filelog = filectx._ctx.filelog()
-        changesets = list(filelog)
-        new_filectx = self.get_filectx(filectx._path)
-        new_filelog = new_filectx._ctx.filelog()
-        new_changesets = list(new_filelog)
-        return len(changesets) != len(new_changesets)
+        # nothing was committed since the file context was created.
+        if filectx._history is self._history and \
+           self._stat_changelog(self._repo) == self._changelog_stat:
+            return False
+        self._repo.invalidate()
+        try:
+            rev = self._repo[self._repo.branchtip('default')].rev()
+        except error.RepoLookupError:
+            return True
+
+        # both counts ignore the revisions newer than the compared ones, so
+        # commits to other branches aren't seen as changes of the file.
+        history = filectx._history
+        if history._rev == rev:
+            return False
+        return count_revisions(self._repo.file(filectx._path), rev) != \
+               history.get(filectx._path)[0]
 
     def published(self, date, now):
         return date <= now
@@ -87,7 +145,7 @@ class ChangeCtxDefault(ChangeCtxBase):
                                    & 0xffffffff)
 
 
-class ChangeCtxWorkingDir(ChangeCtxBase):
+class ChangeCtxWorkingDir(WorkingDirSnapshot, ChangeCtxBase):
     """Class with the specific implementation details for the change context
     of the working dir of the repository. It inherits the common implementation
     from the class :class:`ChangeCtxBase`.
@@ -95,19 +153,34 @@ class ChangeCtxWorkingDir(ChangeCtxBase):
 
     revision_id = None
 
+    def _get_repo(self):
+        repo = ChangeCtxBase._get_repo(self)
+        repo.invalidatedirstate()
+        return repo
+
+    @locked_cached_property
+    def _snapshot_root(self):
+        return self._repo.root
+
+    @locked_cached_property
+    def _snapshot_extra_files(self):
+        # the config file is always read, even if outside of the subtrees.
+        return ['config.yaml', self._repo.join('dirstate'),
+                self._repo.sjoin('00changelog.i')]
+
+    def _snapshot_ignored(self, path):
+        # ignored files aren't listed, unless they are tracked.
+        dirstate = self._repo.dirstate
+        return bool(dirstate._ignore(path)) and path not in dirstate and \
+               path not in dirstate.dirs()
+
     @property
     def _extra_files(self):
-        return self._repo.status(unknown=True)[4]
+        unknown = self._repo.status(unknown=True)[4]
 
-    def needs_reload(self):
-        """This change context is mainly used by the command-line tool, and
-        didn't provides any reliable way to evaluate its "freshness". Always
-        reload.
-        """
-        return True
-
-    def filectx_needs_reload(self, filectx):
-        return True
+        # taken after listing the files, that may write the dirstate.
+        self._snapshot
+        return unknown
 
     def published(self, date, now):
         return True
@@ -11,9 +11,12 @@
 
 import time
 from flask.helpers import locked_cached_property
+from hashlib import sha1
 from mercurial import encoding
+from mercurial.node import hex
 
-from blohg.vcs import FileCtx as _FileCtx
+from blohg.vcs import FileCtx as _FileCtx, filectx_data_property
+from blohg.vcs_backends.hg.history import History
 
 
 def hg2u(s):
@@ -24,16 +27,25 @@ def hg2u(s):
 class FileCtx(_FileCtx):
     """Base class that represents a file context."""
 
-    def __init__(self, repo, changectx, path):
+    def __init__(self, repo, changectx, path, history=None):
         self._repo = repo
         self._changectx = changectx
         self._path = path
-        self._ctx = self._changectx[self._path]
+
+        # validates the path. the mercurial file context is looked up again
+        # when needed, because the change context may be shared by threads.
+        self._changectx[self._path]
+        if history is None:
+            history = History(self._repo, self._changectx.rev())
+        self._history = history
+
+    @property
+    def _ctx(self):
+        return self._changectx[self._path]
 
     @locked_cached_property
-    def _first_changeset(self):
-        filelog = self._ctx.filelog()
-        return self._repo[filelog.linkrev(0)]
+    def _entry(self):
+        return self._history.get(self._path)
 
     @locked_cached_property
     def path(self):
@@ -41,11 +53,20 @@ class FileCtx(_FileCtx):
         return hg2u(self._ctx.path())
 
     @locked_cached_property
+    def blob_id(self):
+        """Identifier of the content of the file (the filenode hash, or the
+        SHA-1 hash of the data for files from the working directory).
+        """
+        if self._changectx.rev() is None:
+            return sha1(self.data).hexdigest()
+        return hex(self._ctx.filenode())
+
+    @filectx_data_property
     def data(self):
         """Raw data of the file."""
         return self._ctx.data()
 
-    @locked_cached_property
+    @filectx_data_property
     def content(self):
         """UTF-8 encoded content of the file."""
         return hg2u(self.data)
@@ -55,7 +76,7 @@ class FileCtx(_FileCtx):
         """Unix timestamp of the creation date of the file (date of the first
         commit).
         """
-        date = int(self._first_changeset.date()[0])
+        date = self._entry[1]
         if not date:
             date = int(time.time())
         return date
@@ -65,17 +86,13 @@ class FileCtx(_FileCtx):
         """Unix timestamp of the last modification date of the file (date of
         the most recent commit).
         """
-        filelog = self._ctx.filelog()
-        changesets = list(filelog)
-        if len(changesets) > 1:
-            last_changeset = self._repo[filelog.linkrev(len(changesets) - 1)]
-            return int(last_changeset.date()[0])
+        return self._entry[2]
 
     @locked_cached_property
     def author(self):
         """The creator of the file (commiter of the first revision of the
         file)."""
-        author = hg2u(self._first_changeset.user())
+        author = hg2u(self._entry[3])
         if author == u'':
             try:
                 author = hg2u(self._ctx.user())
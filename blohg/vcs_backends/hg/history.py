@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.hg.history
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with the index of the history of the files of a Mercurial
+    revision.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+
+def count_revisions(filelog, rev=None):
+    """Returns the number of revisions of a filelog, ignoring the ones newer
+    than the given changelog revision, unless it is ``None``.
+    """
+    count = len(filelog)
+    if rev is not None:
+        while count and filelog.linkrev(count - 1) > rev:
+            count -= 1
+    return count
+
+
+class History(object):
+    """Index of the number of revisions, the creation date, the last
+    modification date and the creator of each file of a revision.
+
+    Each filelog is read once, the first time the history of the file is
+    needed, and the dates and users of the changesets are read once and
+    shared by all the files they touched. Revisions of the files that are
+    newer than the indexed revision (``rev``) are ignored, unless it is
+    ``None`` (working directory).
+    """
+
+    def __init__(self, repo, rev=None):
+        self._repo = repo
+        self._rev = rev
+        self._index = {}
+        self._changesets = {}
+
+    def _get_changeset(self, linkrev):
+        try:
+            return self._changesets[linkrev]
+        except KeyError:
+            ctx = self._repo[linkrev]
+            rv = self._changesets[linkrev] = (int(ctx.date()[0]), ctx.user())
+            return rv
+
+    def _get_entry(self, path):
+        filelog = self._repo.file(path)
+        count = count_revisions(filelog, self._rev)
+
+        # an empty filelog gives the null changeset, without date nor user.
+        date, user = self._get_changeset(filelog.linkrev(0))
+        mdate = None
+        if count > 1:
+            mdate = self._get_changeset(filelog.linkrev(count - 1))[0]
+        return count, date, mdate, user
+
+    def get(self, path):
+        """Returns a tuple ``(count, date, mdate, user)`` for the given path,
+        where ``count`` is the number of revisions of the file, and
+        ``mdate`` is ``None`` if the file was committed only once.
+        """
+        try:
+            return self._index[path]
+        except KeyError:
+            rv = self._index[path] = self._get_entry(path)
+            return rv
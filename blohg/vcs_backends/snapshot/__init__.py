@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.snapshot
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Package with all the classes and functions needed to serve blohg from a
+    snapshot file, created by the ``blohg snapshot`` command from any other
+    repository.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+
+from blohg.vcs_backends.snapshot.archive import Archive
+from blohg.vcs_backends.snapshot.changectx import ChangeCtxDefault, \
+     ChangeCtxWorkingDir
+from blohg.vcs import Repository, REVISION_DEFAULT, REVISION_WORKING_DIR
+
+
+class SnapshotRepository(Repository):
+    """Main entrypoint for the snapshot layer. This class offers abstract
+    access to everything needed by blohg from a snapshot file, that is
+    mapped in memory, without any VCS library.
+    """
+
+    identifier = 'snapshot'
+    name = 'Snapshot'
+    order = 50
+    creatable = False
+
+    def get_changectx(self, revision=REVISION_DEFAULT):
+        """Method that returns a change context for a given Revision state.
+
+        blohg supports 2 revision states, and both serve the files of the
+        revision packed in the snapshot:
+
+        - default: hides the posts with dates in the future.
+        - working_dir: shows everything.
+
+        Each change context maps the snapshot file again, so a new snapshot
+        is seen after a reload.
+        """
+        if revision == REVISION_DEFAULT:
+            return ChangeCtxDefault(self.path)
+        elif revision == REVISION_WORKING_DIR:
+            return ChangeCtxWorkingDir(self.path)
+        raise RuntimeError('Invalid repository revision: %r' % revision)
+
+    @staticmethod
+    def create_repo(repo_path):
+        raise RuntimeError('Snapshots are created from existing repositories, '
+                           'with the "snapshot" command.')
+
+    @staticmethod
+    def supported(repo_path):
+        return os.path.isfile(repo_path) and Archive.supported(repo_path)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.snapshot.archive
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Module with the reader and the writer of the snapshot files, that pack
+    the files of a revision, with their history, into a single file.
+
+    The file starts with a fixed size header (magic string, format version,
+    offset and size of the index), followed by the data of the files, one
+    after the other, and by the index: a JSON object with the revision id
+    and with the path, offset, size, blob id, dates and author of each file.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import json
+import mmap
+import os
+import struct
+from binascii import hexlify, unhexlify
+from tempfile import mkstemp
+
+MAGIC = 'BLOHGSNP'
+VERSION = 1
+HEADER = struct.Struct('<8sIQQ')
+
+
+class Archive(object):
+    """Read-only view of a snapshot file, mapped in memory. The index is
+    parsed when the file is opened, and the data of the files is only read
+    when needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'rb') as fp:
+                st = os.fstat(fp.fileno())
+                self.stat = st.st_mtime, st.st_ino, st.st_size
+                self._mmap = mmap.mmap(fp.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError), err:
+            raise RuntimeError('Failed to open snapshot: %s (%s)' % (path,
+                                                                     err))
+        try:
+            magic, version, offset, size = HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            raise RuntimeError('Invalid snapshot: %s' % path)
+        index = json.loads(self._mmap[offset:offset + size])
+        self.revision_id = unhexlify(index['revision_id'])
+
+        # maps the UTF-8 encoded paths to tuples (offset, size, blob_id,
+        # date, mdate, author).
+        self.entries = dict([(i[0].encode('utf-8'), tuple(i[1:])) \
+                             for i in index['files']])
+
+    @staticmethod
+    def supported(path):
+        """Checks if the given path is a snapshot file, without mapping it."""
+        try:
+            with open(path, 'rb') as fp:
+                return fp.read(len(MAGIC)) == MAGIC
+        except IOError:
+            return False
+
+    def read(self, offset, size):
+        return self._mmap[offset:offset + size]
+
+    def view(self, offset, size):
+        """Returns a read-only buffer with a slice of the mapped file,
+        without copying it.
+        """
+        return buffer(self._mmap, offset, size)
+
+
+def write_archive(changectx, path, chunk_size=100):
+    """Packs the files of a change context into a snapshot file. The file is
+    written to a temporary file and renamed, so running servers never see a
+    partial snapshot.
+
+    :param changectx: the change context.
+    :param path: the path of the snapshot file.
+    :param chunk_size: the number of files read at once from the change
+                       context.
+    :return: the number of files packed.
+    """
+    revision_id = changectx.revision_id
+    if hasattr(revision_id, 'raw'):  # pygit2 oid
+        revision_id = revision_id.raw
+    fd, tmp_path = mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+            offset = HEADER.size
+            entries = []
+            files = changectx.files
+            for i in range(0, len(files), chunk_size):
+                for filectx in changectx.prefetch(files[i:i + chunk_size],
+                                                  False):
+                    data = filectx.data
+                    fp.write(data)
+                    entries.append([filectx.path, offset, len(data),
+                                    filectx.blob_id, filectx.date,
+                                    filectx.mdate, filectx.author])
+                    offset += len(data)
+            index = json.dumps({'revision_id': hexlify(revision_id),
+                                'files': entries})
+            fp.write(index)
+            fp.seek(0)
+            fp.write(HEADER.pack(MAGIC, VERSION, offset, len(index)))
+        os.chmod(tmp_path, 0644)
+        os.rename(tmp_path, path)
+    except:
+        os.unlink(tmp_path)
+        raise
+    return len(entries)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.snapshot.changectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with classes to represent the change context of a snapshot.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+import os
+import time
+from flask.helpers import locked_cached_property
+from zlib import adler32
+
+from blohg.vcs_backends.snapshot.archive import Archive
+from blohg.vcs_backends.snapshot.filectx import FileCtx
+from blohg.vcs import ChangeCtx, FileIndex, in_subtrees
+
+
+class ChangeCtxDefault(ChangeCtx):
+    """Class with the specific implementation details for the change context
+    of the default revision state of the snapshot (the revision it was
+    created from).
+
+    A new snapshot is detected by the stat of the snapshot file, that is
+    replaced when a new snapshot is created.
+    """
+
+    def __init__(self, snapshot_path):
+        self._snapshot_path = snapshot_path
+        self._archive = Archive(snapshot_path)
+
+    @locked_cached_property
+    def files(self):
+        return FileIndex([i for i in self._archive.entries \
+                          if in_subtrees(i, self.subtrees)])
+
+    @property
+    def revision_id(self):
+        return self._archive.revision_id
+
+    def needs_reload(self):
+        try:
+            st = os.stat(self._snapshot_path)
+        except OSError:
+            return True
+        return (st.st_mtime, st.st_ino, st.st_size) != self._archive.stat
+
+    def filectx_needs_reload(self, filectx):
+        return filectx._changectx is not self or self.needs_reload()
+
+    def published(self, date, now):
+        return date <= now
+
+    def etag(self, filectx):
+        return 'blohg-%i-%i-%s' % (filectx.mdate or filectx.date,
+                                   len(filectx.view), adler32(filectx.path)
+                                   & 0xffffffff)
+
+    def _new_filectx(self, path):
+        return FileCtx(self._archive, self, path)
+
+
+class ChangeCtxWorkingDir(ChangeCtxDefault):
+    """Class with the specific implementation details for the change context
+    of the working dir of the snapshot. Snapshots don't have a working dir,
+    so it serves the same files as :class:`ChangeCtxDefault`, but shows
+    everything, like the working dir of the other backends.
+    """
+
+    def published(self, date, now):
+        return True
+
+    def etag(self, filectx):
+        return 'blohg-%i-%i-%s' % (time.time(), len(filectx.view),
+                                   adler32(filectx.path) & 0xffffffff)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+    blohg.vcs_backends.snapshot.filectx
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Model with classes to represent the file context of a snapshot.
+
+    :copyright: (c) 2010-2013 by Rafael Goncalves Martins
+    :license: GPL-2, see LICENSE for more details.
+"""
+
+from flask.helpers import locked_cached_property
+
+from blohg.vcs import FileCtx as _FileCtx, filectx_data_property
+
+
+class FileCtx(_FileCtx):
+    """Base class that represents a file context."""
+
+    def __init__(self, archive, changectx, path):
+        self._archive = archive
+        self._changectx = changectx
+        self._path = path
+        try:
+            self._entry = self._archive.entries[path]
+        except KeyError:
+            raise RuntimeError('File not found: %s' % path)
+
+    @locked_cached_property
+    def path(self):
+        """UTF-8 encoded file path, relative to the repository root."""
+        return self._path.decode('utf-8')
+
+    @property
+    def blob_id(self):
+        """Identifier of the content of the file, from the repository the
+        snapshot was created from.
+        """
+        return self._entry[2]
+
+    @filectx_data_property
+    def data(self):
+        """Raw data of the file, sliced from the mapped snapshot."""
+        return self._archive.read(self._entry[0], self._entry[1])
+
+    @property
+    def view(self):
+        """Read-only buffer with the raw data of the file, that isn't copied
+        from the mapped snapshot.
+        """
+        return self._archive.view(self._entry[0], self._entry[1])
+
+    @filectx_data_property
+    def content(self):
+        """UTF-8 encoded content of the file."""
+        return unicode(self.view, 'utf-8')
+
+    @property
+    def date(self):
+        """Unix timestamp of the creation date of the file."""
+        return self._entry[3]
+
+    @property
+    def mdate(self):
+        """Unix timestamp of the last modification date of the file."""
+        return self._entry[4]
+
+    @property
+    def author(self):
+        """The creator of the file."""
+        return self._entry[5]
@@ -147,6 +147,33 @@ def tag(tag, page=None):
                                        'url_gen': url_gen})
 
 
+@views.route('/archive/<int:year>/<int:month>/')
+@views.route('/archive/<int:year>/<int:month>/<int:page>/')
+def archive(year, month, page=None):
+    """Page that lists the abstract of all available posts for the given
+    year and month. It uses pagination, like the home.
+    """
+    if page is None:
+        page = 1
+    current = int(page)
+    pages = current_app.blohg.content.get_from_archive(year, month)
+    ppp = int(current_app.config['POSTS_PER_PAGE'])
+    num_pages = int(math.ceil(float(len(pages)) / ppp))
+    init = int((current - 1) * ppp)
+    end = int(current * ppp)
+    url_gen = lambda x: url_for('views.archive', year=year, month=month,
+                                page=x)
+    posts = pages[init:end]
+    if len(posts) == 0:
+        abort(404)
+    return render_template('_posts.html',
+                           title=u'Archive: %i-%02i' % (year, month),
+                           archive=(year, month), posts=posts,
+                           full_content=False,
+                           pagination={'num_pages': num_pages, 'current': page,
+                                       'url_gen': url_gen})
+
+
 @views.route('/source/')  # just to make robots.txt's url_for happy :)
 @views.route('/source/<path:slug>/')
 def source(slug=None):